@@ -8,3 +8,77 @@ GRADIUM_API_KEY = os.environ["GRADIUM_API_KEY"]
 GEMINI_API_KEY = os.environ["GEMINI_API_KEY"]
 WORLD_LABS_API_KEY = os.environ["WORLD_LABS_API_KEY"]
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
+
+# Gradium TTS session pool (services/tts_pool.py). The cap applies across
+# all voice sessions in this process; Gradium's per-key session limit is low.
+GRADIUM_TTS_MAX_CONCURRENCY = int(os.environ.get("GRADIUM_TTS_MAX_CONCURRENCY", "2"))
+GRADIUM_TTS_WARM_STREAMS = int(os.environ.get("GRADIUM_TTS_WARM_STREAMS", "1"))
+GRADIUM_TTS_MAX_IDLE_S = float(os.environ.get("GRADIUM_TTS_MAX_IDLE_S", "45"))
+
+# Start Gemini at VAD end-of-speech and hold the output until the debounced
+# turn confirms the transcript (routers/voice.py). Costs an extra Gemini call
+# whenever the user keeps talking; set to 0 to disable.
+VOICE_SPECULATIVE_TURNS = os.environ.get("VOICE_SPECULATIVE_TURNS", "1") == "1"
+
+# Directory for per-session STT recordings (services/stt_recorder.py), replayed
+# offline with replay_turns.py to tune turn-taking. Empty = don't record.
+VOICE_STT_RECORD_DIR = os.environ.get("VOICE_STT_RECORD_DIR", "")
+
+# Gemini conversation history compaction (services/history_policy.py):
+# estimated-token budget, turns that keep their canvas frames, and turns
+# kept verbatim when older ones are rolled into a running summary.
+GEMINI_HISTORY_TOKEN_BUDGET = int(os.environ.get("GEMINI_HISTORY_TOKEN_BUDGET", "24000"))
+GEMINI_HISTORY_KEEP_IMAGE_TURNS = int(os.environ.get("GEMINI_HISTORY_KEEP_IMAGE_TURNS", "2"))
+GEMINI_HISTORY_KEEP_RECENT_TURNS = int(os.environ.get("GEMINI_HISTORY_KEEP_RECENT_TURNS", "6"))
+
+# Gemini explicit context caching of each phase's system prompt + tool schemas
+# (services/context_cache.py). Off by default: cached storage is billed per hour.
+GEMINI_CONTEXT_CACHE = os.environ.get("GEMINI_CONTEXT_CACHE", "0") == "1"
+GEMINI_CONTEXT_CACHE_TTL_S = float(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_S", "600"))
+
+# On confirm_exploration, run summarize_session, generate_loading_messages and
+# select_music as three concurrent Gemini calls, each forwarded as it lands.
+# 0 = one forced call emitting all three tools.
+GEMINI_PARALLEL_TRANSITION = os.environ.get("GEMINI_PARALLEL_TRANSITION", "1") == "1"
+
+# Shared upstream HTTP pools (services/upstream_clients.py) — one keep-alive
+# pool per upstream for the whole process. HTTP/2 is used when `h2` is installed.
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "1") == "1"
+
+# Completed World Labs operations / world payloads cache (services/operation_registry.py).
+# Keep the TTL below the lifetime of World Labs' signed asset URLs.
+WORLD_CACHE_MAX_ENTRIES = int(os.environ.get("WORLD_CACHE_MAX_ENTRIES", "256"))
+WORLD_CACHE_TTL_S = float(os.environ.get("WORLD_CACHE_TTL_S", "3600"))
+
+# Generation scheduler (services/generation_scheduler.py): World Labs
+# operations running upstream at once; further requests queue by priority.
+WORLD_MAX_IN_FLIGHT = int(os.environ.get("WORLD_MAX_IN_FLIGHT", "4"))
+
+# Persistent world catalog (services/world_catalog.py): reuse finished worlds
+# for equivalent generation requests. Empty path = in-memory (per process).
+WORLD_CATALOG_PATH = os.environ.get(
+    "WORLD_CATALOG_PATH", str(Path(__file__).parent / "data" / "world_catalog.sqlite3")
+)
+
+# Local world asset proxy (services/asset_cache.py): serve splats, meshes and
+# panoramas from a disk LRU under /api/worlds/assets instead of the CDN.
+ASSET_PROXY_ENABLED = os.environ.get("ASSET_PROXY_ENABLED", "1") == "1"
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", str(Path(__file__).parent / "data" / "assets"))
+ASSET_CACHE_MAX_BYTES = int(os.environ.get("ASSET_CACHE_MAX_BYTES", str(5 * 1024**3)))
+
+# Speculative world pre-generation during globe selection (services/world_prefetch.py).
+# Opt-in: spends World Labs credits on places the user may not confirm.
+WORLD_PREFETCH_ENABLED = os.environ.get("WORLD_PREFETCH_ENABLED", "0") == "1"
+WORLD_PREFETCH_SETTLE_S = float(os.environ.get("WORLD_PREFETCH_SETTLE_S", "4"))
+WORLD_PREFETCH_SESSION_BUDGET = int(os.environ.get("WORLD_PREFETCH_SESSION_BUDGET", "2"))
+WORLD_PREFETCH_GLOBAL_BUDGET = int(os.environ.get("WORLD_PREFETCH_GLOBAL_BUDGET", "4"))
+WORLD_PREFETCH_MAX_AGE_S = float(os.environ.get("WORLD_PREFETCH_MAX_AGE_S", "900"))
+
+# Progressive worlds: explore a fast mini preview while a higher-quality
+# generation of the same scene runs; the session gets world_status
+# "upgrade_ready" with the new assets to hot-swap. Costs a second generation.
+WORLD_PROGRESSIVE_GENERATION = os.environ.get("WORLD_PROGRESSIVE_GENERATION", "0") == "1"
+WORLD_UPGRADE_MODEL = os.environ.get("WORLD_UPGRADE_MODEL", "Marble 0.1-plus")
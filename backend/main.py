@@ -1,9 +1,110 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import FRONTEND_URL
+from fastapi.responses import PlainTextResponse
+from config import (
+    ASSET_CACHE_DIR,
+    ASSET_CACHE_MAX_BYTES,
+    ASSET_PROXY_ENABLED,
+    FRONTEND_URL,
+    GEMINI_API_KEY,
+    GEMINI_CONTEXT_CACHE,
+    GEMINI_CONTEXT_CACHE_TTL_S,
+    GRADIUM_API_KEY,
+    GRADIUM_TTS_MAX_CONCURRENCY,
+    GRADIUM_TTS_MAX_IDLE_S,
+    GRADIUM_TTS_WARM_STREAMS,
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY_S,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    WORLD_CACHE_MAX_ENTRIES,
+    WORLD_CACHE_TTL_S,
+    WORLD_CATALOG_PATH,
+    WORLD_LABS_API_KEY,
+    WORLD_MAX_IN_FLIGHT,
+    WORLD_PREFETCH_ENABLED,
+    WORLD_PREFETCH_GLOBAL_BUDGET,
+    WORLD_PREFETCH_MAX_AGE_S,
+    WORLD_PREFETCH_SESSION_BUDGET,
+    WORLD_PREFETCH_SETTLE_S,
+)
 from routers import voice, worlds
+from services.asset_cache import AssetCache
+from services.context_cache import ContextCache
+from services.gemini_guide import GEMINI_MODEL
+from services.metrics import render_prometheus
+from services.operation_registry import OperationRegistry
+from services.tts_pool import TTSSessionPool
+from services.upstream_clients import PoolConfig, UpstreamClients
+from services.world_catalog import WorldCatalog
+from services.world_prefetch import WorldPrefetcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared upstream clients (keep-alive HTTP pools, one Gemini client).
+    app.state.upstreams = UpstreamClients(
+        gradium_api_key=GRADIUM_API_KEY,
+        gemini_api_key=GEMINI_API_KEY,
+        world_labs_api_key=WORLD_LABS_API_KEY,
+        pool=PoolConfig(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry_s=HTTP_KEEPALIVE_EXPIRY_S,
+            http2=HTTP2_ENABLED,
+        ),
+    )
+    # Process-wide TTS pool shared by every /ws/voice session.
+    app.state.tts_pool = TTSSessionPool(
+        app.state.upstreams.gradium,
+        max_concurrent=GRADIUM_TTS_MAX_CONCURRENCY,
+        warm=GRADIUM_TTS_WARM_STREAMS,
+        max_idle_s=GRADIUM_TTS_MAX_IDLE_S,
+    )
+    await app.state.tts_pool.start()
+    # One adaptive poll loop per World Labs operation, shared by WS + REST.
+    app.state.world_catalog = WorldCatalog(WORLD_CATALOG_PATH or ":memory:")
+    app.state.operations = OperationRegistry(
+        app.state.upstreams.world_labs,
+        cache_size=WORLD_CACHE_MAX_ENTRIES,
+        cache_ttl_s=WORLD_CACHE_TTL_S,
+        catalog=app.state.world_catalog,
+        max_in_flight=WORLD_MAX_IN_FLIGHT,
+    )
+    # Opt-in speculative mini generations while the user is on the globe.
+    app.state.world_prefetch = WorldPrefetcher(
+        app.state.operations,
+        enabled=WORLD_PREFETCH_ENABLED,
+        settle_s=WORLD_PREFETCH_SETTLE_S,
+        session_budget=WORLD_PREFETCH_SESSION_BUDGET,
+        global_budget=WORLD_PREFETCH_GLOBAL_BUDGET,
+        max_age_s=WORLD_PREFETCH_MAX_AGE_S,
+    )
+    # Disk cache behind /api/worlds/assets (the CDN is hit once per asset).
+    if ASSET_PROXY_ENABLED:
+        app.state.asset_cache = AssetCache(
+            ASSET_CACHE_DIR,
+            max_bytes=ASSET_CACHE_MAX_BYTES,
+            client=app.state.upstreams.world_assets_http.client,
+        )
+    # Provider-side cache of the guide's system prompt + tools, shared by sessions.
+    if GEMINI_CONTEXT_CACHE:
+        app.state.context_cache = ContextCache(
+            app.state.upstreams.genai,
+            model=GEMINI_MODEL,
+            ttl_s=GEMINI_CONTEXT_CACHE_TTL_S,
+        )
+    yield
+    await app.state.operations.stop()
+    app.state.world_catalog.close()
+    await app.state.tts_pool.stop()
+    print(f"[UPSTREAM] Pool stats at shutdown: {app.state.upstreams.pool_stats()}")
+    await app.state.upstreams.aclose()
 
-app = FastAPI(title="QHacks 2026 — Historical Explorer API")
+
+app = FastAPI(title="QHacks 2026 — Historical Explorer API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,3 +122,9 @@ app.include_router(worlds.router)
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of voice pipeline latency + counters."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,223 @@
+"""Pre-generate worlds for popular destinations into the world catalog.
+
+Reads a destination list and generates a world for each one through the same
+OperationRegistry the server uses: batch-priority jobs in the generation
+queue (--concurrency upstream at once), adaptive polling, and the world
+catalog for progress. Each finished world's assets are fetched and checked
+with WorldLabsService.extract_renderable_assets before it counts as done.
+
+Re-runs are idempotent and resumable: destinations already ready in the
+catalog are skipped without an upstream call, and ones still generating
+from an interrupted run are re-attached rather than started again. Asset
+URLs are signed, so the catalog keeps the world_id and the server re-fetches
+assets on demand.
+
+Destinations are JSON (a list), JSON lines or CSV, with fields:
+  location, lat, lng            required
+  year, time_period             optional
+  scene_description             optional; otherwise --template is filled in
+  model                         optional; otherwise --model
+
+Usage:
+  python pregenerate_worlds.py destinations.jsonl
+  python pregenerate_worlds.py destinations.csv --concurrency 2 --model "Marble 0.1-plus"
+  python pregenerate_worlds.py destinations.json --template "{location}, {time_period}: a busy market square"
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import httpx
+
+from services.generation_scheduler import PRIORITY_BATCH
+from services.operation_registry import OperationRegistry
+from services.world_catalog import WorldCatalog, to_float
+from services.world_labs import WorldLabsService
+from services.world_prefetch import prefetch_prompt
+
+DEFAULT_MODEL = "Marble 0.1-mini"
+
+
+@dataclass(frozen=True)
+class Destination:
+    location: str
+    lat: float
+    lng: float
+    year: float | None = None
+    time_period: str | None = None
+    scene_description: str | None = None
+    model: str | None = None
+
+    def scene(self, template: str | None) -> str:
+        if self.scene_description:
+            return self.scene_description
+        if template:
+            return template.format(
+                location=self.location,
+                time_period=self.time_period or "",
+                year=int(self.year) if self.year is not None else "",
+            )
+        return prefetch_prompt(self.location, self.time_period, self.year)
+
+
+@dataclass
+class PregenResult:
+    location: str
+    outcome: str  # "generated" | "reused" | "failed"
+    operation_id: str | None = None
+    world_id: str | None = None
+    error: str | None = None
+    seconds: float = 0.0
+
+
+def load_destinations(path: Path) -> list[Destination]:
+    """Parse a .json / .jsonl / .csv destination list; rows without a location or coordinates are rejected."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".csv":
+        rows = list(csv.DictReader(text.splitlines()))
+    elif path.suffix.lower() == ".jsonl":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = json.loads(text)
+
+    destinations = []
+    for i, row in enumerate(rows, 1):
+        lat, lng = to_float(row.get("lat")), to_float(row.get("lng"))
+        if not row.get("location") or lat is None or lng is None:
+            raise ValueError(f"{path}: row {i} needs location, lat and lng: {row}")
+        destinations.append(Destination(
+            location=row["location"],
+            lat=lat,
+            lng=lng,
+            year=to_float(row.get("year")),
+            time_period=row.get("time_period") or None,
+            scene_description=row.get("scene_description") or None,
+            model=row.get("model") or None,
+        ))
+    return destinations
+
+
+async def pregenerate_one(
+    destination: Destination,
+    operations: OperationRegistry,
+    *,
+    model: str = DEFAULT_MODEL,
+    template: str | None = None,
+) -> PregenResult:
+    started = time.perf_counter()
+    result = PregenResult(location=destination.location, outcome="failed")
+    try:
+        generation = await operations.start_generation(
+            scene_description=destination.scene(template),
+            display_name=" — ".join(p for p in (destination.location, destination.time_period) if p),
+            model=destination.model or model,
+            location=destination.location,
+            time_period=destination.time_period,
+            lat=destination.lat,
+            lng=destination.lng,
+            year=destination.year,
+            priority=PRIORITY_BATCH,
+        )
+        result.operation_id = generation.operation_id
+        state = await operations.wait(generation.operation_id)
+        if state.error:
+            raise RuntimeError(state.error)
+        world_id = WorldLabsService.extract_world_id((state.operation or {}).get("response") or {})
+        if not world_id:
+            raise RuntimeError("operation finished without a world id")
+        assets = WorldLabsService.extract_renderable_assets(await operations.world_assets(world_id))
+        if not assets.get("default_spz_url"):
+            raise RuntimeError("world has no renderable splat")
+        result.world_id = world_id
+        result.outcome = "reused" if generation.reused == "ready" else "generated"
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+async def pregenerate(
+    destinations: list[Destination],
+    operations: OperationRegistry,
+    *,
+    model: str = DEFAULT_MODEL,
+    template: str | None = None,
+    on_result=None,
+) -> list[PregenResult]:
+    """Generate every destination; concurrency is bounded by the registry's scheduler."""
+    async def run(destination: Destination) -> PregenResult:
+        result = await pregenerate_one(destination, operations, model=model, template=template)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    return list(await asyncio.gather(*(run(d) for d in destinations)))
+
+
+def _print_result(result: PregenResult) -> None:
+    detail = result.world_id if result.outcome != "failed" else result.error
+    print(f"{result.outcome:>9}  {result.seconds:7.1f}s  {result.location}  {detail}", flush=True)
+
+
+async def _amain(args: argparse.Namespace) -> list[PregenResult]:
+    from config import WORLD_LABS_API_KEY
+
+    destinations = load_destinations(args.destinations)
+    catalog = WorldCatalog(args.catalog)
+    async with httpx.AsyncClient(timeout=30) as http:
+        operations = OperationRegistry(
+            WorldLabsService(WORLD_LABS_API_KEY, client=http),
+            catalog=catalog,
+            max_in_flight=args.concurrency,
+        )
+        try:
+            return await pregenerate(
+                destinations, operations, model=args.model, template=args.template,
+                on_result=None if args.json else _print_result,
+            )
+        finally:
+            await operations.stop()
+            catalog.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    # config requires the server's API keys; only the CLI needs it, not importers.
+    from config import WORLD_CATALOG_PATH, WORLD_MAX_IN_FLIGHT
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("destinations", type=Path, help="destination list (.json, .jsonl or .csv)")
+    parser.add_argument("--catalog", default=WORLD_CATALOG_PATH, help="world catalog SQLite path (default: server's)")
+    parser.add_argument("--concurrency", type=int, default=WORLD_MAX_IN_FLIGHT, help="generations upstream at once")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model for rows that don't name one")
+    parser.add_argument("--template", help="scene template with {location}, {time_period}, {year}")
+    parser.add_argument("--json", action="store_true", help="emit one JSON object per destination")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = asyncio.run(_amain(args))
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        for r in results:
+            print(json.dumps(asdict(r)))
+        return 0 if all(r.outcome != "failed" for r in results) else 1
+
+    counts = {o: sum(1 for r in results if r.outcome == o) for o in ("generated", "reused", "failed")}
+    per_min = counts["generated"] / (elapsed / 60) if elapsed > 0 else 0.0
+    print(
+        f"{len(results)} destination(s) in {elapsed:.1f}s — {counts['generated']} generated "
+        f"({per_min:.1f}/min), {counts['reused']} already in catalog, {counts['failed']} failed"
+    )
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Replay recorded STT sessions through the turn detector, offline.
+
+Recordings come from services/stt_recorder.py (set VOICE_STT_RECORD_DIR and
+talk to the guide). Each recording is replayed with a simulated clock — far
+faster than real time — once per parameter set, and the results are
+summarised per set:
+
+  turns       turns fired
+  p50/p95/max end-of-speech (last counted STT word) → turn fired, seconds
+  splits      premature splits: STT words arrived within --split-window
+              after a fire, i.e. the user was still talking
+  double      double-fires: a turn fired within --double-fire-window of the
+              previous one
+  pending     recordings that ended with words still unfired
+
+Usage:
+  python replay_turns.py recordings/*.jsonl
+  python replay_turns.py recordings/*.jsonl --threshold 0.5,0.6,0.7 --debounce 0.3,0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from services.stt_recorder import load_recording
+from services.turn_detector import Turn, TurnDetector, TurnParams
+
+DEFAULT_SPLIT_WINDOW_S = 1.5
+DEFAULT_DOUBLE_FIRE_WINDOW_S = 4.0
+
+
+@dataclass
+class ReplayResult:
+    params: TurnParams
+    turns: list[Turn] = field(default_factory=list)
+    latencies: list[float] = field(default_factory=list)
+    splits: int = 0
+    double_fires: int = 0
+    pending: int = 0
+    live_turns: int = 0
+
+    def merge(self, other: ReplayResult) -> None:
+        self.turns += other.turns
+        self.latencies += other.latencies
+        self.splits += other.splits
+        self.double_fires += other.double_fires
+        self.pending += other.pending
+        self.live_turns += other.live_turns
+
+
+def replay_session(
+    events: list[dict],
+    params: TurnParams,
+    split_window_s: float = DEFAULT_SPLIT_WINDOW_S,
+    double_fire_window_s: float = DEFAULT_DOUBLE_FIRE_WINDOW_S,
+) -> ReplayResult:
+    """Run one recording through a TurnDetector on a simulated clock.
+
+    Mirrors receive_stt: `poll()` runs after every STT message; interrupts
+    only update the detector. Live "fired" markers are counted, not replayed.
+    """
+    now = 0.0
+    detector = TurnDetector(params, clock=lambda: now)
+    result = ReplayResult(params=params)
+    last_fire: float | None = None
+    split_counted = False
+
+    for event in events:
+        now = event.get("t", now)
+        kind = event.get("kind")
+        if kind == "text":
+            detector.on_text(event.get("text", ""))
+            if last_fire is not None and not split_counted and now - last_fire <= split_window_s:
+                result.splits += 1
+                split_counted = True
+        elif kind == "step":
+            detector.on_step(event.get("vad", []))
+        elif kind == "interrupt":
+            detector.on_interrupt()
+            continue
+        elif kind == "fired":
+            result.live_turns += 1
+            continue
+        else:
+            continue
+
+        turn = detector.poll()
+        if turn:
+            if last_fire is not None and turn.fired_at - last_fire <= double_fire_window_s:
+                result.double_fires += 1
+            result.turns.append(turn)
+            result.latencies.append(turn.fired_at - turn.last_word_at)
+            last_fire = turn.fired_at
+            split_counted = False
+
+    if detector.pending_text:
+        result.pending += 1
+    return result
+
+
+def _quantile(values: list[float], q: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def _floats(text: str) -> list[float]:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def _param_grid(args: argparse.Namespace) -> list[TurnParams]:
+    base = TurnParams()
+    axes = {
+        "inactivity_threshold": args.threshold or [base.inactivity_threshold],
+        "min_horizon_s": args.min_horizon or [base.min_horizon_s],
+        "debounce_s": args.debounce or [base.debounce_s],
+        "debounce_after_interrupt_s": args.debounce_after_interrupt or [base.debounce_after_interrupt_s],
+    }
+    names = list(axes)
+    return [replace(base, **dict(zip(names, combo))) for combo in itertools.product(*axes.values())]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", type=Path, help="STT recording .jsonl files")
+    parser.add_argument("--threshold", type=_floats, help="VAD inactivity thresholds, comma-separated")
+    parser.add_argument("--min-horizon", type=_floats, help="minimum VAD horizons (s), comma-separated")
+    parser.add_argument("--debounce", type=_floats, help="turn debounces (s), comma-separated")
+    parser.add_argument("--debounce-after-interrupt", type=_floats, help="post-interrupt debounces (s)")
+    parser.add_argument("--split-window", type=float, default=DEFAULT_SPLIT_WINDOW_S)
+    parser.add_argument("--double-fire-window", type=float, default=DEFAULT_DOUBLE_FIRE_WINDOW_S)
+    parser.add_argument("--json", action="store_true", help="emit one JSON object per parameter set")
+    args = parser.parse_args(argv)
+
+    sessions = [load_recording(path)[1] for path in args.recordings]
+    grid = _param_grid(args)
+
+    started = time.perf_counter()
+    results: list[ReplayResult] = []
+    for params in grid:
+        total = ReplayResult(params=params)
+        for events in sessions:
+            total.merge(replay_session(events, params, args.split_window, args.double_fire_window))
+        results.append(total)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        for r in results:
+            print(json.dumps({
+                "params": r.params.to_dict(),
+                "turns": len(r.turns),
+                "live_turns": r.live_turns,
+                "latency_p50_s": _quantile(r.latencies, 0.5),
+                "latency_p95_s": _quantile(r.latencies, 0.95),
+                "latency_max_s": max(r.latencies, default=math.nan),
+                "splits": r.splits,
+                "double_fires": r.double_fires,
+                "pending": r.pending,
+            }))
+        return 0
+
+    live = results[0].live_turns if results else 0
+    print(f"{len(sessions)} recording(s), {len(grid)} parameter set(s), {live} live turns — replayed in {elapsed:.2f}s")
+    print(f"{'thresh':>6} {'horizon':>7} {'debnc':>5} {'deb-int':>7} | {'turns':>5} {'p50':>6} {'p95':>6} {'max':>6} | {'splits':>6} {'double':>6} {'pending':>7}")
+    for r in results:
+        p = r.params
+        print(
+            f"{p.inactivity_threshold:>6.2f} {p.min_horizon_s:>7.1f} {p.debounce_s:>5.2f} {p.debounce_after_interrupt_s:>7.2f} | "
+            f"{len(r.turns):>5} {_quantile(r.latencies, 0.5):>6.2f} {_quantile(r.latencies, 0.95):>6.2f} "
+            f"{max(r.latencies, default=math.nan):>6.2f} | {r.splits:>6} {r.double_fires:>6} {r.pending:>7}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
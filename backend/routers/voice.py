@@ -14,6 +14,7 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import itertools
 import json
 import logging
 import re
@@ -21,32 +22,53 @@ import time
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from config import GRADIUM_API_KEY, GEMINI_API_KEY, WORLD_LABS_API_KEY
-from services.gradium_service import GradiumService
+from config import (
+    ASSET_PROXY_ENABLED,
+    GEMINI_API_KEY,
+    GEMINI_HISTORY_KEEP_IMAGE_TURNS,
+    GEMINI_HISTORY_KEEP_RECENT_TURNS,
+    GEMINI_HISTORY_TOKEN_BUDGET,
+    GEMINI_PARALLEL_TRANSITION,
+    VOICE_SPECULATIVE_TURNS,
+    VOICE_STT_RECORD_DIR,
+    WORLD_PROGRESSIVE_GENERATION,
+    WORLD_UPGRADE_MODEL,
+)
 from google.genai import types
-from services.gemini_guide import GeminiGuide
+from services.asset_cache import proxied_assets
+from services.gemini_guide import TOOL_FIRE_AND_FORGET, TRANSITION_TASKS, GeminiGuide, tool_execution
+from services.history_policy import HistoryPolicy
 from services.world_labs import WorldLabsService
 from services.music_selector import select_track
 from services.deezer_service import DeezerService
+from services import metrics
+from services.speculative_turn import SpeculativeResponse
+from services.splat_lod import ClientHints, apply_lod
+from services.stt_recorder import STTRecorder
+from services.turn_detector import TurnDetector
+from services.tts_pool import PRIORITY_INTERACTIVE, PRIORITY_NORMAL, TTSSessionPool
+from services.generation_scheduler import PRIORITY_SPECULATIVE, QueueListener
+from services.operation_registry import OperationRegistry
+from services.world_catalog import to_float
+from services.world_prefetch import PrefetchSession, WorldPrefetcher
+from services.upstream_clients import UpstreamClients
+from services.voice_transport import FRAMING_JSON, InboundAudioLane, VoiceTransport
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# VAD inactivity threshold — only trigger on sustained silence, not brief word pauses.
-# We check horizons >= 2.0s only. The 1.0s horizon fires on brief inter-word gaps
-# (e.g. 0.85 after just 500ms of pause between "the" and "world"), but the 2.0s
-# horizon stays low (0.22) during those same gaps. This prevents premature turns.
-VAD_INACTIVITY_THRESHOLD = 0.7
-VAD_MIN_HORIZON_S = 2.0
-# After VAD says "user stopped", wait this long for STT pipeline to flush
-# remaining words before firing the turn. Prevents split sentences.
-TURN_DEBOUNCE_S = 0.5
-# After a barge-in interrupt, the user is typically still mid-sentence.
-# STT fragments arrive in bursts (mic picks up tail of TTS + user speech).
-# Use a longer debounce to let the full sentence arrive before firing.
-TURN_DEBOUNCE_AFTER_INTERRUPT_S = 1.5
-# How long after an interrupt the extended debounce stays active.
-INTERRUPT_DEBOUNCE_WINDOW_S = 3.0
+# Numeric responseIds ("resp-<n>") so binary audio frames can carry the id in
+# a fixed-width header. Seeded from the clock to stay unique across restarts.
+_response_ids = itertools.count(int(time.time()))
+
+# Per-tool execution timeouts (seconds). Tools run concurrently with the
+# Gemini text stream; a tool past its timeout is cancelled and Gemini gets
+# an error result for it. World generation may wait for a scheduler slot.
+TOOL_TIMEOUTS_S: dict[str, float] = {
+    "trigger_world_generation": 60.0,
+    "select_music": 10.0,
+}
+DEFAULT_TOOL_TIMEOUT_S = 5.0
 
 
 def _ts() -> str:
@@ -69,50 +91,84 @@ def _sanitize_for_tts(text: str) -> str:
     return text
 
 
-async def _send_json(ws: WebSocket, msg: dict, closed: asyncio.Event) -> None:
-    """Send a JSON message to the frontend WebSocket, unless closed."""
-    if closed.is_set():
-        print(f"[{_ts()}][WS→FE] BLOCKED (ws closed): {msg.get('type')}")
-        return
+def _frame_image_part(frame_holder: dict | None) -> types.Part | None:
+    """Decode the latest canvas frame (base64 JPEG) into a Gemini image part."""
+    frame_b64 = (frame_holder or {}).get("image")
+    if not frame_b64:
+        print(f"[{_ts()}][FRAME] No frame available")
+        return None
     try:
-        await ws.send_text(json.dumps(msg))
-        # Log outbound messages (truncate audio data)
-        log_msg = dict(msg)
-        if log_msg.get("data") and len(str(log_msg["data"])) > 60:
-            log_msg["data"] = f"<{len(str(msg['data']))} chars b64>"
-        print(f"[{_ts()}][WS→FE] {json.dumps(log_msg)}")
+        part = types.Part(
+            inline_data=types.Blob(
+                mime_type="image/jpeg",
+                data=base64.b64decode(frame_b64),
+            )
+        )
     except Exception as e:
-        print(f"[{_ts()}][WS→FE] SEND ERROR: {e}")
-        closed.set()
+        print(f"[{_ts()}][FRAME] Failed to decode frame: {e}")
+        return None
+    print(f"[{_ts()}][FRAME] Using canvas frame ({len(frame_b64)} chars b64)")
+    return part
 
 
 async def _handle_function_call(
     fc: dict,
-    ws: WebSocket,
+    transport: VoiceTransport,
     gemini: GeminiGuide,
-    world_labs: WorldLabsService,
+    operations: OperationRegistry,
     deezer: DeezerService,
-    closed: asyncio.Event,
+    prefetch: PrefetchSession | None = None,
+    world_ops: dict | None = None,
+    hints: ClientHints | None = None,
 ) -> None:
-    """Execute a Gemini function call and send results to frontend."""
+    """Execute a Gemini function call and send results to frontend.
+
+    `world_ops` is the session's {"preview": op_id, "upgrade": op_id} record
+    for progressive generation (plus "upgrade_watched" once a notifier runs).
+    `hints` are the client's LOD hints for the splat picked in world_status.
+    """
     name = fc["name"]
     args = fc["args"]
     print(f"[{_ts()}][FUNC] Executing: {name}({json.dumps(args)})")
 
     if name == "trigger_world_generation":
-        await _send_json(ws, {"type": "world_status", "status": "generating"}, closed)
+        await transport.send_json({"type": "world_status", "status": "generating"})
         try:
-            operation_id = await world_labs.generate_world(
-                scene_description=args["scene_description"],
-                display_name=f"{args['location']} — {args['time_period']}",
-            )
+            lat = to_float(gemini.context.get("lat"))
+            lng = to_float(gemini.context.get("lng"))
+            year = to_float(gemini.context.get("year"))
+            generation = prefetch.owner.adopt(lat=lat, lng=lng, year=year) if prefetch else None
+            if generation is None:
+                generation = await operations.start_generation(
+                    scene_description=args["scene_description"],
+                    display_name=f"{args['location']} — {args['time_period']}",
+                    location=args.get("location"),
+                    time_period=args.get("time_period"),
+                    lat=lat,
+                    lng=lng,
+                    year=year,
+                    on_queue=_queue_reporter(transport),
+                )
+            operation_id = generation.operation_id
             asyncio.create_task(
-                _poll_world_and_notify(operation_id, ws, world_labs, closed)
+                _poll_world_and_notify(operation_id, transport, operations, hints=hints)
             )
-            gemini.add_function_result(name, {"status": "generation_started", "operation_id": operation_id})
+            if WORLD_PROGRESSIVE_GENERATION and world_ops is not None:
+                world_ops.clear()  # A new world: forget the previous one's upgrade
+                world_ops["preview"] = operation_id
+                asyncio.create_task(_start_world_upgrade(
+                    args["scene_description"], f"{args['location']} — {args['time_period']}",
+                    operations, world_ops, transport,
+                    location=args.get("location"), time_period=args.get("time_period"),
+                    lat=lat, lng=lng, year=year, hints=hints,
+                ))
+            gemini.add_function_result(name, {
+                "status": "world_ready" if generation.reused == "ready" else "generation_started",
+                "operation_id": operation_id,
+            })
         except Exception as e:
             logger.error("World generation failed: %s", e)
-            await _send_json(ws, {"type": "world_status", "status": "error"}, closed)
+            await transport.send_json({"type": "world_status", "status": "error"})
             gemini.add_function_result(name, {"status": "error", "error": str(e)})
 
     elif name == "select_music":
@@ -184,25 +240,25 @@ async def _handle_function_call(
                 music_msg["exploreTrackName"] = loading_track["title"]
                 music_msg["exploreArtist"] = loading_track["artist"]
                 print(f"[{_ts()}][FUNC] Music queue: loading=\"{loading_track['title']}\" (reusing for explore — no second track)")
-            await _send_json(ws, music_msg, closed)
+            await transport.send_json(music_msg)
             gemini.add_function_result(name, {"status": "playing_deezer", "track": loading_track["title"]})
         else:
             # Fallback to downloaded tracks
             track = select_track(era=args["era"], region=args["region"], mood=args["mood"])
             if track:
                 print(f"[{_ts()}][FUNC] Playing local fallback: \"{track['title']}\"")
-                await _send_json(ws, {"type": "music", "source": "local", "trackUrl": track["file"]}, closed)
+                await transport.send_json({"type": "music", "source": "local", "trackUrl": track["file"]})
                 gemini.add_function_result(name, {"status": "playing_local", "track": track["title"]})
             else:
                 print(f"[{_ts()}][FUNC] No music found (Deezer + local both empty)")
                 gemini.add_function_result(name, {"status": "no_track_found"})
 
     elif name == "generate_fact":
-        await _send_json(ws, {
+        await transport.send_json({
             "type": "fact",
             "text": args["fact_text"],
             "category": args["category"],
-        }, closed)
+        })
         gemini.add_function_result(name, {"status": "displayed"})
 
     elif name == "suggest_location":
@@ -214,62 +270,266 @@ async def _handle_function_call(
         }
         if "year" in args:
             loc_msg["year"] = args["year"]
-        await _send_json(ws, loc_msg, closed)
+        await transport.send_json(loc_msg)
+        if prefetch:
+            prefetch.request(
+                location=args["name"],
+                lat=to_float(args["lat"]),
+                lng=to_float(args["lng"]),
+                year=to_float(args.get("year", gemini.context.get("year"))),
+                time_period=gemini.context.get("time_period") or None,
+            )
         gemini.add_function_result(name, {"status": "location_suggested"})
 
     elif name == "summarize_session":
         print(f"[{_ts()}][FUNC] Session summary generated")
-        await _send_json(ws, {
+        await transport.send_json({
             "type": "session_summary",
             "userProfile": args["user_profile"],
             "worldDescription": args["world_description"],
-        }, closed)
+        })
         gemini.add_function_result(name, {"status": "session_saved"})
+        if WORLD_PROGRESSIVE_GENERATION and world_ops is not None:
+            # Start the upgrade now, alongside the frontend's preview; the
+            # exploring session attaches to it (same catalog key) and notifies.
+            location_name = gemini.context.get("location_name") or None
+            time_period = gemini.context.get("time_period") or None
+            asyncio.create_task(_start_world_upgrade(
+                args["world_description"],
+                " — ".join(p for p in (location_name, time_period) if p) or "QHacks World",
+                operations, world_ops,
+                location=location_name, time_period=time_period,
+                lat=to_float(gemini.context.get("lat")),
+                lng=to_float(gemini.context.get("lng")),
+                year=to_float(gemini.context.get("year")),
+            ))
 
     elif name == "generate_loading_messages":
         messages = args.get("messages", [])
         print(f"[{_ts()}][FUNC] Loading messages generated: {len(messages)} messages")
-        await _send_json(ws, {
+        await transport.send_json({
             "type": "loading_messages",
             "messages": messages,
-        }, closed)
+        })
         gemini.add_function_result(name, {"status": "messages_sent", "count": len(messages)})
 
     else:
         print(f"[{_ts()}][FUNC] Unknown function call: {name}")
 
 
+async def _run_tool(
+    fc: dict,
+    transport: VoiceTransport,
+    gemini: GeminiGuide,
+    operations: OperationRegistry,
+    deezer: DeezerService,
+    prefetch: PrefetchSession | None = None,
+    world_ops: dict | None = None,
+    hints: ClientHints | None = None,
+) -> None:
+    """Run one function call as its own task, under its TOOL_TIMEOUTS_S limit.
+
+    A call that times out or raises still gets an error result, so every
+    call Gemini made has a response in history.
+    """
+    name = fc["name"]
+    timeout_s = TOOL_TIMEOUTS_S.get(name, DEFAULT_TOOL_TIMEOUT_S)
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(
+            _handle_function_call(fc, transport, gemini, operations, deezer, prefetch, world_ops, hints=hints),
+            timeout=timeout_s,
+        )
+    except asyncio.TimeoutError:
+        print(f"[{_ts()}][FUNC] {name} timed out after {timeout_s:.0f}s")
+        metrics.TOOL_CALL_TIMEOUTS.inc()
+        gemini.add_function_result(name, {"status": "error", "error": "timed out"})
+    except Exception as e:
+        logger.error("Function call %s failed: %s", name, e)
+        gemini.add_function_result(name, {"status": "error", "error": str(e)})
+    metrics.TOOL_CALL_DURATION.observe(time.monotonic() - started)
+
+
+async def _process_transition(
+    transport: VoiceTransport,
+    gemini: GeminiGuide,
+    operations: OperationRegistry,
+    deezer: DeezerService | None = None,
+    world_ops: dict | None = None,
+    hints: ClientHints | None = None,
+    confirmed_at: float | None = None,
+) -> None:
+    """Transition burst as concurrent, narrowly scoped Gemini calls.
+
+    Each TRANSITION_TASKS entry (summarize_session, generate_loading_messages,
+    select_music) is its own request (GeminiGuide.run_transition_task) and is
+    executed the moment it lands, so session_summary reaches the frontend,
+    which starts world generation from it, without waiting for the
+    loading messages, the music or Deezer. Sends transition_complete once
+    all three are done; cancelled as a whole on barge-in.
+    """
+    response_id = f"resp-{next(_response_ids)}"
+    started_at = confirmed_at or time.monotonic()
+    calls: list[dict] = []
+    print(f"[{_ts()}][GEMINI] ===== TRANSITION {response_id} START ({len(TRANSITION_TASKS)} parallel calls) =====")
+    # The tasks' model turn must follow a user turn, not the guide's last reply.
+    gemini.conversation_history.append(types.Content(role="user", parts=[types.Part(text=(
+        "[System: The user has pressed the Enter button to confirm they want to explore this location.]"
+    ))]))
+    await transport.send_json({"type": "response_start", "responseId": response_id})
+
+    async def run_task(name: str) -> None:
+        args = await gemini.run_transition_task(name)
+        print(f"[{_ts()}][GEMINI] Transition task {name} landed after {time.monotonic() - started_at:.2f}s")
+        if args is None:
+            print(f"[{_ts()}][GEMINI] WARNING: {name} returned no tool call")
+            return
+        fc = {"type": "function_call", "name": name, "args": args}
+        calls.append(fc)
+        await _run_tool(fc, transport, gemini, operations, deezer, world_ops=world_ops, hints=hints)
+        if name == "summarize_session":
+            metrics.CONFIRM_TO_WORLD_DESCRIPTION.observe(time.monotonic() - started_at)
+
+    tasks = [asyncio.create_task(run_task(name)) for name in TRANSITION_TASKS]
+    try:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for name, result in zip(TRANSITION_TASKS, results):
+            if isinstance(result, Exception):
+                print(f"[{_ts()}][GEMINI] Transition task {name} failed: {result}")
+        if calls:
+            gemini.record_function_calls(calls)
+            gemini.record_function_results()
+        print(f"[{_ts()}][VOICE] Transition complete in {time.monotonic() - started_at:.2f}s — signaling frontend")
+        await transport.send_json({"type": "transition_complete"})
+    except asyncio.CancelledError:
+        print(f"[{_ts()}][GEMINI] ===== TRANSITION {response_id} CANCELLED =====")
+        raise
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Nothing left queued after a completed burst; after a cancelled one no
+        # model turn was recorded, so results of the tasks that did land must
+        # not answer the next turn's calls.
+        gemini.discard_function_results()
+
+
+def _queue_reporter(transport: VoiceTransport) -> QueueListener:
+    """Relay generation-queue moves to the frontend as world_status "queued"."""
+    def report(position: int, eta_s: float) -> None:
+        print(f"[{_ts()}][WORLD] Queued at position {position}, ETA {eta_s:.0f}s")
+        asyncio.create_task(transport.send_json({
+            "type": "world_status",
+            "status": "queued",
+            "queuePosition": position,
+            "etaS": round(eta_s),
+        }))
+    return report
+
+
+async def _start_world_upgrade(
+    scene_description: str,
+    display_name: str,
+    operations: OperationRegistry,
+    world_ops: dict,
+    transport: VoiceTransport | None = None,
+    *,
+    location: str | None = None,
+    time_period: str | None = None,
+    lat: float | None = None,
+    lng: float | None = None,
+    year: float | None = None,
+    hints: ClientHints | None = None,
+) -> None:
+    """Progressive mode: generate the same scene with WORLD_UPGRADE_MODEL.
+
+    Equivalent upgrade requests share one operation via the world catalog,
+    so a later session (e.g. the reconnected exploring one) attaches to it.
+    With a transport, pushes world_status "upgrade_ready" once it lands.
+    """
+    if not world_ops.get("upgrade"):
+        try:
+            generation = await operations.start_generation(
+                scene_description=scene_description,
+                display_name=display_name,
+                model=WORLD_UPGRADE_MODEL,
+                location=location,
+                time_period=time_period,
+                lat=lat,
+                lng=lng,
+                year=year,
+                priority=PRIORITY_SPECULATIVE,
+            )
+        except Exception as e:
+            logger.warning("World upgrade failed to start: %s", e)
+            return
+        world_ops["upgrade"] = generation.operation_id
+        metrics.WORLD_UPGRADES_STARTED.inc()
+        print(
+            f"[{_ts()}][WORLD] Upgrade {generation.operation_id} ({WORLD_UPGRADE_MODEL}) "
+            f"{generation.reused or 'started'} — preview={world_ops.get('preview')}"
+        )
+    if transport is not None and not world_ops.get("upgrade_watched"):
+        world_ops["upgrade_watched"] = True
+        await _poll_world_and_notify(
+            world_ops["upgrade"], transport, operations, status="upgrade_ready", hints=hints,
+        )
+
+
 async def _poll_world_and_notify(
-    operation_id: str, ws: WebSocket, world_labs: WorldLabsService, closed: asyncio.Event,
+    operation_id: str, transport: VoiceTransport, operations: OperationRegistry,
+    status: str = "ready",
+    hints: ClientHints | None = None,
 ) -> None:
-    """Background task: poll world generation status and notify frontend."""
+    """Background task: wait for the shared poller to see the world done, then notify frontend.
+
+    `status` is "ready" for the world the user is waiting on, or
+    "upgrade_ready" for a progressive upgrade — a failed upgrade is only
+    logged, since the preview is still good. With client `hints`, the
+    initial splat and its upgrade ladder (`worldAssets.lod`) fit the device.
+    """
     try:
-        operation_response = await world_labs.poll_status(operation_id)
+        state = await operations.wait(operation_id)
+        if state.error:
+            raise RuntimeError(f"World generation failed: {state.error}")
+        operation_response = (state.operation or {}).get("response") or {}
         world_id = WorldLabsService.extract_world_id(operation_response) or ""
-        world_data = await world_labs.get_world_assets(world_id) if world_id else operation_response
+        world_data = await operations.world_assets(world_id) if world_id else operation_response
         renderable_assets = WorldLabsService.extract_renderable_assets(world_data)
-        await _send_json(ws, {
+        if ASSET_PROXY_ENABLED and world_id:
+            renderable_assets = proxied_assets(world_id, renderable_assets)
+        if hints is not None and world_id:
+            renderable_assets = apply_lod(renderable_assets, await operations.splat_sizes(world_id), hints)
+        await transport.send_json({
             "type": "world_status",
-            "status": "ready",
+            "status": status,
             "worldId": world_id,
             "splatUrl": renderable_assets.get("default_spz_url"),
             "worldAssets": renderable_assets,
-        }, closed)
+        })
+        if status == "upgrade_ready":
+            metrics.WORLD_UPGRADES_DELIVERED.inc()
     except Exception as e:
-        logger.error("World polling failed: %s", e)
-        await _send_json(ws, {"type": "world_status", "status": "error"}, closed)
+        logger.error("World polling failed (%s): %s", status, e)
+        if status == "ready":
+            await transport.send_json({"type": "world_status", "status": "error"})
 
 
 async def _process_gemini_response(
     user_text: str,
-    ws: WebSocket,
+    transport: VoiceTransport,
     gemini: GeminiGuide,
-    gradium: GradiumService,
-    world_labs: WorldLabsService,
-    closed: asyncio.Event,
+    tts_pool: TTSSessionPool,
+    operations: OperationRegistry,
     deezer: DeezerService | None = None,
     frame_event: asyncio.Event | None = None,
     frame_holder: dict | None = None,
+    turn_started_at: float | None = None,
+    tts_priority: int = PRIORITY_NORMAL,
+    speculation: SpeculativeResponse | None = None,
+    prefetch: PrefetchSession | None = None,
+    world_ops: dict | None = None,
+    hints: ClientHints | None = None,
 ) -> None:
     """Send user text to Gemini, stream response text to TTS and frontend.
 
@@ -277,18 +537,54 @@ async def _process_gemini_response(
     starts speaking mid-response, this task is cancelled and TTS is closed.
 
     If TTS creation fails (e.g. concurrency limit), falls back to text-only mode.
+
+    `turn_started_at` (time.monotonic) is when the turn fired; per-stage
+    latencies are recorded in services.metrics relative to it.
+
+    If `speculation` is given, the first Gemini round replays that already
+    running generation (started at VAD time for this same user_text) instead
+    of issuing a new request.
+
+    `prefetch` lets `suggest_location` start a speculative world for the
+    suggested place (globe phase only). `world_ops` records the session's
+    preview/upgrade operations for progressive generation, and `hints` the
+    client's LOD hints for world_status assets.
+
+    Function calls run as concurrent tasks (`_run_tool`) while text keeps
+    streaming; they are joined before any request that needs their results
+    and cancelled together on barge-in.
     """
     tts_stream = None
     tts_recv_task = None
-    response_id = f"resp-{time.time():.0f}"
+    response_id = f"resp-{next(_response_ids)}"
+    started_at = turn_started_at or time.monotonic()
+    first_token_at: float | None = None
+
+    def mark_first_token() -> None:
+        nonlocal first_token_at
+        if first_token_at is None:
+            first_token_at = time.monotonic()
+            metrics.TURN_TO_FIRST_TOKEN.observe(first_token_at - started_at)
+
+    tool_tasks: list[asyncio.Task] = []
+
+    async def settle_tools() -> None:
+        """Wait for dispatched function calls, then record their results."""
+        if tool_tasks:
+            await asyncio.gather(*tool_tasks)
+            tool_tasks.clear()
+        gemini.record_function_results()
 
     print(f"[{_ts()}][GEMINI] ===== RESPONSE {response_id} START =====")
     print(f"[{_ts()}][GEMINI] User text: \"{user_text}\"")
-    print(f"[{_ts()}][GEMINI] History length: {len(gemini.conversation_history)} entries")
+    print(
+        f"[{_ts()}][GEMINI] History length: {len(gemini.conversation_history)} entries "
+        f"(last request ~{gemini.history_policy.tokens} tokens)"
+    )
 
     # Notify frontend which response is now active — frontend uses this to
     # drop stale audio from previous (cancelled) responses still in-flight.
-    await _send_json(ws, {"type": "response_start", "responseId": response_id}, closed)
+    await transport.send_json({"type": "response_start", "responseId": response_id})
 
     is_transition = gemini.context.get("phase") == "transition"
 
@@ -298,23 +594,15 @@ async def _process_gemini_response(
         if is_transition:
             print(f"[{_ts()}][TTS] Skipping TTS for transition phase (tools only)")
         else:
-            # Try to create TTS stream with retry for concurrency limits.
-            # Gradium has a 2-session limit; closed sessions take a moment to free.
-            for _tts_attempt in range(3):
-                try:
-                    tts_stream = await gradium.create_tts_stream()
-                    print(f"[{_ts()}][TTS] Stream created OK for {response_id}")
-                    break
-                except ConnectionError as e:
-                    if "Concurrencylimit" in str(e) and _tts_attempt < 2:
-                        print(f"[{_ts()}][TTS] Concurrency limit, retry {_tts_attempt + 1}/3 in 3s...")
-                        await asyncio.sleep(3)
-                    else:
-                        print(f"[{_ts()}][TTS] UNAVAILABLE ({e}), text-only fallback")
-                        break
-                except Exception as e:
-                    print(f"[{_ts()}][TTS] UNAVAILABLE ({e}), text-only fallback")
-                    break
+            # Take a pre-handshaked stream from the process-wide pool. The pool
+            # enforces Gradium's concurrency cap and queues us fairly behind
+            # other sessions, so there is no handshake or retry sleep here.
+            try:
+                tts_stream = await tts_pool.acquire(priority=tts_priority)
+                print(f"[{_ts()}][TTS] Stream acquired from pool for {response_id}")
+            except Exception as e:
+                print(f"[{_ts()}][TTS] UNAVAILABLE ({e}), text-only fallback")
+                metrics.TTS_FALLBACKS.inc()
 
         # If TTS is available, start forwarding audio to frontend
         if tts_stream:
@@ -325,18 +613,27 @@ async def _process_gemini_response(
                 async for msg_type, payload in tts_stream.iter_audio():
                     if msg_type == "audio":
                         tts_chunk_count += 1
-                        encoded = base64.b64encode(payload).decode("ascii")
                         if tts_chunk_count <= 3 or tts_chunk_count % 20 == 0:
                             print(f"[{_ts()}][TTS→FE] Audio chunk #{tts_chunk_count}: {len(payload)} bytes")
-                        await _send_json(ws, {"type": "audio", "data": encoded, "responseId": response_id}, closed)
+                        on_sent = None
+                        if tts_chunk_count == 1:
+                            first_audio_at = time.monotonic()
+                            if first_token_at is not None:
+                                metrics.FIRST_TOKEN_TO_FIRST_AUDIO.observe(first_audio_at - first_token_at)
+
+                            def on_sent(first_audio_at: float = first_audio_at) -> None:
+                                now = time.monotonic()
+                                metrics.FIRST_AUDIO_TO_SEND.observe(now - first_audio_at)
+                                metrics.TIME_TO_FIRST_AUDIO.observe(now - started_at)
+                        await transport.send_audio(payload, response_id, on_sent=on_sent)
                     elif msg_type == "timestamp":
-                        await _send_json(ws, {
+                        await transport.send_json({
                             "type": "word_timestamp",
                             "text": payload["text"],
                             "startS": payload["start_s"],
                             "stopS": payload["stop_s"],
                             "responseId": response_id,
-                        }, closed)
+                        })
                 print(f"[{_ts()}][TTS] Audio stream ended. Total chunks: {tts_chunk_count}")
 
             tts_recv_task = asyncio.create_task(forward_tts_audio())
@@ -345,32 +642,20 @@ async def _process_gemini_response(
         # Frontend proactively sends frames on speech (transcript events), so
         # frame_holder usually already has a recent frame. Also send request_frame
         # as a backup and wait briefly for a fresh capture.
+        # A speculative generation already carries the frame it was started with.
         frame_image_part = None
-        if gemini.context.get("phase") == "exploring" and frame_holder is not None:
+        if speculation is None and gemini.context.get("phase") == "exploring" and frame_holder is not None:
             # Request a fresh frame (non-blocking backup)
             if frame_event:
                 frame_event.clear()
-                await _send_json(ws, {"type": "request_frame"}, closed)
+                await transport.send_json({"type": "request_frame"})
                 try:
                     await asyncio.wait_for(frame_event.wait(), timeout=1.5)
                 except asyncio.TimeoutError:
                     print(f"[{_ts()}][FRAME] Request timed out — using stored frame if available")
 
             # Use whatever frame we have (proactive or from request)
-            frame_b64 = frame_holder.get("image")
-            if frame_b64:
-                try:
-                    frame_image_part = types.Part(
-                        inline_data=types.Blob(
-                            mime_type="image/jpeg",
-                            data=base64.b64decode(frame_b64),
-                        )
-                    )
-                    print(f"[{_ts()}][FRAME] Using canvas frame ({len(frame_b64)} chars b64)")
-                except Exception as e:
-                    print(f"[{_ts()}][FRAME] Failed to decode frame: {e}")
-            else:
-                print(f"[{_ts()}][FRAME] No frame available")
+            frame_image_part = _frame_image_part(frame_holder)
 
         # Stream Gemini response — text always goes to frontend, TTS if available.
         # Loop handles function calling: after executing function calls and adding
@@ -382,17 +667,26 @@ async def _process_gemini_response(
 
         for round_num in range(MAX_FUNCTION_ROUNDS + 1):
             function_calls_this_round = []
+            round_text = ""
+
+            if round_num == 0 and speculation is not None:
+                print(f"[{_ts()}][SPEC] Committing speculative response ({speculation.buffered} chunks buffered)")
+                chunks = speculation.replay()
+            else:
+                chunks = gemini.generate_response(input_text, image_part=frame_image_part)
 
-            async for chunk in gemini.generate_response(input_text, image_part=frame_image_part):
+            async for chunk in chunks:
                 if chunk["type"] == "text":
                     text_piece = chunk["text"]
                     full_response_text += text_piece
+                    round_text += text_piece
                     gemini_chunk_count += 1
+                    mark_first_token()
                     # During transition, discard text — no voice response needed
                     if is_transition:
                         continue
                     print(f"[{_ts()}][GEMINI] Chunk #{gemini_chunk_count}: \"{text_piece}\"")
-                    await _send_json(ws, {"type": "guide_text", "text": text_piece, "responseId": response_id}, closed)
+                    await transport.send_json({"type": "guide_text", "text": text_piece, "responseId": response_id})
                     if tts_stream:
                         tts_text = _sanitize_for_tts(text_piece)
                         if tts_text.strip():
@@ -401,10 +695,14 @@ async def _process_gemini_response(
                 elif chunk["type"] == "function_call":
                     print(f"[{_ts()}][GEMINI] Function call: {chunk['name']}")
                     function_calls_this_round.append(chunk)
-                    await _handle_function_call(chunk, ws, gemini, world_labs, deezer, closed)
+                    # Network-bound tools (World Labs, Deezer) must not hold up the text.
+                    tool_tasks.append(asyncio.create_task(_run_tool(
+                        chunk, transport, gemini, operations, deezer, prefetch, world_ops, hints=hints,
+                    )))
 
             if not function_calls_this_round:
                 break  # Pure text response — done
+            metrics.FUNCTION_CALL_ROUNDS.inc()
 
             # In transition phase, one round of tool calls is all we need.
             # Don't loop back — Gemini would generate a huge narration in round 2.
@@ -412,8 +710,19 @@ async def _process_gemini_response(
                 print(f"[{_ts()}][GEMINI] Transition round complete — skipping follow-up")
                 break
 
+            # Fire-and-forget tools (facts, suggestions) only acknowledge; if
+            # the guide already spoke this round, that is the reply. Without
+            # any text we still need the follow-up round below.
+            if round_text.strip() and all(
+                tool_execution(fc["name"]) == TOOL_FIRE_AND_FORGET for fc in function_calls_this_round
+            ):
+                print(f"[{_ts()}][GEMINI] Round {round_num + 1}: fire-and-forget tools only — no follow-up round")
+                metrics.FOLLOW_UP_ROUNDS_SKIPPED.inc()
+                break
+
             # Function calls were made — call Gemini again for follow-up voice response
             print(f"[{_ts()}][GEMINI] Round {round_num + 1}: {len(function_calls_this_round)} function call(s), continuing for follow-up...")
+            await settle_tools()  # The follow-up round needs this round's results
             input_text = None  # No new user message — continue from function result
             frame_image_part = None  # Only attach frame on first round
 
@@ -423,6 +732,7 @@ async def _process_gemini_response(
         # tool calls (generate_fact) over spoken output.
         if not full_response_text.strip() and not is_transition and tts_stream:
             print(f"[{_ts()}][GEMINI] WARNING: No spoken text generated — forcing voice follow-up")
+            await settle_tools()
             gemini.conversation_history.append(
                 types.Content(role="user", parts=[types.Part(text=(
                     "[System: You just called tools but produced no spoken text. "
@@ -435,8 +745,9 @@ async def _process_gemini_response(
                     text_piece = chunk["text"]
                     full_response_text += text_piece
                     gemini_chunk_count += 1
+                    mark_first_token()
                     print(f"[{_ts()}][GEMINI] Forced chunk #{gemini_chunk_count}: \"{text_piece}\"")
-                    await _send_json(ws, {"type": "guide_text", "text": text_piece, "responseId": response_id}, closed)
+                    await transport.send_json({"type": "guide_text", "text": text_piece, "responseId": response_id})
                     tts_text = _sanitize_for_tts(text_piece)
                     if tts_text.strip():
                         await tts_stream.send_text(tts_text)
@@ -448,6 +759,10 @@ async def _process_gemini_response(
             print(f"[{_ts()}][TTS] Sending flush (end_of_stream)")
             await tts_stream.send_flush()
 
+        # Tools from the last round (side effects, transition tools) may still
+        # be running; their results go after the model turn that called them.
+        await settle_tools()
+
         # Wait for all TTS audio to be forwarded
         if tts_recv_task:
             print(f"[{_ts()}][TTS] Waiting for audio forwarding to complete...")
@@ -459,7 +774,7 @@ async def _process_gemini_response(
         # voice and switch to loading phase.
         if gemini.context.get("phase") == "transition":
             print(f"[{_ts()}][VOICE] Transition complete — signaling frontend")
-            await _send_json(ws, {"type": "transition_complete"}, closed)
+            await transport.send_json({"type": "transition_complete"})
 
     except asyncio.CancelledError:
         print(f"[{_ts()}][GEMINI] ===== RESPONSE {response_id} CANCELLED (barge-in) =====")
@@ -472,19 +787,23 @@ async def _process_gemini_response(
     except Exception as e:
         print(f"[{_ts()}][GEMINI] ===== RESPONSE {response_id} ERROR: {e} =====")
     finally:
+        # Barge-in or error: cancel the turn's tools as a group. If their model
+        # turn already made it into history, every call still gets a response
+        # (cancelled tools as {"status": "cancelled"}) so the history stays valid.
+        for task in tool_tasks:
+            task.cancel()
+        gemini.record_function_results()
         if tts_stream:
             try:
                 # Per Gradium best practices: send end_of_stream before closing
                 # so the server can clean up the session faster. We don't await
-                # remaining audio — just signal and close immediately.
+                # remaining audio — just signal and hand back to the pool, which
+                # closes it and refills the slot in the background.
                 await tts_stream.send_flush()
             except Exception:
                 pass
-            try:
-                await tts_stream.close()
-                print(f"[{_ts()}][TTS] Stream closed for {response_id}")
-            except Exception:
-                pass
+            tts_pool.release(tts_stream)
+            print(f"[{_ts()}][TTS] Stream released for {response_id}")
         print(f"[{_ts()}][GEMINI] ===== RESPONSE {response_id} END =====")
 
 
@@ -492,37 +811,69 @@ async def _process_gemini_response(
 async def voice_ws(websocket: WebSocket):
     """Main voice pipeline WebSocket endpoint."""
     await websocket.accept()
-    print(f"[{_ts()}][VOICE] ========== WebSocket CONNECTED ==========")
-
-    gradium = GradiumService(api_key=GRADIUM_API_KEY)
-    gemini = GeminiGuide(api_key=GEMINI_API_KEY)
-    world_labs = WorldLabsService(api_key=WORLD_LABS_API_KEY)
-
-    deezer = DeezerService()
+    transport = VoiceTransport(websocket, framing=websocket.query_params.get("framing", FRAMING_JSON))
+    print(f"[{_ts()}][VOICE] ========== WebSocket CONNECTED (framing={transport.framing}) ==========")
+    transport.start()
+    await transport.send_session_config()
+    metrics.ACTIVE_SESSIONS.inc()
+
+    # Process-wide clients (main.py lifespan) — no per-session connection setup.
+    upstreams: UpstreamClients = websocket.app.state.upstreams
+    gradium = upstreams.gradium
+    tts_pool: TTSSessionPool = websocket.app.state.tts_pool
+    gemini = GeminiGuide(
+        api_key=GEMINI_API_KEY,
+        client=upstreams.genai,
+        history_policy=HistoryPolicy(
+            token_budget=GEMINI_HISTORY_TOKEN_BUDGET,
+            keep_image_turns=GEMINI_HISTORY_KEEP_IMAGE_TURNS,
+            keep_recent_turns=GEMINI_HISTORY_KEEP_RECENT_TURNS,
+        ),
+        context_cache=getattr(websocket.app.state, "context_cache", None),
+    )
+    operations: OperationRegistry = websocket.app.state.operations
+    deezer = upstreams.deezer
+    world_prefetch: WorldPrefetcher = websocket.app.state.world_prefetch
+    prefetch = world_prefetch.session()  # Speculative world for the place being browsed
+    world_ops: dict = {}  # {"preview": op_id, "upgrade": op_id} (progressive generation)
+    # Splat LOD hints (downlink, device memory, GPU tier) sent as query params.
+    hints = ClientHints.from_params(websocket.query_params, websocket.headers)
 
     stt_stream = None
-    transcript_buffer = ""
+    audio_lane: InboundAudioLane | None = None
+    turn_detector = TurnDetector()  # Shared: fed by STT task, told about interrupts by main loop
+    stt_recorder = STTRecorder.for_session(VOICE_STT_RECORD_DIR, turn_detector.params.to_dict()) if VOICE_STT_RECORD_DIR else None
     current_response: asyncio.Task | None = None
-    ws_closed = asyncio.Event()  # Prevents sending on a closed WebSocket
     turn_count = 0
-    last_interrupt_at = 0.0  # Shared: set by interrupt handler, read by STT task
+    speculation: SpeculativeResponse | None = None  # Held Gemini output for the pending turn
 
     # Frame capture for Gemini visual context (exploring phase)
     frame_event = asyncio.Event()
     frame_holder: dict = {}  # {"image": "<base64_jpeg>"}
 
+    def discard_speculation(reason: str) -> None:
+        nonlocal speculation
+        if speculation is not None:
+            print(f"[{_ts()}][SPEC] Discarded ({reason}): \"{speculation.user_text[:50]}\"")
+            speculation.discard()
+            metrics.SPECULATION_DISCARDED.inc()
+            speculation = None
+
     try:
         print(f"[{_ts()}][VOICE] Creating STT stream...")
         stt_stream = await gradium.create_stt_stream()
         print(f"[{_ts()}][VOICE] STT stream created OK")
 
+        # Mic audio goes to STT through its own lane + sender task so the
+        # receive loop below never blocks on Gradium back-pressure.
+        audio_lane = InboundAudioLane(stt_stream.send_audio)
+        audio_lane.start()
+
         # Task: receive STT messages (transcripts + VAD)
         async def receive_stt():
-            nonlocal transcript_buffer, current_response, turn_count, last_interrupt_at
+            nonlocal current_response, turn_count, speculation
             msg_count = 0
-            turn_ready = False
-            last_stt_word_at = 0.0
-            turn_fired_at = 0.0
+            params = turn_detector.params
             while True:
                 try:
                     msg = await stt_stream.receive()
@@ -534,56 +885,41 @@ async def voice_ws(websocket: WebSocket):
 
                 if msg_type == "text":
                     text = msg["text"]
-                    transcript_buffer += " " + text
-                    # Ignore late STT words that arrive after a turn already fired —
-                    # they're trailing transcription, not new speech. Updating
-                    # last_stt_word_at would reset the debounce and risk double-firing.
-                    since_last_fire = time.time() - turn_fired_at
-                    if since_last_fire > 1.5:
-                        last_stt_word_at = time.time()
-                    print(f"[{_ts()}][STT] TRANSCRIPT: \"{text}\" | Buffer: \"{transcript_buffer.strip()}\"" + (f" (late, ignored for debounce)" if since_last_fire <= 1.5 else ""))
-                    await _send_json(websocket, {
+                    if stt_recorder:
+                        stt_recorder.record("text", text=text)
+                    # Late STT words (arriving just after a turn fired) are
+                    # trailing transcription, not new speech — the detector
+                    # buffers them without resetting the debounce.
+                    late = turn_detector.on_text(text)
+                    print(f"[{_ts()}][STT] TRANSCRIPT: \"{text}\" | Buffer: \"{turn_detector.pending_text}\"" + (f" (late, ignored for debounce)" if late else ""))
+                    await transport.send_json({
                         "type": "transcript",
                         "text": text,
                         "partial": False,
-                    }, ws_closed)
+                    })
                     # NOTE: No STT-based barge-in here. Barge-in is handled
                     # exclusively by frontend mic activity detection (interrupt msg).
                     # STT words often arrive after VAD fires, causing false barge-in.
 
                 elif msg_type == "step":
-                    # VAD format: list of {horizon_s, inactivity_prob} objects.
-                    # Only check horizons >= VAD_MIN_HORIZON_S to avoid triggering
-                    # on brief mid-sentence pauses (e.g. 0.5s between words).
                     vad = msg.get("vad", [])
-                    max_inactivity = 0.0
-                    qualifying_horizons = []
-                    for entry in vad:
-                        if isinstance(entry, dict):
-                            h = entry.get("horizon_s", 0)
-                            p = entry.get("inactivity_prob", 0)
-                            if h >= VAD_MIN_HORIZON_S:
-                                qualifying_horizons.append(f"{h}s:{p:.2f}")
-                                max_inactivity = max(max_inactivity, p)
+                    if stt_recorder:
+                        stt_recorder.record("step", vad=vad)
+                    reading = turn_detector.on_step(vad)
 
                     # Log VAD: always when buffer has text, every 50th step otherwise
-                    has_text = bool(transcript_buffer.strip())
-                    if has_text or (msg_count % 50 == 0):
+                    buffered = turn_detector.pending_text
+                    if buffered or (msg_count % 50 == 0):
+                        shown = f'"{buffered[:50]}"' if buffered else "<empty>"
                         print(
                             f"[{_ts()}][VAD] step#{msg_count} | "
-                            f"max_inactivity={max_inactivity:.2f} (thresh={VAD_INACTIVITY_THRESHOLD}) | "
-                            f"horizons=[{', '.join(qualifying_horizons)}] | "
-                            f"buffer={'\"' + transcript_buffer.strip()[:50] + '\"' if has_text else '<empty>'} | "
-                            f"{'>>> WOULD FIRE' if max_inactivity > VAD_INACTIVITY_THRESHOLD and has_text else 'no trigger'}"
+                            f"max_inactivity={reading.max_inactivity:.2f} (thresh={params.inactivity_threshold}) | "
+                            f"horizons=[{', '.join(f'{h}s:{p:.2f}' for h, p in reading.horizons)}] | "
+                            f"buffer={shown} | "
+                            f"{'>>> WOULD FIRE' if reading.max_inactivity > params.inactivity_threshold and buffered else 'no trigger'}"
                         )
-
-                    if max_inactivity > VAD_INACTIVITY_THRESHOLD and transcript_buffer.strip():
-                        # Don't re-arm turn_ready if we just fired — prevents double-firing
-                        # when late STT words arrive after the turn already launched.
-                        since_last_fire = time.time() - turn_fired_at
-                        if not turn_ready and since_last_fire > 2.0:
-                            print(f"[{_ts()}][VAD] Turn READY — waiting {TURN_DEBOUNCE_S}s for STT to settle")
-                            turn_ready = True
+                    if reading.became_ready:
+                        print(f"[{_ts()}][VAD] Turn READY — waiting {turn_detector.current_debounce()[0]}s for STT to settle")
 
                 elif msg_type == "ready":
                     print(f"[{_ts()}][STT] Ready message received")
@@ -593,30 +929,31 @@ async def voice_ws(websocket: WebSocket):
 
                 # --- Debounced turn firing ---
                 # Fire turn only after VAD indicates silence AND STT has settled
-                # (no new words for TURN_DEBOUNCE_S). This prevents splitting
-                # sentences when STT delivers trailing words after VAD fires.
-                # After a barge-in interrupt, use a longer debounce — the user
-                # is likely still mid-sentence and STT fragments arrive in bursts.
-                since_interrupt = time.time() - last_interrupt_at
-                debounce = (
-                    TURN_DEBOUNCE_AFTER_INTERRUPT_S
-                    if since_interrupt < INTERRUPT_DEBOUNCE_WINDOW_S
-                    else TURN_DEBOUNCE_S
-                )
-                if (turn_ready
-                        and transcript_buffer.strip()
-                        and last_stt_word_at > 0
-                        and (time.time() - last_stt_word_at) > debounce):
+                # (see services/turn_detector.py for the rules).
+                turn = turn_detector.poll()
+                if turn:
                     turn_count += 1
-                    user_text = transcript_buffer.strip()
-                    transcript_buffer = ""
-                    turn_ready = False
-                    last_stt_word_at = 0.0
-                    turn_fired_at = time.time()
-                    debounce_type = "post-interrupt" if since_interrupt < INTERRUPT_DEBOUNCE_WINDOW_S else "normal"
-                    print(f"[{_ts()}][VOICE] ===== TURN #{turn_count} FIRED ({debounce_type} debounce={debounce}s) =====")
+                    user_text = turn.text
+                    turn_started_at = turn.fired_at
+                    if stt_recorder:
+                        stt_recorder.record("fired", text=user_text)
+                    metrics.TURNS.inc()
+                    metrics.VAD_TO_TURN.observe(turn.fired_at - turn.vad_ready_at)
+                    debounce_type = "post-interrupt" if turn.post_interrupt else "normal"
+                    print(f"[{_ts()}][VOICE] ===== TURN #{turn_count} FIRED ({debounce_type} debounce={turn.debounce_s}s) =====")
                     print(f"[{_ts()}][VOICE] User said: \"{user_text}\"")
 
+                    # Serve the turn from the speculative generation if it was
+                    # started on exactly this transcript.
+                    turn_speculation = None
+                    if speculation is not None and speculation.matches(user_text):
+                        turn_speculation, speculation = speculation, None
+                        metrics.SPECULATION_HITS.inc()
+                        metrics.SPECULATION_HEAD_START.observe(turn_started_at - turn_speculation.started_at)
+                        print(f"[{_ts()}][SPEC] HIT — {turn_started_at - turn_speculation.started_at:.2f}s head start")
+                    else:
+                        discard_speculation("turn text differs")
+
                     # Cancel any in-progress response and wait for TTS cleanup
                     if current_response and not current_response.done():
                         print(f"[{_ts()}][VOICE] Cancelling previous response for new turn")
@@ -625,17 +962,43 @@ async def voice_ws(websocket: WebSocket):
                             await current_response
                         except (asyncio.CancelledError, Exception):
                             pass
-                        await _send_json(websocket, {"type": "interrupt"}, ws_closed)
+                        await transport.send_json({"type": "interrupt"})
 
                     # Launch new response as background task (non-blocking)
                     print(f"[{_ts()}][VOICE] Launching Gemini response task for turn #{turn_count}")
                     current_response = asyncio.create_task(
                         _process_gemini_response(
-                            user_text, websocket, gemini, gradium, world_labs, ws_closed, deezer,
+                            user_text, transport, gemini, tts_pool, operations, deezer,
                             frame_event=frame_event, frame_holder=frame_holder,
+                            turn_started_at=turn_started_at,
+                            tts_priority=PRIORITY_INTERACTIVE,
+                            speculation=turn_speculation,
+                            prefetch=prefetch,
+                            world_ops=world_ops,
+                            hints=hints,
                         )
                     )
 
+                # --- Speculative generation ---
+                # While the debounce runs, start Gemini on the buffered text so
+                # the reply is already streaming when the turn fires. Restarted
+                # whenever more words arrive; never while another response is
+                # live (its history writes would race the speculative request).
+                elif (VOICE_SPECULATIVE_TURNS
+                        and turn_detector.turn_ready
+                        and turn_detector.pending_text
+                        and gemini.context.get("phase") != "transition"
+                        and (current_response is None or current_response.done())):
+                    candidate = turn_detector.pending_text
+                    if speculation is None or speculation.user_text != candidate:
+                        discard_speculation("more words arrived")
+                        image_part = None
+                        if gemini.context.get("phase") == "exploring":
+                            image_part = _frame_image_part(frame_holder)
+                        speculation = SpeculativeResponse(gemini, candidate, image_part=image_part)
+                        metrics.SPECULATION_STARTED.inc()
+                        print(f"[{_ts()}][SPEC] Started on \"{candidate[:50]}\"")
+
         stt_task = asyncio.create_task(receive_stt())
         print(f"[{_ts()}][VOICE] STT receive task started, entering main loop")
 
@@ -643,23 +1006,29 @@ async def voice_ws(websocket: WebSocket):
         interrupt_count = 0
         # Main loop: receive messages from frontend
         while True:
-            raw = await websocket.receive_text()
-            msg = json.loads(raw)
-            msg_type = msg.get("type")
+            kind, payload = await transport.receive()
 
-            if msg_type == "audio":
-                # Forward audio to Gradium STT
-                pcm_bytes = base64.b64decode(msg["data"])
+            if kind == "audio":
+                # Forward audio to Gradium STT (binary frame or legacy base64 JSON)
+                pcm_bytes = payload
                 audio_msg_count += 1
                 if audio_msg_count <= 5 or audio_msg_count % 100 == 0:
-                    print(f"[{_ts()}][FE→STT] Audio chunk #{audio_msg_count}: {len(pcm_bytes)} bytes")
-                await stt_stream.send_audio(pcm_bytes)
+                    print(
+                        f"[{_ts()}][FE→STT] Audio chunk #{audio_msg_count}: {len(pcm_bytes)} bytes "
+                        f"(lane depth={audio_lane.depth}, lag={audio_lane.stats.last_lag_s * 1000:.0f}ms)"
+                    )
+                audio_lane.put(pcm_bytes)
+                continue
 
-            elif msg_type == "context":
+            msg = payload
+            msg_type = msg.get("type")
+
+            if msg_type == "context":
                 # Update Gemini guide context
                 location = msg.get("location", {})
                 time_period = msg.get("timePeriod", {})
                 print(f"[{_ts()}][FE→BE] Context update: location={location}, timePeriod={time_period}")
+                discard_speculation("context update")
                 gemini.update_context(
                     location_name=location.get("name", ""),
                     lat=location.get("lat", ""),
@@ -667,14 +1036,27 @@ async def voice_ws(websocket: WebSocket):
                     time_period=time_period.get("label", ""),
                     year=time_period.get("year", ""),
                 )
+                prefetch.request(
+                    location=location.get("name", ""),
+                    lat=to_float(location.get("lat")),
+                    lng=to_float(location.get("lng")),
+                    year=to_float(time_period.get("year")),
+                    time_period=time_period.get("label") or None,
+                )
 
             elif msg_type == "interrupt":
                 # Frontend detected mic activity while guide was speaking.
                 # Cancel the current response immediately.
                 interrupt_count += 1
-                last_interrupt_at = time.time()
+                turn_detector.on_interrupt()
+                if stt_recorder:
+                    stt_recorder.record("interrupt")
+                interrupt_received_at = time.monotonic()
+                metrics.INTERRUPTS.inc()
                 is_active = current_response is not None and not current_response.done() if current_response else False
                 print(f"[{_ts()}][FE→BE] INTERRUPT #{interrupt_count} from frontend | response_active={is_active}")
+                # Frontend already stopped playback — drop any output still queued.
+                await transport.cancel_audio()
                 if current_response and not current_response.done():
                     print(f"[{_ts()}][VOICE] Frontend interrupt — cancelling response")
                     current_response.cancel()
@@ -683,15 +1065,18 @@ async def voice_ws(websocket: WebSocket):
                     except (asyncio.CancelledError, Exception):
                         pass
                     current_response = None
+                    metrics.INTERRUPT_CANCEL.observe(time.monotonic() - interrupt_received_at)
 
             elif msg_type == "phase":
                 print(f"[{_ts()}][FE→BE] Phase update: {msg.get('phase')}")
+                discard_speculation("phase update")
                 gemini.update_context(phase=msg.get("phase", "globe_selection"))
 
             elif msg_type == "session_start":
                 # Frontend signals voice session should begin — send AI welcome
                 time_period = msg.get("timePeriod", {})
                 print(f"[{_ts()}][FE→BE] Session start: timePeriod={time_period}")
+                discard_speculation("session start")
                 gemini.update_context(
                     time_period=time_period.get("label", ""),
                     year=time_period.get("year", ""),
@@ -703,13 +1088,16 @@ async def voice_ws(websocket: WebSocket):
                 )
                 current_response = asyncio.create_task(
                     _process_gemini_response(
-                        None, websocket, gemini, gradium, world_labs, ws_closed, deezer
+                        None, transport, gemini, tts_pool, operations, deezer, prefetch=prefetch,
                     )
                 )
 
             elif msg_type == "confirm_exploration":
                 # User pressed "Enter" — trigger AI goodbye + session summary + loading messages + music
                 print(f"[{_ts()}][FE→BE] User confirmed exploration")
+                confirmed_at = time.monotonic()
+                discard_speculation("exploration confirmed")
+                prefetch.cancel_pending()  # The real generation starts after summarize_session
                 if current_response and not current_response.done():
                     current_response.cancel()
                     try:
@@ -718,33 +1106,42 @@ async def voice_ws(websocket: WebSocket):
                         pass
                 # Switch to transition phase — enables transition tool set
                 gemini.update_context(phase="transition")
-                # Inject system instruction for goodbye + all transition tool calls
-                gemini.conversation_history.append(
-                    types.Content(
-                        role="user",
-                        parts=[types.Part(text=(
-                            "[System: The user has pressed the Enter button to confirm they want "
-                            "to explore this location. Call ALL THREE tools in a single response:\n"
-                            "   - summarize_session: include a warm goodbye_text (1-2 sentences, "
-                            "reference something personal about the user), a detailed user_profile, "
-                            "and an extremely detailed world_description (8-12 sentences describing "
-                            "the scene for 3D generation — architecture, lighting, atmosphere, people, "
-                            "textures, colors, weather, vegetation, everything a film set designer "
-                            "would need)\n"
-                            "   - generate_loading_messages: 15 short, cute loading messages "
-                            "personalized to the user and destination (no periods, start with -ing verbs)\n"
-                            "   - select_music: choose music matching the era, region, and mood. "
-                            "Include song_suggestions — a list of 5 real song names (with artist) that "
-                            "fit the destination. Format: 'Song Title - Artist'.\n"
-                            "Do NOT generate any text outside of tool calls.]"
-                        ))]
+                if GEMINI_PARALLEL_TRANSITION:
+                    current_response = asyncio.create_task(
+                        _process_transition(
+                            transport, gemini, operations, deezer,
+                            world_ops=world_ops, hints=hints, confirmed_at=confirmed_at,
+                        )
                     )
-                )
-                current_response = asyncio.create_task(
-                    _process_gemini_response(
-                        None, websocket, gemini, gradium, world_labs, ws_closed, deezer
+                else:
+                    # Inject system instruction for goodbye + all transition tool calls
+                    gemini.conversation_history.append(
+                        types.Content(
+                            role="user",
+                            parts=[types.Part(text=(
+                                "[System: The user has pressed the Enter button to confirm they want "
+                                "to explore this location. Call ALL THREE tools in a single response:\n"
+                                "   - summarize_session: include a warm goodbye_text (1-2 sentences, "
+                                "reference something personal about the user), a detailed user_profile, "
+                                "and an extremely detailed world_description (8-12 sentences describing "
+                                "the scene for 3D generation — architecture, lighting, atmosphere, people, "
+                                "textures, colors, weather, vegetation, everything a film set designer "
+                                "would need)\n"
+                                "   - generate_loading_messages: 15 short, cute loading messages "
+                                "personalized to the user and destination (no periods, start with -ing verbs)\n"
+                                "   - select_music: choose music matching the era, region, and mood. "
+                                "Include song_suggestions — a list of 5 real song names (with artist) that "
+                                "fit the destination. Format: 'Song Title - Artist'.\n"
+                                "Do NOT generate any text outside of tool calls.]"
+                            ))]
+                        )
+                    )
+                    current_response = asyncio.create_task(
+                        _process_gemini_response(
+                            None, transport, gemini, tts_pool, operations, deezer,
+                            world_ops=world_ops, hints=hints,
+                        )
                     )
-                )
 
             elif msg_type == "explore_start":
                 # Exploring phase: reconnected voice with Phase 1 context
@@ -753,6 +1150,7 @@ async def voice_ws(websocket: WebSocket):
                 loc = msg.get("location") or {}
                 tp = msg.get("timePeriod") or {}
                 print(f"[{_ts()}][FE→BE] Explore start: location={loc.get('name')}, era={tp.get('label')}")
+                discard_speculation("explore start")
 
                 # Reset Gemini for fresh exploring session with Phase 1 context
                 gemini.reset()
@@ -777,10 +1175,22 @@ async def voice_ws(websocket: WebSocket):
                 )
                 current_response = asyncio.create_task(
                     _process_gemini_response(
-                        None, websocket, gemini, gradium, world_labs, ws_closed, deezer,
+                        None, transport, gemini, tts_pool, operations, deezer,
                         frame_event=frame_event, frame_holder=frame_holder,
+                        world_ops=world_ops, hints=hints,
                     )
                 )
+                if WORLD_PROGRESSIVE_GENERATION and world_desc and loc.get("name"):
+                    # Attach to the upgrade the transition session started (same
+                    # catalog key) so this session can push upgrade_ready.
+                    asyncio.create_task(_start_world_upgrade(
+                        world_desc,
+                        " — ".join(p for p in (loc.get("name"), tp.get("label")) if p),
+                        operations, world_ops, transport,
+                        location=loc.get("name"), time_period=tp.get("label") or None,
+                        lat=to_float(loc.get("lat")), lng=to_float(loc.get("lng")),
+                        year=to_float(tp.get("year")), hints=hints,
+                    ))
 
             elif msg_type == "frame":
                 # Canvas frame from frontend for Gemini visual context
@@ -797,10 +1207,24 @@ async def voice_ws(websocket: WebSocket):
         import traceback
         traceback.print_exc()
     finally:
-        ws_closed.set()
+        await transport.close()
+        metrics.ACTIVE_SESSIONS.dec()
+        metrics.OUTBOUND_DROPPED_STALE.inc(transport.queue_stats.dropped_stale)
         if current_response and not current_response.done():
             current_response.cancel()
+        discard_speculation("session closed")
+        prefetch.close()
+        print(f"[{_ts()}][HISTORY] Session history at close: {gemini.history_policy.stats()}")
+        gemini.history_policy.reset()
+        gemini.close()
+        if audio_lane:
+            await audio_lane.close()
+            print(f"[{_ts()}][VOICE] Inbound audio lane stats: {audio_lane.stats.summary()}")
         if stt_stream:
             await stt_stream.close()
+        if stt_recorder:
+            stt_recorder.close()
         print(f"[{_ts()}][VOICE] Session stats: {audio_msg_count} audio chunks, {turn_count} turns")
+        print(f"[{_ts()}][VOICE] Framing stats ({transport.framing}): {transport.stats.summary()}")
+        print(f"[{_ts()}][VOICE] Outbound queue stats: {transport.queue_stats.summary()}")
         print(f"[{_ts()}][VOICE] ========== CLEANUP COMPLETE ==========")
@@ -2,7 +2,8 @@
 
 Provides REST endpoints for the frontend to:
 - Poll world generation status independently
-- Fetch world assets
+- Stream status transitions (Server-Sent Events) instead of polling
+- Fetch world assets (optionally through the local disk cache at /assets)
 
 These supplement the WebSocket-based world status updates in voice.py.
 See TECHNICAL.md Section 6 for World Labs API details.
@@ -10,31 +11,69 @@ See TECHNICAL.md Section 6 for World Labs API details.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
-from config import WORLD_LABS_API_KEY
+from services import metrics
+from services.asset_cache import AssetCache, asset_urls, proxied_assets
+from services.operation_registry import OperationRegistry
+from services.splat_lod import ClientHints, apply_lod
+from services.world_catalog import WorldCatalog
+from services.world_prefetch import WorldPrefetcher
 from services.world_labs import WorldLabsService
 
 router = APIRouter(prefix="/api/worlds", tags=["worlds"])
 logger = logging.getLogger(__name__)
 
-world_labs = WorldLabsService(api_key=WORLD_LABS_API_KEY)
 HARDCODED_PROMPT_PATH = Path(__file__).resolve().parent.parent / "hardcoded_prompt.txt"
+# SSE comment sent while nothing changes, so proxies don't drop the stream.
+STREAM_HEARTBEAT_S = 15.0
+# /status:batch — max IDs per request and concurrent resolutions per request.
+BATCH_MAX_OPERATIONS = 100
+BATCH_CONCURRENCY = 8
+# /assets — a world's assets never change once generated.
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 class GenerateRequest(BaseModel):
     scene_description: str
     display_name: str = "QHacks World"
     model: str = "Marble 0.1-mini"
+    # Optional context — part of the dedupe key and indexed for nearby lookups.
+    location: str | None = None
+    time_period: str | None = None
+    lat: float | None = None
+    lng: float | None = None
+    year: float | None = None
+    # Skip the world catalog and always start a new generation.
+    fresh: bool = False
 
 
 class GenerateResponse(BaseModel):
     operation_id: str
+    # "ready" (existing world reused), "in_flight" (attached to a running
+    # generation) or "prefetched" (speculative globe-phase world adopted);
+    # None for a new generation.
+    reused: str | None = None
+
+
+class SplatLodRungResponse(BaseModel):
+    resolution: str
+    url: str
+    bytes: int | None = None
+
+
+class SplatLodResponse(BaseModel):
+    # Resolution `default_spz_url` points at; load the ladder's larger rungs after it.
+    initial: str
+    ladder: list[SplatLodRungResponse]
 
 
 class RenderableAssetsResponse(BaseModel):
@@ -45,6 +84,8 @@ class RenderableAssetsResponse(BaseModel):
     thumbnail_url: str | None = None
     caption: str | None = None
     world_marble_url: str | None = None
+    # Only when the client sent hints (downlink / device_memory / gpu_tier).
+    lod: SplatLodResponse | None = None
 
 
 class DebugPayloadResponse(BaseModel):
@@ -61,9 +102,103 @@ class StatusResponse(BaseModel):
     splat_url: str | None = None
     assets: RenderableAssetsResponse | None = None
     error: str | None = None
+    # While generating: suggested seconds until the next status poll, from
+    # the shared poller's ETA-aware schedule.
+    next_poll_s: float | None = None
     debug: DebugPayloadResponse | None = None
 
 
+class BatchStatusRequest(BaseModel):
+    operation_ids: list[str] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+    debug: bool = False
+
+
+class BatchStatusItem(BaseModel):
+    operation_id: str
+    # Exactly one of these is set: the status, or why it couldn't be resolved.
+    status: StatusResponse | None = None
+    error: str | None = None
+
+
+class BatchStatusResponse(BaseModel):
+    results: list[BatchStatusItem]
+
+
+class NearbyWorldResponse(BaseModel):
+    world_id: str
+    operation_id: str
+    display_name: str | None = None
+    location: str | None = None
+    time_period: str | None = None
+    lat: float
+    lng: float
+    year: float | None = None
+    distance_km: float
+    year_delta: float | None = None
+
+
+class NearbyResponse(BaseModel):
+    worlds: list[NearbyWorldResponse]
+
+
+def get_operations(request: Request) -> OperationRegistry:
+    """Shared World Labs operation poller (one upstream loop per operation)."""
+    return request.app.state.operations
+
+
+def get_world_catalog(request: Request) -> WorldCatalog:
+    """Persistent catalog of generated worlds (dedupe + nearby index)."""
+    return request.app.state.world_catalog
+
+
+def get_world_prefetch(request: Request) -> WorldPrefetcher | None:
+    """Speculative globe-phase generations (None when the app doesn't run them)."""
+    return getattr(request.app.state, "world_prefetch", None)
+
+
+def get_asset_cache(request: Request) -> AssetCache | None:
+    """Local world asset cache (None when the proxy is disabled)."""
+    return getattr(request.app.state, "asset_cache", None)
+
+
+# Request headers ClientHints.from_params reads (query params are part of the URL).
+LOD_HINT_HEADERS = "Downlink, Device-Memory"
+
+
+def get_client_hints(request: Request) -> ClientHints | None:
+    """LOD hints from `downlink`, `device_memory`, `gpu_tier` params or client-hint headers."""
+    return ClientHints.from_params(request.query_params, request.headers)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _with_http_caching(status: StatusResponse, request: Request, operations: OperationRegistry) -> Response:
+    """Serialize a status response; ready worlds get a strong ETag + Cache-Control.
+
+    A ready payload is immutable for as long as the registry caches it, so
+    max-age follows the cache entry's remaining TTL (asset URLs are signed).
+    Anything still generating or failed must be re-polled: no-store.
+    The LOD pick can come from the Downlink / Device-Memory client-hint
+    headers (get_client_hints), so ready responses vary on them.
+    """
+    body = status.model_dump_json().encode()
+    if not (status.done and status.status == "ready"):
+        return Response(body, media_type="application/json", headers={"Cache-Control": "no-store"})
+
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    max_age = int(operations.cache_ttl_remaining(status.world_id or ""))
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}", "Vary": LOD_HINT_HEADERS}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.WORLD_STATUS_NOT_MODIFIED.inc()
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 def _read_hardcoded_prompt() -> str:
     if not HARDCODED_PROMPT_PATH.exists():
         raise HTTPException(
@@ -94,8 +229,16 @@ def _assets_debug_summary(world_data: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-async def _build_status_response(operation_id: str, include_debug: bool = False) -> StatusResponse:
-    operation = await world_labs.fetch_operation(operation_id)
+async def _build_status_response(
+    operation_id: str,
+    operations: OperationRegistry,
+    include_debug: bool = False,
+    asset_cache: AssetCache | None = None,
+    hints: ClientHints | None = None,
+) -> StatusResponse:
+    # Served from the shared poller's latest state — no upstream call per request.
+    state = await operations.current(operation_id)
+    operation = state.operation or {}
     print(
         f"[WORLD-API] poll operation_id={operation_id} done={operation.get('done')} "
         f"error={operation.get('error')}"
@@ -107,11 +250,22 @@ async def _build_status_response(operation_id: str, include_debug: bool = False)
         operation.get("error"),
     )
 
+    if state.error and not operation.get("error"):
+        # Poller gave up (timeout / operation rejected) before upstream said done.
+        return StatusResponse(
+            done=True,
+            status="error",
+            operation_id=operation_id,
+            error=state.error,
+            debug=DebugPayloadResponse(operation=operation) if include_debug else None,
+        )
+
     if not operation.get("done"):
         return StatusResponse(
             done=False,
             status="generating",
             operation_id=operation_id,
+            next_poll_s=round(operations.next_poll_in(state), 1),
             debug=DebugPayloadResponse(operation=operation) if include_debug else None,
         )
 
@@ -133,8 +287,13 @@ async def _build_status_response(operation_id: str, include_debug: bool = False)
         )
 
     # Official examples fetch /worlds/{world_id} after operation completion.
-    world_data = await world_labs.get_world_assets(world_id)
+    # Cached by the registry — a finished world never changes.
+    world_data = await operations.world_assets(world_id)
     renderable_assets = WorldLabsService.extract_renderable_assets(world_data)
+    if asset_cache is not None:
+        renderable_assets = proxied_assets(world_id, renderable_assets)
+    if hints is not None:
+        renderable_assets = apply_lod(renderable_assets, await operations.splat_sizes(world_id), hints)
     print(f"[WORLD-API] ready operation_id={operation_id} world={_assets_debug_summary(world_data)}")
     logger.info(
         "[WORLD-API] ready operation_id=%s world=%s",
@@ -155,21 +314,35 @@ async def _build_status_response(operation_id: str, include_debug: bool = False)
 
 
 @router.post("/generate", response_model=GenerateResponse)
-async def generate_world(req: GenerateRequest):
+async def generate_world(
+    req: GenerateRequest,
+    operations: OperationRegistry = Depends(get_operations),
+    prefetcher: WorldPrefetcher | None = Depends(get_world_prefetch),
+):
     """Start world generation. Returns operation_id for polling."""
     try:
-        operation_id = await world_labs.generate_world(
+        if prefetcher is not None and not req.fresh:
+            adopted = prefetcher.adopt(lat=req.lat, lng=req.lng, year=req.year)
+            if adopted is not None:
+                return GenerateResponse(operation_id=adopted.operation_id, reused=adopted.reused)
+        generation = await operations.start_generation(
             scene_description=req.scene_description,
             display_name=req.display_name,
             model=req.model,
+            location=req.location,
+            time_period=req.time_period,
+            lat=req.lat,
+            lng=req.lng,
+            year=req.year,
+            fresh=req.fresh,
         )
-        return GenerateResponse(operation_id=operation_id)
+        return GenerateResponse(operation_id=generation.operation_id, reused=generation.reused)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/hardcoded/start", response_model=GenerateResponse)
-async def generate_world_from_hardcoded_prompt():
+async def generate_world_from_hardcoded_prompt(operations: OperationRegistry = Depends(get_operations)):
     """Start generation using backend-managed hardcoded_prompt.txt content."""
     try:
         prompt = _read_hardcoded_prompt()
@@ -182,37 +355,222 @@ async def generate_world_from_hardcoded_prompt():
             len(prompt),
             prompt[:120],
         )
-        operation_id = await world_labs.generate_world(
+        generation = await operations.start_generation(
             scene_description=prompt,
             display_name="QHacks Hardcoded Prompt World",
             model="Marble 0.1-mini",
         )
-        print(f"[WORLD-API] hardcoded start operation_id={operation_id}")
-        logger.info("[WORLD-API] hardcoded start operation_id=%s", operation_id)
-        return GenerateResponse(operation_id=operation_id)
+        operation_id = generation.operation_id
+        print(f"[WORLD-API] hardcoded start operation_id={operation_id} reused={generation.reused}")
+        logger.info("[WORLD-API] hardcoded start operation_id=%s reused=%s", operation_id, generation.reused)
+        return GenerateResponse(operation_id=operation_id, reused=generation.reused)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/nearby", response_model=NearbyResponse)
+async def get_nearby_worlds(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    year: float | None = None,
+    radius_km: float = Query(50.0, gt=0, le=20_000),
+    years: float = Query(50.0, ge=0),
+    limit: int = Query(5, ge=1, le=50),
+    catalog: WorldCatalog = Depends(get_world_catalog),
+):
+    """Closest already-generated worlds to a location (and year), nearest first.
+
+    Served from the in-memory index — the frontend can show one of these
+    while a bespoke world generates, or skip generation entirely. Load a
+    result through /status/{operation_id} as usual.
+    """
+    matches = catalog.nearby(lat, lng, year=year, radius_km=radius_km, years=years, limit=limit)
+    return NearbyResponse(worlds=[
+        NearbyWorldResponse(
+            world_id=m.entry.world_id,
+            operation_id=m.entry.operation_id,
+            display_name=m.entry.display_name,
+            location=m.entry.location,
+            time_period=m.entry.time_period,
+            lat=m.entry.lat,
+            lng=m.entry.lng,
+            year=m.entry.year,
+            distance_km=round(m.distance_km, 2),
+            year_delta=m.year_delta,
+        )
+        for m in matches
+    ])
+
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.get("/stream/{operation_id}")
+async def stream_status(
+    operation_id: str,
+    request: Request,
+    debug: bool = False,
+    operations: OperationRegistry = Depends(get_operations),
+    asset_cache: AssetCache | None = Depends(get_asset_cache),
+    hints: ClientHints | None = Depends(get_client_hints),
+):
+    """Server-Sent Events: a `status` event now and at each transition.
+
+    Emits the current StatusResponse (usually "generating"), then the final
+    "ready" (with assets) or "error" as soon as the shared poller sees it,
+    and ends the stream. Subscribers only wait on the registry's state, so
+    any number of them share the one upstream poll loop.
+    """
+    async def events():
+        metrics.WORLD_STREAM_SUBSCRIBERS.inc()
+        try:
+            status = await _build_status_response(
+                operation_id, operations, include_debug=debug, asset_cache=asset_cache, hints=hints,
+            )
+            yield _sse_event("status", status.model_dump_json())
+            while not status.done:
+                state = operations.get(operation_id)
+                try:
+                    await asyncio.wait_for(state.done_event.wait(), STREAM_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                status = await _build_status_response(
+                    operation_id, operations, include_debug=debug, asset_cache=asset_cache, hints=hints,
+                )
+                yield _sse_event("status", status.model_dump_json())
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            error = StatusResponse(done=True, status="error", operation_id=operation_id, error=str(detail))
+            yield _sse_event("status", error.model_dump_json())
+        finally:
+            metrics.WORLD_STREAM_SUBSCRIBERS.dec()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/status:batch", response_model=BatchStatusResponse)
+async def get_status_batch(
+    req: BatchStatusRequest,
+    operations: OperationRegistry = Depends(get_operations),
+    asset_cache: AssetCache | None = Depends(get_asset_cache),
+    hints: ClientHints | None = Depends(get_client_hints),
+):
+    """Resolve many operations in one call, failures reported per item.
+
+    Each ID goes through the shared registry (cached finished worlds, one
+    poll loop per operation), at most BATCH_CONCURRENCY at a time. Results
+    come back in request order; duplicate IDs are resolved once.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def resolve(operation_id: str) -> BatchStatusItem:
+        async with semaphore:
+            try:
+                status = await _build_status_response(
+                    operation_id, operations, include_debug=req.debug, asset_cache=asset_cache, hints=hints,
+                )
+                return BatchStatusItem(operation_id=operation_id, status=status)
+            except HTTPException as e:
+                return BatchStatusItem(operation_id=operation_id, error=str(e.detail))
+            except Exception as e:
+                # Prefer the poller's summary ("HTTP 404") over the raw exception.
+                state = operations.get(operation_id)
+                return BatchStatusItem(operation_id=operation_id, error=(state and state.error) or str(e))
+
+    unique = list(dict.fromkeys(req.operation_ids))
+    resolved = dict(zip(unique, await asyncio.gather(*(resolve(op) for op in unique))))
+    metrics.WORLD_STATUS_BATCH_SIZE.observe(len(unique))
+    return BatchStatusResponse(results=[resolved[op] for op in req.operation_ids])
+
+
 @router.get("/status/{operation_id}", response_model=StatusResponse)
-async def get_status(operation_id: str, debug: bool = False):
+async def get_status(
+    operation_id: str,
+    request: Request,
+    debug: bool = False,
+    operations: OperationRegistry = Depends(get_operations),
+    asset_cache: AssetCache | None = Depends(get_asset_cache),
+    hints: ClientHints | None = Depends(get_client_hints),
+):
     """Check generation status without blocking (single poll, not loop)."""
     try:
-        return await _build_status_response(operation_id, include_debug=debug)
+        status = await _build_status_response(
+            operation_id, operations, include_debug=debug, asset_cache=asset_cache, hints=hints,
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _with_http_caching(status, request, operations)
 
 
 @router.get("/hardcoded/status/{operation_id}", response_model=StatusResponse)
-async def get_hardcoded_status(operation_id: str, debug: bool = False):
+async def get_hardcoded_status(
+    operation_id: str,
+    request: Request,
+    debug: bool = False,
+    operations: OperationRegistry = Depends(get_operations),
+    asset_cache: AssetCache | None = Depends(get_asset_cache),
+    hints: ClientHints | None = Depends(get_client_hints),
+):
     """Poll hardcoded prompt generation status and return renderable assets when ready."""
     try:
-        return await _build_status_response(operation_id, include_debug=debug)
+        status = await _build_status_response(
+            operation_id, operations, include_debug=debug, asset_cache=asset_cache, hints=hints,
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _with_http_caching(status, request, operations)
+
+
+@router.get("/assets/{world_id}/{kind}")
+async def get_world_asset(
+    world_id: str,
+    kind: str,
+    request: Request,
+    operations: OperationRegistry = Depends(get_operations),
+    asset_cache: AssetCache | None = Depends(get_asset_cache),
+):
+    """Serve a world asset (`spz_<res>`, `collider_mesh`, `pano`, `thumbnail`) from the disk cache.
+
+    The first request downloads it from the World Labs CDN; later ones (any
+    user, any visit) are served locally with Range support. Assets never
+    change for a world, so responses are immutable with a content ETag.
+    """
+    if asset_cache is None:
+        raise HTTPException(status_code=404, detail="Asset proxy is disabled")
+    try:
+        asset = asset_cache.lookup(world_id, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if asset is None:
+        try:
+            world_data = await operations.world_assets(world_id)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"World {world_id} lookup failed: {e}")
+        url = asset_urls(WorldLabsService.extract_renderable_assets(world_data)).get(kind)
+        if not url:
+            raise HTTPException(status_code=404, detail=f"World {world_id} has no {kind} asset")
+        try:
+            asset = await asset_cache.fetch(world_id, kind, url)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Asset download failed: {e}")
+
+    headers = {"ETag": asset.etag, "Cache-Control": ASSET_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+    if asset.content_encoding:
+        headers["Content-Encoding"] = asset.content_encoding
+    return FileResponse(asset.path, media_type=asset.media_type, headers=headers)
@@ -0,0 +1,200 @@
+"""Size-bounded disk cache for World Labs world assets, served by /api/worlds/assets.
+
+Splats (`100k`/`500k`/`full_res` .spz), collider meshes, panoramas and
+thumbnails are immutable per world, but the frontend used to download them
+from the World Labs CDN on every visit. Each (world_id, kind) is fetched
+once — concurrent requests share the download — stored on disk, and then
+served with FileResponse: Range requests, a content ETag, and zero-copy
+`http.response.pathsend` where the ASGI server supports it.
+
+Bytes are stored exactly as the CDN sent them (no decompression), so an
+upstream Content-Encoding is passed through unchanged. Least-recently-used
+assets are deleted once the cache exceeds `max_bytes`.
+
+Layout: `<root>/<world_id>/<kind>` plus `<kind>.json` metadata.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+ASSET_ROUTE_PREFIX = "/api/worlds/assets"
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")  # no dots: no traversal, no sidecar clashes
+_CHUNK_BYTES = 1 << 20
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+def asset_urls(renderable: dict[str, Any]) -> dict[str, str]:
+    """kind → upstream URL for a WorldLabsService.extract_renderable_assets payload."""
+    urls = {f"spz_{res}": url for res, url in (renderable.get("spz_urls") or {}).items() if url}
+    for kind, field in (("collider_mesh", "collider_mesh_url"), ("pano", "pano_url"), ("thumbnail", "thumbnail_url")):
+        if renderable.get(field):
+            urls[kind] = renderable[field]
+    return urls
+
+
+def proxied_assets(world_id: str, renderable: dict[str, Any], prefix: str = ASSET_ROUTE_PREFIX) -> dict[str, Any]:
+    """Copy of `renderable` with every asset URL pointing at the local proxy."""
+    def local(kind: str) -> str:
+        return f"{prefix}/{world_id}/{kind}"
+
+    upstream_to_local = {url: local(kind) for kind, url in asset_urls(renderable).items()}
+    rewritten = dict(renderable)
+    rewritten["spz_urls"] = {res: local(f"spz_{res}") for res in (renderable.get("spz_urls") or {})}
+    for field in ("default_spz_url", "collider_mesh_url", "pano_url", "thumbnail_url"):
+        if renderable.get(field):
+            rewritten[field] = upstream_to_local.get(renderable[field], renderable[field])
+    return rewritten
+
+
+@dataclass
+class CachedAsset:
+    path: Path
+    size: int
+    etag: str
+    media_type: str
+    content_encoding: str | None = None
+
+
+class AssetCache:
+    """Disk LRU of world assets keyed by (world_id, kind)."""
+
+    def __init__(self, root: str | Path, max_bytes: int, client: httpx.AsyncClient | None = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._client = client
+        self._index: OrderedDict[str, CachedAsset] = OrderedDict()  # LRU order, oldest first
+        self._bytes = 0
+        self._downloads: dict[str, asyncio.Task] = {}
+        self._load_index()
+        metrics.ASSET_CACHE_BYTES.set_function(lambda: self._bytes)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def lookup(self, world_id: str, kind: str) -> CachedAsset | None:
+        """The cached asset, if on disk (marks it most recently used)."""
+        key = self._key(world_id, kind)
+        asset = self._index.get(key)
+        if asset is None or not asset.path.exists():
+            return None
+        self._index.move_to_end(key)
+        metrics.ASSET_CACHE_HITS.inc()
+        return asset
+
+    async def fetch(self, world_id: str, kind: str, url: str) -> CachedAsset:
+        """Download `url` into the cache; concurrent misses for one asset share the download."""
+        key = self._key(world_id, kind)
+        metrics.ASSET_CACHE_MISSES.inc()
+        task = self._downloads.get(key)
+        if task is None:
+            task = asyncio.create_task(self._download(key, url))
+            self._downloads[key] = task
+            task.add_done_callback(lambda _: self._downloads.pop(key, None))
+        return await asyncio.shield(task)
+
+    # --- internals ---
+
+    @staticmethod
+    def _key(world_id: str, kind: str) -> str:
+        if not (_SAFE_NAME.match(world_id) and _SAFE_NAME.match(kind)):
+            raise ValueError(f"invalid asset name {world_id}/{kind}")
+        return f"{world_id}/{kind}"
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU from disk (least recently written first)."""
+        found: list[tuple[float, str, CachedAsset]] = []
+        for meta_path in self.root.glob("*/*.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+                path = meta_path.with_suffix("")
+                stat = path.stat()
+            except (OSError, ValueError):
+                continue
+            asset = CachedAsset(
+                path=path, size=stat.st_size, etag=meta["etag"],
+                media_type=meta["media_type"], content_encoding=meta.get("content_encoding"),
+            )
+            found.append((stat.st_mtime, f"{path.parent.name}/{path.name}", asset))
+        for _, key, asset in sorted(found, key=lambda f: f[0]):
+            self._index[key] = asset
+            self._bytes += asset.size
+
+    async def _download(self, key: str, url: str) -> CachedAsset:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.part")
+        digest = hashlib.sha256()
+        size = 0
+        started = time.monotonic()
+        client = self._client or httpx.AsyncClient(timeout=120)
+        try:
+            # Browsers decode all of these, so the stored bytes can be passed through as-is.
+            headers = {"Accept-Encoding": "gzip, deflate, br"}
+            async with client.stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+                media_type = response.headers.get("content-type", "application/octet-stream")
+                content_encoding = response.headers.get("content-encoding")
+                with partial.open("wb") as f:
+                    async for chunk in response.aiter_raw(_CHUNK_BYTES):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        finally:
+            if self._client is None:
+                await client.aclose()
+
+        os.replace(partial, path)
+        asset = CachedAsset(
+            path=path, size=size, etag=f'"{digest.hexdigest()[:32]}"',
+            media_type=media_type, content_encoding=content_encoding,
+        )
+        meta = {k: v for k, v in asdict(asset).items() if k not in ("path", "size")}
+        path.with_name(f"{path.name}.json").write_text(json.dumps(meta))
+
+        old = self._index.pop(key, None)
+        self._bytes += size - (old.size if old else 0)
+        self._index[key] = asset
+        metrics.ASSET_DOWNLOAD_BYTES.inc(size)
+        print(f"[{_ts()}][ASSETS] Cached {key}: {size / 1e6:.1f} MB in {time.monotonic() - started:.1f}s")
+        self._evict(keep=key)
+        return asset
+
+    def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, asset = next(iter(self._index.items()))
+            if key == keep:
+                break
+            del self._index[key]
+            self._bytes -= asset.size
+            for path in (asset.path, asset.path.with_name(f"{asset.path.name}.json")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            metrics.ASSET_CACHE_EVICTIONS.inc()
+            logger.info("Evicted cached asset %s (%d bytes)", key, asset.size)
@@ -0,0 +1,168 @@
+"""Provider-side cached contents for the guide's system prompt and tools.
+
+Every Gemini turn sends the phase's system instruction (persona, TTS rules,
+world description, user profile) and the tool schemas before the
+conversation itself. With a ContextCache, that prefix is uploaded once as a
+Gemini cached content and later turns send only `cached_content=<name>`:
+less to process before the first token, and cached input tokens are billed
+at the reduced rate.
+
+Caches are keyed by the exact prefix (model, system instruction, tools,
+tool config), so sessions in the same phase and context share one, and a
+context change (`GeminiGuide.update_context`) simply moves the session to a
+different key. Creation happens in the background: the turn that first
+needs a prefix goes out inline and later turns pick up the cache. A cache
+nobody uses any more is deleted; the provider TTL is the backstop.
+
+Prefixes below the provider's minimum size, or any creation error, mark
+the key uncacheable and the guide keeps sending the prefix inline.
+
+Created in main.py's lifespan (GEMINI_CONTEXT_CACHE=1) and shared via
+`app.state.context_cache`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from google import genai
+from google.genai import types
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 600.0
+# Gemini 2.5 Flash won't cache a prefix smaller than this.
+MIN_CACHE_TOKENS = 1024
+CHARS_PER_TOKEN = 4
+# Stop handing out a cache this close to its expiry; a new one is created.
+EXPIRY_MARGIN_S = 30.0
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+def prefix_key(model: str, config: types.GenerateContentConfig) -> str:
+    """Stable hash of everything a cached content would replace in `config`."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system_instruction": config.system_instruction,
+            "tools": [t.model_dump(mode="json", exclude_none=True) for t in config.tools or []],
+            "tool_config": config.tool_config.model_dump(mode="json", exclude_none=True) if config.tool_config else None,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class _Entry:
+    name: str
+    expires_at: float
+
+
+class ContextCache:
+    """Shared, reference-counted Gemini cached contents for config prefixes."""
+
+    def __init__(
+        self,
+        client: genai.Client,
+        *,
+        model: str,
+        ttl_s: float = DEFAULT_TTL_S,
+        min_tokens: int = MIN_CACHE_TOKENS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.model = model
+        self.ttl_s = ttl_s
+        self.min_tokens = min_tokens
+        self._clock = clock
+        self._entries: dict[str, _Entry] = {}
+        self._creating: dict[str, asyncio.Task] = {}
+        self._uncacheable: set[str] = set()
+        self._users: dict[str, int] = {}
+
+    def acquire(self, key: str) -> None:
+        self._users[key] = self._users.get(key, 0) + 1
+
+    def release(self, key: str) -> None:
+        """A session stopped using `key`; delete its cache once nobody does."""
+        users = self._users.get(key, 0) - 1
+        if users > 0:
+            self._users[key] = users
+            return
+        self._users.pop(key, None)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            asyncio.create_task(self._delete(entry.name))
+
+    def lookup(self, key: str, config: types.GenerateContentConfig) -> str | None:
+        """Cached content name for this prefix, or None (creation starts in the background)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at - EXPIRY_MARGIN_S > self._clock():
+            metrics.GEMINI_CONTEXT_CACHE_HITS.inc()
+            return entry.name
+        if entry is not None:
+            del self._entries[key]  # about to expire upstream
+        if key in self._uncacheable or key in self._creating:
+            return None
+        if self._estimate_tokens(config) < self.min_tokens:
+            self._uncacheable.add(key)
+            return None
+        self._creating[key] = asyncio.create_task(self._create(key, config))
+        return None
+
+    # --- internals ---
+
+    @staticmethod
+    def _estimate_tokens(config: types.GenerateContentConfig) -> int:
+        tools = json.dumps([t.model_dump(mode="json", exclude_none=True) for t in config.tools or []])
+        return (len(str(config.system_instruction or "")) + len(tools)) // CHARS_PER_TOKEN
+
+    async def _create(self, key: str, config: types.GenerateContentConfig) -> None:
+        try:
+            await self._upload(key, config)
+        finally:
+            self._creating.pop(key, None)
+
+    async def _upload(self, key: str, config: types.GenerateContentConfig) -> None:
+        started = time.monotonic()
+        try:
+            cached = await self.client.aio.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{int(self.ttl_s)}s",
+                    display_name=f"guide-prefix-{key[:12]}",
+                ),
+            )
+        except Exception as e:
+            self._uncacheable.add(key)
+            metrics.GEMINI_CONTEXT_CACHE_FAILED.inc()
+            logger.warning("Context cache creation failed (sending prefix inline): %s", e)
+            return
+        if key not in self._users:
+            await self._delete(cached.name)  # every session moved on while it was being created
+            return
+        self._entries[key] = _Entry(name=cached.name, expires_at=self._clock() + self.ttl_s)
+        metrics.GEMINI_CONTEXT_CACHE_CREATED.inc()
+        print(f"[{_ts()}][GEMINI-CACHE] Created {cached.name} in {time.monotonic() - started:.2f}s")
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self.client.aio.caches.delete(name=name)
+        except Exception as e:
+            logger.info("Context cache %s delete failed (expires by TTL): %s", name, e)
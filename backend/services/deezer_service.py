@@ -16,7 +16,14 @@ DEEZER_SEARCH_URL = "https://api.deezer.com/search"
 
 
 class DeezerService:
-    """Stateless Deezer search client. No API key or auth required."""
+    """Stateless Deezer search client. No API key or auth required.
+
+    Pass the process-wide `client` (services/upstream_clients.py) to reuse
+    pooled keep-alive connections; otherwise each search opens its own.
+    """
+
+    def __init__(self, client: httpx.AsyncClient | None = None):
+        self._client = client
 
     async def search_tracks(self, query: str, limit: int = 5) -> list[dict]:
         """Search the Deezer catalog for tracks matching a query.
@@ -25,11 +32,17 @@ class DeezerService:
         Filters out tracks with no preview URL.
         """
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(
+            if self._client is not None:
+                resp = await self._client.get(
                     DEEZER_SEARCH_URL,
                     params={"q": query, "limit": limit},
                 )
+            else:
+                async with httpx.AsyncClient(timeout=10) as client:
+                    resp = await client.get(
+                        DEEZER_SEARCH_URL,
+                        params={"q": query, "limit": limit},
+                    )
 
             if resp.status_code != 200:
                 print(f"[DEEZER] Search FAILED: HTTP {resp.status_code} — {resp.text[:200]}")
@@ -4,21 +4,36 @@ Uses the google-genai SDK with Gemini 2.5 Flash for:
 - Streaming text generation with system prompt
 - Function calling (world gen, music, facts, location suggestion)
 - Google Search grounding for real historical information
-- Multi-turn conversation history
+- Multi-turn conversation history, compacted to a token budget
+  (services/history_policy.py)
 
 See TECHNICAL.md Sections 4-5 for full design.
 """
 
 from __future__ import annotations
 
+import functools
 import logging
 from typing import AsyncGenerator
 
 from google import genai
 from google.genai import types
 
+from services import metrics
+from services.context_cache import ContextCache, prefix_key
+from services.history_policy import HistoryPolicy
+
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL = "gemini-2.5-flash"
+SUMMARY_MODEL = GEMINI_MODEL
+SUMMARY_PROMPT = """\
+You keep the running memory of a voice conversation between a traveller and
+a historical tour guide. Summarize the transcript in at most 150 words:
+places and eras discussed or chosen, what the traveller is interested in or
+asked about, facts and suggestions already given (so they are not repeated),
+and anything the guide promised. Write plain prose, no lists."""
+
 TTS_RULES = """\
 CRITICAL output rules — your text is read aloud by a text-to-speech engine:
 - Write in plain, flowing spoken sentences only. No markdown, no bullet points, \
@@ -286,55 +301,189 @@ def _build_transition_tools() -> list[types.FunctionDeclaration]:
     return [_SUMMARIZE_SESSION, _GENERATE_LOADING_MESSAGES, _SELECT_MUSIC]
 
 
-def _build_exploration_tools() -> list[types.FunctionDeclaration]:
-    """Phase 2+ (loading/exploring): full tool set."""
-    return [
-        types.FunctionDeclaration(
-            name="trigger_world_generation",
-            description="Trigger 3D world generation when the user wants to explore a location/era",
-            parameters=types.Schema(
-                type="OBJECT",
-                properties={
-                    "location": types.Schema(type="STRING", description="The place to generate"),
-                    "time_period": types.Schema(type="STRING", description="The historical era"),
-                    "scene_description": types.Schema(
-                        type="STRING",
-                        description="Vivid description of the scene to generate for World Labs",
-                    ),
-                },
-                required=["location", "time_period", "scene_description"],
-            ),
-        ),
+# Parallel transition (GEMINI_PARALLEL_TRANSITION): instead of one forced
+# call emitting all three tools, each is its own small request that sees the
+# conversation, a task prompt and only its own tool (GeminiGuide.run_transition_task).
+# summarize_session drops goodbye_text, which nothing speaks during transition,
+# to keep the world description — the critical path — as short to produce as possible.
+_SUMMARIZE_SESSION_TASK = types.FunctionDeclaration(
+    name=_SUMMARIZE_SESSION.name,
+    description="Describe the chosen scene for 3D world generation and summarize the traveller.",
+    parameters=types.Schema(
+        type="OBJECT",
+        properties={
+            key: _SUMMARIZE_SESSION.parameters.properties[key] for key in ("world_description", "user_profile")
+        },
+        required=["world_description", "user_profile"],
+    ),
+)
+
+TRANSITION_TASK_PROMPT = """The traveller has just confirmed the destination they chose while talking to
+a historical tour guide; they are about to enter a photorealistic 3D world of
+it. Destination: {destination}. Read the conversation and {task} Respond only
+by calling the {name} tool, exactly once."""
+
+TRANSITION_TASKS: dict[str, tuple[types.FunctionDeclaration, str]] = {
+    "summarize_session": (
+        _SUMMARIZE_SESSION_TASK,
+        "write the scene description for 3D generation (8-12 detailed sentences: "
+        "architecture, materials, lighting, weather, vegetation, colors, people, "
+        "street-level details) and a 2-4 sentence profile of the traveller.",
+    ),
+    "generate_loading_messages": (
+        _GENERATE_LOADING_MESSAGES,
+        "write 15 short, playful loading messages personalized to the traveller and "
+        "the destination (start with an -ing verb, no final period).",
+    ),
+    "select_music": (
         _SELECT_MUSIC,
-        types.FunctionDeclaration(
-            name="generate_fact",
-            description="Generate a historical fact to display as an overlay card",
-            parameters=types.Schema(
-                type="OBJECT",
-                properties={
-                    "fact_text": types.Schema(
-                        type="STRING",
-                        description="A concise, interesting historical fact (1-2 sentences)",
-                    ),
-                    "category": types.Schema(
-                        type="STRING",
-                        description="Category of the fact",
-                        enum=["culture", "technology", "politics", "daily_life", "art", "science", "architecture", "food", "nature", "trade", "religion", "warfare", "medicine", "music", "language"],
-                    ),
-                },
-                required=["fact_text", "category"],
-            ),
+        "choose background music for the era, region and mood, with real song "
+        "suggestions formatted 'Song Title - Artist'.",
+    ),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _transition_task_config(name: str, destination: str) -> types.GenerateContentConfig:
+    declaration, task = TRANSITION_TASKS[name]
+    return types.GenerateContentConfig(
+        system_instruction=TRANSITION_TASK_PROMPT.format(destination=destination, task=task, name=name),
+        tools=[types.Tool(function_declarations=[declaration])],
+        tool_config=types.ToolConfig(
+            function_calling_config=types.FunctionCallingConfig(mode="ANY", allowed_function_names=[name])
         ),
-        _SUGGEST_LOCATION,
-    ]
+    )
+
+
+_TRIGGER_WORLD_GENERATION = types.FunctionDeclaration(
+    name="trigger_world_generation",
+    description="Trigger 3D world generation when the user wants to explore a location/era",
+    parameters=types.Schema(
+        type="OBJECT",
+        properties={
+            "location": types.Schema(type="STRING", description="The place to generate"),
+            "time_period": types.Schema(type="STRING", description="The historical era"),
+            "scene_description": types.Schema(
+                type="STRING",
+                description="Vivid description of the scene to generate for World Labs",
+            ),
+        },
+        required=["location", "time_period", "scene_description"],
+    ),
+)
+
+_GENERATE_FACT = types.FunctionDeclaration(
+    name="generate_fact",
+    description="Generate a historical fact to display as an overlay card",
+    parameters=types.Schema(
+        type="OBJECT",
+        properties={
+            "fact_text": types.Schema(
+                type="STRING",
+                description="A concise, interesting historical fact (1-2 sentences)",
+            ),
+            "category": types.Schema(
+                type="STRING",
+                description="Category of the fact",
+                enum=["culture", "technology", "politics", "daily_life", "art", "science", "architecture", "food", "nature", "trade", "religion", "warfare", "medicine", "music", "language"],
+            ),
+        },
+        required=["fact_text", "category"],
+    ),
+)
+
+
+# Execution class per tool, read by the voice turn loop (routers/voice.py).
+# A blocking tool's result goes back to Gemini in a follow-up round so the
+# guide can talk about it. A fire-and-forget tool is a side effect whose
+# result is only an acknowledgement: the result is recorded in history and
+# the text streamed in the same round is the reply. Unlisted tools block.
+TOOL_BLOCKING = "blocking"
+TOOL_FIRE_AND_FORGET = "fire_and_forget"
+
+TOOL_EXECUTION: dict[str, str] = {
+    _GENERATE_FACT.name: TOOL_FIRE_AND_FORGET,
+    _SUGGEST_LOCATION.name: TOOL_FIRE_AND_FORGET,
+}
+
+
+def tool_execution(name: str) -> str:
+    return TOOL_EXECUTION.get(name, TOOL_BLOCKING)
+
+
+def _build_exploration_tools() -> list[types.FunctionDeclaration]:
+    """Phase 2+ (loading/exploring): full tool set."""
+    return [_TRIGGER_WORLD_GENERATION, _SELECT_MUSIC, _GENERATE_FACT, _SUGGEST_LOCATION]
+
+
+def _context_fingerprint(context: dict) -> tuple[tuple[str, str], ...]:
+    """Hashable form of the guide context (every value the prompts format in)."""
+    return tuple(sorted((key, str(value)) for key, value in context.items()))
+
+
+@functools.lru_cache(maxsize=256)
+def _phase_config(phase: str, fingerprint: tuple[tuple[str, str], ...]) -> tuple[types.GenerateContentConfig, str]:
+    """Built config for a phase + context, and its prefix key (see services/context_cache.py).
+
+    Shared by every session with the same phase and context; callers must
+    not mutate it.
+    """
+    metrics.GEMINI_CONFIG_BUILDS.inc()
+    context = dict(fingerprint)
+    if phase == "transition":
+        # Transition: keep Phase 1 prompt for conversation context continuity
+        prompt = PHASE1_GLOBE_PROMPT.format(**context)
+        tools = _build_transition_tools()
+    elif phase == "globe_selection":
+        prompt = PHASE1_GLOBE_PROMPT.format(**context)
+        tools = _build_phase1_tools()
+    elif phase == "exploring":
+        prompt = EXPLORING_PROMPT.format(**context)
+        tools = _build_exploration_tools()
+    else:
+        prompt = GUIDE_SYSTEM_PROMPT.format(**context)
+        tools = _build_exploration_tools()
+
+    # During transition, force Gemini to call tools (summarize_session,
+    # generate_loading_messages, select_music) rather than just speaking.
+    tool_config = None
+    if phase == "transition":
+        tool_config = types.ToolConfig(
+            function_calling_config=types.FunctionCallingConfig(mode="ANY")
+        )
+
+    config = types.GenerateContentConfig(
+        system_instruction=prompt,
+        tools=[types.Tool(function_declarations=tools)],
+        tool_config=tool_config,
+    )
+    return config, prefix_key(GEMINI_MODEL, config)
 
 
 class GeminiGuide:
     """Stateful conversation engine wrapping Gemini 2.5 Flash."""
 
-    def __init__(self, api_key: str):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        client: genai.Client | None = None,
+        history_policy: HistoryPolicy | None = None,
+        context_cache: ContextCache | None = None,
+    ):
+        # Reuse the process-wide client when given (one connection pool for
+        # all sessions); a client per guide is only for tests and scripts.
+        self.client = client or genai.Client(api_key=api_key)
         self.conversation_history: list[types.Content] = []
+        # Results of the current round's function calls, recorded once the
+        # model turn that made the calls is in history.
+        self._pending_results: list[tuple[str, dict]] = []
+        # Compacts the history before each request; summaries use this guide's client.
+        self.history_policy = history_policy or HistoryPolicy()
+        if self.history_policy.summarizer is None:
+            self.history_policy.summarizer = self._summarize_history
+        # Process-wide provider-side prompt cache (None = send the prefix inline).
+        self.context_cache = context_cache
+        self._cache_key: str | None = None
         self.context: dict = {
             "location_name": "Not selected",
             "lat": "",
@@ -351,37 +500,30 @@ class GeminiGuide:
         self.context.update(kwargs)
 
     def _build_config(self) -> types.GenerateContentConfig:
-        phase = self.context.get("phase", "globe_selection")
-        if phase == "transition":
-            # Transition: keep Phase 1 prompt for conversation context continuity
-            prompt = PHASE1_GLOBE_PROMPT.format(**self.context)
-            tools = _build_transition_tools()
-        elif phase == "globe_selection":
-            prompt = PHASE1_GLOBE_PROMPT.format(**self.context)
-            tools = _build_phase1_tools()
-        elif phase == "exploring":
-            prompt = EXPLORING_PROMPT.format(**self.context)
-            tools = _build_exploration_tools()
-        else:
-            prompt = GUIDE_SYSTEM_PROMPT.format(**self.context)
-            tools = _build_exploration_tools()
-
-        # During transition, force Gemini to call tools (summarize_session,
-        # generate_loading_messages, select_music) rather than just speaking.
-        tool_config = None
-        if phase == "transition":
-            tool_config = types.ToolConfig(
-                function_calling_config=types.FunctionCallingConfig(mode="ANY")
-            )
-
-        return types.GenerateContentConfig(
-            system_instruction=prompt,
-            tools=[types.Tool(function_declarations=tools)],
-            tool_config=tool_config,
-        )
+        """System prompt + tools for the current phase (memoized per phase and context)."""
+        config, _ = _phase_config(self.context.get("phase", "globe_selection"), _context_fingerprint(self.context))
+        return config
+
+    def _request_config(self) -> types.GenerateContentConfig:
+        """The config to send: the built one, or a reference to its provider-side cache."""
+        config, key = _phase_config(self.context.get("phase", "globe_selection"), _context_fingerprint(self.context))
+        if self.context_cache is None:
+            return config
+        if key != self._cache_key:
+            # Context or phase changed: move to the new prefix's cache.
+            if self._cache_key is not None:
+                self.context_cache.release(self._cache_key)
+            self.context_cache.acquire(key)
+            self._cache_key = key
+        name = self.context_cache.lookup(key, config)
+        return config if name is None else types.GenerateContentConfig(cached_content=name)
 
     async def generate_response(
-        self, user_text: str | None = None, image_part: types.Part | None = None
+        self,
+        user_text: str | None = None,
+        image_part: types.Part | None = None,
+        *,
+        staged: list[types.Content] | None = None,
     ) -> AsyncGenerator[dict, None]:
         """Stream a response from Gemini. Yields dicts:
           {"type": "text", "text": "..."}
@@ -391,40 +533,50 @@ class GeminiGuide:
         (used after function call results are added).
         If image_part is provided, it is included alongside the user text
         for visual context (exploring phase canvas frame).
+
+        If `staged` is given, the new user and model entries are appended to
+        that list instead of conversation_history (the request still sees
+        history + staged). Used for speculative turns that may be discarded.
         """
+        history = self.conversation_history if staged is None else staged
         if user_text is not None:
             logger.info("generate_response: user_text=%r", user_text[:80] if len(user_text) > 80 else user_text)
             parts = [types.Part(text=user_text)]
             if image_part:
                 parts.append(image_part)
                 logger.info("generate_response: including image part for visual context")
-            self.conversation_history.append(
+            history.append(
                 types.Content(role="user", parts=parts)
             )
         elif image_part:
             # Image-only continuation (e.g. auto-narrate with visual context)
             logger.info("generate_response: continuation with image part")
-            self.conversation_history.append(
+            history.append(
                 types.Content(role="user", parts=[image_part])
             )
         else:
             logger.info("generate_response: continuation (no new user message)")
 
-        logger.debug("History: %d entries", len(self.conversation_history))
+        self.history_policy.compact(self.conversation_history)
+        contents = self.conversation_history if staged is None else [*self.conversation_history, *staged]
+        logger.debug("History: %d entries, ~%d tokens", len(contents), self.history_policy.tokens)
 
-        config = self._build_config()
-        logger.info("Calling gemini-2.5-flash with %d messages", len(self.conversation_history))
+        config = self._request_config()
+        logger.info("Calling %s with %d messages%s", GEMINI_MODEL, len(contents),
+                    " (cached prefix)" if config.cached_content else "")
 
         response = await self.client.aio.models.generate_content_stream(
-            model="gemini-2.5-flash",
-            contents=self.conversation_history,
+            model=GEMINI_MODEL,
+            contents=contents,
             config=config,
         )
 
         full_text = ""
         function_calls = []
 
+        usage = None
         async for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
             if not chunk.candidates or not chunk.candidates[0].content:
                 continue
             for part in chunk.candidates[0].content.parts:
@@ -441,6 +593,9 @@ class GeminiGuide:
                     yield {"type": "text", "text": part.text}
 
         logger.info("Stream done. %d text chars, %d function calls", len(full_text), len(function_calls))
+        if usage is not None:
+            metrics.GEMINI_PROMPT_TOKENS.inc(usage.prompt_token_count or 0)
+            metrics.GEMINI_CACHED_PROMPT_TOKENS.inc(usage.cached_content_token_count or 0)
 
         # Record model response in history (include both text and function calls)
         parts = []
@@ -451,26 +606,87 @@ class GeminiGuide:
                 name=fc["name"],
                 args=fc["args"],
             )))
-        self.conversation_history.append(
+        history.append(
             types.Content(role="model", parts=parts)
         )
-        logger.debug("History now: %d entries", len(self.conversation_history))
+        logger.debug("History now: %d entries", len(history))
 
     def add_function_result(self, name: str, result: dict) -> None:
-        """Add function execution result to conversation history."""
-        self.conversation_history.append(
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part(
-                        function_response=types.FunctionResponse(
-                            name=name, response=result
-                        )
-                    )
-                ],
-            )
+        """Queue a function execution result for record_function_results()."""
+        self._pending_results.append((name, result))
+
+    def record_function_results(self) -> int:
+        """Append the queued results after the model turn that made the calls.
+
+        Call once the round's stream has ended (the model turn is appended
+        when it does). Every call in that turn gets exactly one response, in
+        call order: a call whose tool was cancelled (barge-in) before it
+        produced a result is answered with {"status": "cancelled"}, since
+        Gemini rejects unmatched calls. Results with no matching call in
+        history (a cancelled stream) are dropped. Returns the number of
+        responses recorded.
+        """
+        results, self._pending_results = self._pending_results, []
+        last = self.conversation_history[-1] if self.conversation_history else None
+        if last is None or last.role != "model":
+            return 0
+        calls = [p.function_call.name for p in last.parts or [] if p.function_call is not None]
+        parts = []
+        for name in calls:
+            match = next((i for i, (result_name, _) in enumerate(results) if result_name == name), None)
+            result = results.pop(match)[1] if match is not None else {"status": "cancelled"}
+            parts.append(types.Part(function_response=types.FunctionResponse(name=name, response=result)))
+        if parts:
+            self.conversation_history.append(types.Content(role="user", parts=parts))
+        return len(parts)
+
+    def discard_function_results(self) -> None:
+        """Drop queued results whose calls will never be recorded in history."""
+        self._pending_results.clear()
+
+    async def run_transition_task(self, name: str) -> dict | None:
+        """One TRANSITION_TASKS entry as its own small, non-streaming request.
+
+        The request sees the conversation so far and may only call tool
+        `name`; history is not modified. Returns the call's args, or None if
+        the model didn't call the tool.
+        """
+        destination = ", ".join(
+            str(self.context[key]) for key in ("location_name", "time_period") if self.context.get(key)
+        ) or "unknown"
+        response = await self.client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=self.conversation_history,
+            config=_transition_task_config(name, destination),
+        )
+        for call in response.function_calls or []:
+            if call.name == name:
+                return dict(call.args or {})
+        return None
+
+    def record_function_calls(self, calls: list[dict]) -> None:
+        """Append a model turn making `calls` (for calls not made through generate_response)."""
+        self.conversation_history.append(types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name=fc["name"], args=fc["args"])) for fc in calls
+        ]))
+
+    async def _summarize_history(self, transcript: str) -> str:
+        """Running summary of older turns (HistoryPolicy's summarizer)."""
+        response = await self.client.aio.models.generate_content(
+            model=SUMMARY_MODEL,
+            contents=transcript,
+            config=types.GenerateContentConfig(system_instruction=SUMMARY_PROMPT, max_output_tokens=400),
         )
+        return (response.text or "").strip()
 
     def reset(self) -> None:
         """Clear conversation history for a fresh session."""
         self.conversation_history.clear()
+        self._pending_results.clear()
+        self.history_policy.reset()
+
+    def close(self) -> None:
+        """Session over: let go of the shared prompt cache."""
+        if self.context_cache is not None and self._cache_key is not None:
+            self.context_cache.release(self._cache_key)
+            self._cache_key = None
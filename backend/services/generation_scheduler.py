@@ -0,0 +1,242 @@
+"""Backpressure for World Labs generations: max in flight, priorities, dedupe.
+
+Every new generation goes through one process-wide queue instead of
+straight to World Labs. At most `max_in_flight` operations run upstream at
+once; a slot is held from the generate call until the operation finishes
+(OperationRegistry releases it). Waiting jobs are dispatched by priority
+class, then FIFO:
+
+- PRIORITY_INTERACTIVE — a user is on the loading screen for it
+- PRIORITY_SPECULATIVE — prefetches and quality upgrades for live sessions
+- PRIORITY_BATCH       — offline pre-generation
+
+Identical pending requests (same key) share one ticket; a higher-priority
+duplicate promotes it. A 429 from World Labs puts the job back at the front
+of its class and pauses dispatching for Retry-After (or a backoff), so a
+burst drains at the provider's pace instead of failing.
+
+Each queued ticket gets its position and an ETA (from expected durations of
+the in-flight and earlier-queued jobs) pushed to its listeners whenever the
+queue moves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SPECULATIVE = 1
+PRIORITY_BATCH = 2
+
+DEFAULT_MAX_IN_FLIGHT = 4
+RATE_LIMIT_BACKOFF_S = 5.0
+MAX_RATE_LIMIT_BACKOFF_S = 60.0
+
+# (position, eta_s) — position 0 is next to dispatch.
+QueueListener = Callable[[int, float], None]
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+@dataclass(eq=False)
+class Ticket:
+    key: str
+    model: str
+    priority: int
+    start: Callable[[], Awaitable[str]]  # performs the upstream call, returns operation_id
+    seq: int
+    submitted_at: float
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+    listeners: list[QueueListener] = field(default_factory=list)
+    waiters: int = 0
+    attempts: int = 0
+    dispatched: bool = False
+    position: int | None = None
+    eta_s: float | None = None
+
+    @property
+    def queued(self) -> bool:
+        return not self.dispatched and not self.future.done()
+
+
+class GenerationScheduler:
+    """Single-event-loop priority queue in front of World Labs' generate call."""
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        expected_s: Callable[[str], float] = lambda model: 60.0,
+        rate_limit_backoff_s: float = RATE_LIMIT_BACKOFF_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.expected_s = expected_s
+        self.rate_limit_backoff_s = rate_limit_backoff_s
+        self._clock = clock
+        self._seq = itertools.count()
+        self._heap: list[tuple[int, int, Ticket]] = []
+        self._pending: dict[str, Ticket] = {}  # key → queued or dispatching ticket
+        self._in_flight: dict[str, tuple[str, float]] = {}  # operation_id → (model, started_at)
+        self._dispatching = 0
+        self._paused_until = 0.0
+        self._resume: asyncio.TimerHandle | None = None
+
+        metrics.WORLD_QUEUE_DEPTH.set_function(lambda: self.queued)
+        metrics.WORLD_IN_FLIGHT.set_function(lambda: self.in_flight)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for t in self._pending.values() if t.queued)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight) + self._dispatching
+
+    def submit(
+        self,
+        key: str,
+        start: Callable[[], Awaitable[str]],
+        *,
+        model: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_queue: QueueListener | None = None,
+    ) -> tuple[Ticket, bool]:
+        """Queue a generation. Returns (ticket, joined) — joined if an identical one was pending."""
+        ticket = self._pending.get(key)
+        joined = ticket is not None
+        if ticket is None:
+            ticket = Ticket(
+                key=key, model=model, priority=priority, start=start,
+                seq=next(self._seq), submitted_at=self._clock(),
+            )
+            self._pending[key] = ticket
+            heapq.heappush(self._heap, (ticket.priority, ticket.seq, ticket))
+        elif priority < ticket.priority and ticket.queued:
+            ticket.priority = priority  # promote; the old heap entry is skipped lazily
+            heapq.heappush(self._heap, (ticket.priority, ticket.seq, ticket))
+        if on_queue is not None:
+            ticket.listeners.append(on_queue)
+            if ticket.position is not None:
+                on_queue(ticket.position, ticket.eta_s or 0.0)
+        self._pump()
+        return ticket, joined
+
+    def withdraw(self, ticket: Ticket) -> None:
+        """Drop a still-queued ticket nobody is waiting for any more."""
+        if ticket.queued and ticket.waiters <= 0:
+            self._pending.pop(ticket.key, None)
+            ticket.future.cancel()
+            print(f"[{_ts()}][WORLD-QUEUE] Withdrew queued {ticket.model} job (no waiters)")
+            self._publish()
+
+    def release(self, operation_id: str) -> None:
+        """The operation finished upstream — free its slot."""
+        if self._in_flight.pop(operation_id, None) is not None:
+            self._pump()
+
+    def close(self) -> None:
+        if self._resume is not None:
+            self._resume.cancel()
+        for ticket in self._pending.values():
+            if not ticket.future.done():
+                ticket.future.cancel()
+        self._pending.clear()
+        self._heap.clear()
+
+    # --- internals ---
+
+    def _pump(self) -> None:
+        self._resume = None
+        while self._heap and self.in_flight < self.max_in_flight:
+            if self._clock() < self._paused_until:
+                break
+            priority, _, ticket = heapq.heappop(self._heap)
+            if not ticket.queued or priority != ticket.priority:
+                continue  # withdrawn, already dispatched, or promoted (stale entry)
+            ticket.dispatched = True
+            ticket.position = None
+            self._dispatching += 1
+            asyncio.create_task(self._dispatch(ticket))
+        self._publish()
+
+    async def _dispatch(self, ticket: Ticket) -> None:
+        ticket.attempts += 1
+        try:
+            operation_id = await ticket.start()
+        except httpx.HTTPStatusError as e:
+            self._dispatching -= 1
+            if e.response.status_code == 429:
+                self._rate_limited(ticket, e.response)
+                return
+            self._fail(ticket, e)
+            return
+        except BaseException as e:
+            self._dispatching -= 1
+            self._fail(ticket, e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+        self._dispatching -= 1
+        self._in_flight[operation_id] = (ticket.model, self._clock())
+        self._pending.pop(ticket.key, None)
+        metrics.WORLD_QUEUE_WAIT.observe(self._clock() - ticket.submitted_at)
+        if not ticket.future.done():
+            ticket.future.set_result(operation_id)
+        self._pump()
+
+    def _fail(self, ticket: Ticket, error: BaseException) -> None:
+        self._pending.pop(ticket.key, None)
+        if not ticket.future.done():
+            ticket.future.set_exception(error)
+            ticket.future.exception()  # mark retrieved: waiters may all have gone
+        self._pump()
+
+    def _rate_limited(self, ticket: Ticket, response: httpx.Response) -> None:
+        try:
+            delay = float(response.headers.get("retry-after", ""))
+        except ValueError:
+            delay = self.rate_limit_backoff_s * 2 ** (ticket.attempts - 1)
+        delay = min(MAX_RATE_LIMIT_BACKOFF_S, max(0.0, delay))
+        metrics.WORLD_RATE_LIMITED.inc()
+        print(f"[{_ts()}][WORLD-QUEUE] World Labs 429 — requeued {ticket.model} job, pausing {delay:.1f}s")
+        ticket.dispatched = False
+        heapq.heappush(self._heap, (ticket.priority, ticket.seq, ticket))
+        self._paused_until = max(self._paused_until, self._clock() + delay)
+        if self._resume is None:
+            self._resume = asyncio.get_running_loop().call_later(delay, self._pump)
+        self._publish()
+
+    def _publish(self) -> None:
+        """Recompute queue positions/ETAs and tell listeners about changes."""
+        now = self._clock()
+        pause = max(0.0, self._paused_until - now)
+        # When each slot frees up: in-flight jobs by expected remaining time.
+        slots = [max(pause, self.expected_s(model) - (now - started)) for model, started in self._in_flight.values()]
+        slots += [pause + self.expected_s("")] * self._dispatching
+        slots += [pause] * max(0, self.max_in_flight - len(slots))
+        heapq.heapify(slots)
+        waiting = sorted((t for t in self._pending.values() if t.queued), key=lambda t: (t.priority, t.seq))
+        for position, ticket in enumerate(waiting):
+            free_at = heapq.heappop(slots)
+            heapq.heappush(slots, free_at + self.expected_s(ticket.model))
+            if ticket.position != position:
+                ticket.position, ticket.eta_s = position, free_at
+                for listener in ticket.listeners:
+                    try:
+                        listener(position, free_at)
+                    except Exception as e:
+                        logger.warning("Queue listener failed: %s", e)
@@ -16,6 +16,7 @@ import logging
 from typing import AsyncGenerator
 
 import websockets
+from websockets.protocol import State
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,11 @@ class GradiumTTSStream:
     def __init__(self, ws: websockets.WebSocketClientProtocol):
         self._ws = ws
 
+    @property
+    def is_open(self) -> bool:
+        """True while the underlying socket is still usable (setup done, not closed)."""
+        return getattr(self._ws, "state", State.OPEN) == State.OPEN
+
     async def send_text(self, text: str) -> None:
         """Send text to synthesise."""
         await self._ws.send(json.dumps({"type": "text", "text": text}))
@@ -0,0 +1,220 @@
+"""Token-budgeted compaction of GeminiGuide.conversation_history.
+
+Every Gemini request resends the whole history, and in the exploring phase
+each turn carries a JPEG canvas frame, so without compaction first-token
+latency, memory and input tokens all grow with session length. Before each
+request, `HistoryPolicy.compact`:
+
+1. replaces image parts in user turns older than the last `keep_image_turns`
+   with a short text placeholder (the model has already described them),
+2. estimates the history's size in tokens — incrementally, only entries
+   added since the last request are counted,
+3. when over `token_budget`, rolls everything before the last
+   `keep_recent_turns` user turns into a running summary. The summary is
+   computed in a background task, so the request that triggers it still
+   goes out immediately with the full history; the summarized entries are
+   swapped for one summary entry once it lands (if they are still there).
+
+The history stays a plain list that callers append to directly; the policy
+only rewrites entries at request time. Token counts are estimates (about 4
+characters per token, a fixed cost per image), not API counts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable
+
+from google.genai import types
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 24_000
+DEFAULT_KEEP_IMAGE_TURNS = 2
+DEFAULT_KEEP_RECENT_TURNS = 6
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 258  # Gemini's cost for one small image tile
+SUMMARY_PREFIX = "[Summary of the conversation so far]"
+IMAGE_PLACEHOLDER = "[Earlier view of the world — image omitted]"
+
+# transcript → summary text
+Summarizer = Callable[[str], Awaitable[str]]
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+def estimate_tokens(entry: types.Content) -> int:
+    chars = 0
+    images = 0
+    for part in entry.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.inline_data is not None:
+            images += 1
+        elif part.function_call is not None:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response is not None:
+            chars += len(part.function_response.name or "") + len(
+                json.dumps(part.function_response.response or {}, default=str)
+            )
+    return chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + 4  # + per-entry framing
+
+
+def is_user_turn(entry: types.Content) -> bool:
+    """A user message (text or image), as opposed to a function result."""
+    return entry.role == "user" and any(p.function_response is None for p in entry.parts or [])
+
+
+def render_transcript(entries: list[types.Content]) -> str:
+    """Plain-text transcript of history entries for the summarizer (no images)."""
+    lines = []
+    for entry in entries:
+        speaker = "Traveller" if entry.role == "user" else "Guide"
+        for part in entry.parts or []:
+            if part.text:
+                text = part.text
+                if text.startswith(SUMMARY_PREFIX):
+                    lines.append(f"Earlier summary: {text[len(SUMMARY_PREFIX):].strip()}")
+                elif text != IMAGE_PLACEHOLDER:
+                    lines.append(f"{speaker}: {text}")
+            elif part.function_call is not None:
+                args = json.dumps(part.function_call.args or {}, default=str)
+                lines.append(f"Guide called {part.function_call.name}({args})")
+            elif part.function_response is not None:
+                result = json.dumps(part.function_response.response or {}, default=str)
+                lines.append(f"Result of {part.function_response.name}: {result}")
+    return "\n".join(lines)
+
+
+class HistoryPolicy:
+    """Per-session history compaction; one per GeminiGuide."""
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        keep_image_turns: int = DEFAULT_KEEP_IMAGE_TURNS,
+        keep_recent_turns: int = DEFAULT_KEEP_RECENT_TURNS,
+        summarizer: Summarizer | None = None,
+    ):
+        self.token_budget = token_budget
+        self.keep_image_turns = keep_image_turns
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.summarizer = summarizer
+        self._counted: list[tuple[types.Content, int]] = []  # token estimate per entry, in history order
+        self._tokens = 0
+        self._summary_task: asyncio.Task | None = None
+        self.images_evicted = 0
+        self.turns_summarized = 0
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the history as of the last compact()."""
+        return self._tokens
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._counted),
+            "tokens": self._tokens,
+            "images_evicted": self.images_evicted,
+            "turns_summarized": self.turns_summarized,
+            "summarizing": self._summary_task is not None and not self._summary_task.done(),
+        }
+
+    def compact(self, history: list[types.Content]) -> int:
+        """Compact `history` in place before a request; returns its estimated tokens."""
+        self._evict_images(history)
+        tokens = self._measure(history)
+        metrics.GEMINI_HISTORY_TOKENS.observe(tokens)
+        if tokens > self.token_budget and self.summarizer is not None and not self._summarizing():
+            cut = self._summary_cut(history)
+            if cut > 0:
+                self._summary_task = asyncio.create_task(self._summarize(history, history[:cut]))
+        return tokens
+
+    def reset(self) -> None:
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+        self._summary_task = None
+        self._counted.clear()
+        self._tokens = 0
+
+    # --- internals ---
+
+    def _summarizing(self) -> bool:
+        return self._summary_task is not None and not self._summary_task.done()
+
+    def _measure(self, history: list[types.Content]) -> int:
+        """Re-count only entries that changed or were added since the last call."""
+        same = 0
+        limit = min(len(self._counted), len(history))
+        while same < limit and self._counted[same][0] is history[same]:
+            same += 1
+        for _, tokens in self._counted[same:]:
+            self._tokens -= tokens
+        del self._counted[same:]
+        for entry in history[same:]:
+            tokens = estimate_tokens(entry)
+            self._counted.append((entry, tokens))
+            self._tokens += tokens
+        return self._tokens
+
+    def _evict_images(self, history: list[types.Content]) -> None:
+        seen_turns = 0
+        for i in range(len(history) - 1, -1, -1):
+            entry = history[i]
+            if not is_user_turn(entry):
+                continue
+            seen_turns += 1
+            if seen_turns <= self.keep_image_turns:
+                continue
+            parts = entry.parts or []
+            if not any(p.inline_data is not None for p in parts):
+                continue
+            kept = [p for p in parts if p.inline_data is None]
+            evicted = len(parts) - len(kept)
+            history[i] = types.Content(role=entry.role, parts=[*kept, types.Part(text=IMAGE_PLACEHOLDER)])
+            self.images_evicted += evicted
+            metrics.GEMINI_HISTORY_IMAGES_EVICTED.inc(evicted)
+
+    def _summary_cut(self, history: list[types.Content]) -> int:
+        """Index of the user turn that starts the kept tail (0 = nothing to summarize).
+
+        Cutting at a user turn keeps each function call with its result.
+        """
+        turns = 0
+        for i in range(len(history) - 1, -1, -1):
+            if is_user_turn(history[i]):
+                turns += 1
+                if turns == self.keep_recent_turns:
+                    return i if i >= 2 else 0
+        return 0
+
+    async def _summarize(self, history: list[types.Content], head: list[types.Content]) -> None:
+        started = time.monotonic()
+        try:
+            summary = await self.summarizer(render_transcript(head))
+        except Exception as e:
+            logger.warning("History summary failed (keeping full history): %s", e)
+            return
+        if not summary or len(history) < len(head) or any(a is not b for a, b in zip(history, head)):
+            return  # history was reset or rewritten meanwhile
+        summarized_turns = sum(1 for e in head if is_user_turn(e) and not _is_summary(e))
+        history[: len(head)] = [types.Content(role="user", parts=[types.Part(text=f"{SUMMARY_PREFIX} {summary}")])]
+        self.turns_summarized += summarized_turns
+        metrics.GEMINI_HISTORY_SUMMARIES.inc()
+        print(
+            f"[{_ts()}][HISTORY] Summarized {len(head)} entries ({summarized_turns} turns) "
+            f"in {time.monotonic() - started:.1f}s — {len(history)} entries left"
+        )
+
+
+def _is_summary(entry: types.Content) -> bool:
+    parts = entry.parts or []
+    return len(parts) == 1 and bool(parts[0].text) and parts[0].text.startswith(SUMMARY_PREFIX)
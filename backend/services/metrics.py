@@ -0,0 +1,408 @@
+"""In-process metrics with Prometheus text exposition.
+
+Deliberately tiny (no prometheus_client dependency): counters, gauges and
+fixed-bucket histograms, rendered by `render_prometheus()` for the /metrics
+endpoint in main.py. Histograms also keep a window of recent samples so
+p50/p95/p99 can be read straight off /metrics without a Prometheus server
+(with one, use histogram_quantile() over the buckets instead).
+
+Everything runs on the event loop thread, so no locking is needed.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Callable
+
+# Latency buckets (seconds) covering 10ms .. 30s — voice turn stages range
+# from a few ms (queue hand-off) to several seconds (Gemini + TTS cold start).
+LATENCY_BUCKETS = (
+    0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0,
+)
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {_fmt(self.value)}",
+        ]
+
+
+class Gauge:
+    """Gauge set directly or computed on scrape via a callback."""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float] | None = None):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+        self._fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, fn: Callable[[], float] | None) -> None:
+        """Compute the value on scrape (replaces any previous callback)."""
+        self._fn = fn
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def render(self) -> list[str]:
+        value = self._fn() if self._fn else self.value
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_fmt(value)}",
+        ]
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        window: int = 1024,
+    ):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        if value < 0 or math.isnan(value):
+            return
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Quantile over the recent-sample window (NaN when empty)."""
+        if not self._recent:
+            return math.nan
+        ordered = sorted(self._recent)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[idx]
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{_fmt(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {_fmt(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+
+        window_name = f"{self.name}_window"
+        lines.append(f"# HELP {window_name} {self.help} (last {self._recent.maxlen} samples)")
+        lines.append(f"# TYPE {window_name} summary")
+        for q in WINDOW_QUANTILES:
+            lines.append(f'{window_name}{{quantile="{q}"}} {_fmt(self.quantile(q))}')
+        lines.append(f"{window_name}_sum {_fmt(sum(self._recent))}")
+        lines.append(f"{window_name}_count {len(self._recent)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float] | None = None) -> Gauge:
+        return self._add(Gauge(name, help_text, fn))
+
+    def histogram(self, name: str, help_text: str, **kwargs) -> Histogram:
+        return self._add(Histogram(name, help_text, **kwargs))
+
+    def get(self, name: str) -> Counter | Gauge | Histogram | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------------
+# Voice pipeline metrics (routers/voice.py)
+# ---------------------------------------------------------------------------
+
+VAD_TO_TURN = REGISTRY.histogram(
+    "voice_vad_ready_to_turn_fired_seconds",
+    "VAD end-of-speech to turn fired (debounce wait)",
+)
+TURN_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "voice_turn_to_first_token_seconds",
+    "Turn fired to first Gemini text token",
+)
+FIRST_TOKEN_TO_FIRST_AUDIO = REGISTRY.histogram(
+    "voice_first_token_to_first_tts_audio_seconds",
+    "First Gemini token to first TTS audio byte from Gradium",
+)
+FIRST_AUDIO_TO_SEND = REGISTRY.histogram(
+    "voice_first_tts_audio_to_frontend_send_seconds",
+    "First TTS audio byte to its write on the frontend socket",
+)
+TIME_TO_FIRST_AUDIO = REGISTRY.histogram(
+    "voice_time_to_first_audio_seconds",
+    "Turn fired to first TTS audio written to the frontend",
+)
+INTERRUPT_CANCEL = REGISTRY.histogram(
+    "voice_interrupt_cancel_seconds",
+    "Interrupt received to in-flight response fully cancelled",
+)
+
+TURNS = REGISTRY.counter("voice_turns_total", "User turns fired")
+INTERRUPTS = REGISTRY.counter("voice_interrupts_total", "Barge-in interrupts received from the frontend")
+TTS_FALLBACKS = REGISTRY.counter("voice_tts_fallbacks_total", "Responses that fell back to text-only (TTS unavailable)")
+FUNCTION_CALL_ROUNDS = REGISTRY.counter("voice_function_call_rounds_total", "Gemini rounds that produced function calls")
+FOLLOW_UP_ROUNDS_SKIPPED = REGISTRY.counter(
+    "voice_follow_up_rounds_skipped_total", "Function-call rounds answered without a follow-up (fire-and-forget tools only)",
+)
+TOOL_CALL_DURATION = REGISTRY.histogram(
+    "voice_tool_call_seconds", "Function call execution time (runs alongside the Gemini text stream)",
+)
+TOOL_CALL_TIMEOUTS = REGISTRY.counter("voice_tool_call_timeouts_total", "Function calls abandoned at their timeout")
+CONFIRM_TO_WORLD_DESCRIPTION = REGISTRY.histogram(
+    "voice_confirm_to_world_description_seconds",
+    "confirm_exploration to session_summary (world description) sent — world generation starts from it",
+)
+ACTIVE_SESSIONS = REGISTRY.gauge("voice_active_sessions", "Open /ws/voice connections")
+OUTBOUND_DROPPED_STALE = REGISTRY.counter(
+    "voice_outbound_dropped_stale_total", "Outbound messages dropped for a superseded responseId",
+)
+INBOUND_AUDIO_DROPPED = REGISTRY.counter(
+    "voice_inbound_audio_dropped_total", "Mic audio chunks dropped by the STT lane overflow policy",
+)
+INBOUND_AUDIO_LAG = REGISTRY.histogram(
+    "voice_inbound_audio_lag_seconds", "Mic audio chunk queued on the STT lane to handed to STT",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0),
+)
+INBOUND_AUDIO_DEPTH = REGISTRY.gauge(
+    "voice_inbound_audio_lane_depth", "Mic audio chunks waiting on the STT lanes, all sessions",
+)
+
+# Conversation history compaction (services/history_policy.py).
+GEMINI_HISTORY_TOKENS = REGISTRY.histogram(
+    "gemini_history_tokens",
+    "Estimated tokens of conversation history sent per Gemini request",
+    buckets=(1000, 2000, 4000, 8000, 16000, 24000, 32000, 48000, 64000, 128000),
+)
+GEMINI_HISTORY_IMAGES_EVICTED = REGISTRY.counter(
+    "gemini_history_images_evicted_total", "Canvas frames dropped from older turns of the history",
+)
+GEMINI_HISTORY_SUMMARIES = REGISTRY.counter(
+    "gemini_history_summaries_total", "Times older history was rolled into the running summary",
+)
+
+# Prompt prefix reuse: memoized phase configs and provider-side context
+# caches (services/context_cache.py).
+GEMINI_CONFIG_BUILDS = REGISTRY.counter(
+    "gemini_config_builds_total", "Phase configs (system prompt + tools) built; reused configs don't count",
+)
+GEMINI_CONTEXT_CACHE_HITS = REGISTRY.counter(
+    "gemini_context_cache_hits_total", "Gemini requests sent with a cached system prompt and tools",
+)
+GEMINI_CONTEXT_CACHE_CREATED = REGISTRY.counter(
+    "gemini_context_cache_created_total", "Gemini cached contents created for a prompt prefix",
+)
+GEMINI_CONTEXT_CACHE_FAILED = REGISTRY.counter(
+    "gemini_context_cache_failed_total", "Cached content creations that failed (prefix sent inline)",
+)
+GEMINI_PROMPT_TOKENS = REGISTRY.counter(
+    "gemini_prompt_tokens_total", "Input tokens reported by Gemini for guide turns",
+)
+GEMINI_CACHED_PROMPT_TOKENS = REGISTRY.counter(
+    "gemini_cached_prompt_tokens_total", "Input tokens Gemini served from a cache (explicit or implicit)",
+)
+
+# Speculative generation (services/speculative_turn.py): Gemini starts at VAD
+# end-of-speech and is committed only if the debounced turn text matches.
+SPECULATION_STARTED = REGISTRY.counter(
+    "voice_speculation_started_total", "Speculative Gemini generations started at VAD end-of-speech",
+)
+SPECULATION_HITS = REGISTRY.counter(
+    "voice_speculation_hits_total", "Fired turns served from a matching speculative generation",
+)
+SPECULATION_DISCARDED = REGISTRY.counter(
+    "voice_speculation_discarded_total", "Speculative generations thrown away (transcript changed or context reset)",
+)
+SPECULATION_HIT_RATE = REGISTRY.gauge(
+    "voice_speculation_hit_rate",
+    "Speculation hits / speculations started (NaN before the first one)",
+    fn=lambda: SPECULATION_HITS.value / SPECULATION_STARTED.value if SPECULATION_STARTED.value else math.nan,
+)
+SPECULATION_HEAD_START = REGISTRY.histogram(
+    "voice_speculation_head_start_seconds",
+    "Speculation start to turn fired, for hits (debounce time hidden from the user)",
+)
+
+# ---------------------------------------------------------------------------
+# Gradium TTS session pool (services/tts_pool.py)
+# ---------------------------------------------------------------------------
+
+TTS_ACQUIRE_WAIT = REGISTRY.histogram(
+    "tts_pool_acquire_wait_seconds",
+    "Time a response waited for a TTS stream from the pool",
+)
+TTS_HANDSHAKE = REGISTRY.histogram(
+    "tts_pool_handshake_seconds",
+    "Gradium TTS connect + setup/ready handshake (off the critical path when warm)",
+)
+TTS_ACQUIRE_COLD = REGISTRY.counter(
+    "tts_pool_cold_acquires_total", "Acquires that had to wait for a fresh handshake",
+)
+TTS_RECYCLED = REGISTRY.counter(
+    "tts_pool_recycled_total", "Warm TTS streams closed for age or a dead socket before use",
+)
+TTS_HANDSHAKE_FAILURES = REGISTRY.counter(
+    "tts_pool_handshake_failures_total", "Failed Gradium TTS handshakes (incl. concurrency limit)",
+)
+TTS_POOL_IDLE = REGISTRY.gauge("tts_pool_idle_streams", "Pre-handshaked TTS streams ready to hand out")
+TTS_POOL_OPEN = REGISTRY.gauge("tts_pool_open_streams", "TTS sessions open or connecting (counts against the cap)")
+TTS_POOL_WAITERS = REGISTRY.gauge("tts_pool_waiters", "Responses queued for a TTS stream")
+
+# ---------------------------------------------------------------------------
+# World Labs operations (services/operation_registry.py)
+# ---------------------------------------------------------------------------
+
+WORLD_POLLS = REGISTRY.counter(
+    "world_operation_polls_total", "Upstream World Labs operation polls (one loop per operation)",
+)
+WORLD_READY_DETECTION_GAP = REGISTRY.histogram(
+    "world_ready_detection_gap_seconds",
+    "Interval before the poll that saw an operation done (upper bound on detection lag)",
+)
+WORLD_GENERATION = REGISTRY.histogram(
+    "world_generation_seconds",
+    "Observed World Labs generation time, tracking start to done",
+    buckets=(15, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600),
+)
+WORLD_OPERATIONS_ACTIVE = REGISTRY.gauge("world_operations_active", "Operations with a live poll loop")
+WORLD_CACHE_HITS = REGISTRY.counter(
+    "world_cache_hits_total", "Completed operations / world payloads served from cache",
+)
+WORLD_CACHE_MISSES = REGISTRY.counter(
+    "world_cache_misses_total", "World payload lookups that went upstream",
+)
+WORLD_STATUS_NOT_MODIFIED = REGISTRY.counter(
+    "world_status_not_modified_total", "Status requests answered 304 via If-None-Match",
+)
+WORLD_STATUS_BATCH_SIZE = REGISTRY.histogram(
+    "world_status_batch_size", "Distinct operation IDs per /api/worlds/status:batch request",
+    buckets=(1, 2, 5, 10, 25, 50, 100),
+)
+WORLD_STREAM_SUBSCRIBERS = REGISTRY.gauge(
+    "world_stream_subscribers", "Open /api/worlds/stream SSE connections",
+)
+WORLD_QUEUE_DEPTH = REGISTRY.gauge("world_queue_depth", "Generations waiting for an upstream slot")
+WORLD_IN_FLIGHT = REGISTRY.gauge("world_in_flight", "Generations holding an upstream slot")
+WORLD_QUEUE_WAIT = REGISTRY.histogram(
+    "world_queue_wait_seconds", "Time from submit to World Labs accepting the generation",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+WORLD_RATE_LIMITED = REGISTRY.counter(
+    "world_rate_limited_total", "Generate calls answered 429 and requeued",
+)
+WORLD_GENERATIONS_STARTED = REGISTRY.counter(
+    "world_generations_started_total", "New World Labs generations started upstream",
+)
+WORLD_CATALOG_REUSED_READY = REGISTRY.counter(
+    "world_catalog_reused_ready_total", "Generation requests served by an existing finished world",
+)
+WORLD_CATALOG_REUSED_IN_FLIGHT = REGISTRY.counter(
+    "world_catalog_reused_in_flight_total", "Generation requests attached to an operation already running",
+)
+
+# Speculative pre-generation during globe selection (services/world_prefetch.py).
+WORLD_PREFETCH_STARTED = REGISTRY.counter(
+    "world_prefetch_started_total", "Speculative mini generations started upstream",
+)
+WORLD_PREFETCH_ADOPTED = REGISTRY.counter(
+    "world_prefetch_adopted_total", "Generation requests served by a speculative job",
+)
+WORLD_PREFETCH_ABANDONED = REGISTRY.counter(
+    "world_prefetch_abandoned_total", "Speculative jobs the user moved away from before confirming",
+)
+WORLD_PREFETCH_SKIPPED = REGISTRY.counter(
+    "world_prefetch_skipped_total", "Speculative generations not started (session or global budget)",
+)
+WORLD_PREFETCH_WAIT_SAVED = REGISTRY.histogram(
+    "world_prefetch_wait_saved_seconds",
+    "Generation time already elapsed when a speculative job was adopted (loading wait removed)",
+    buckets=(5, 15, 30, 45, 60, 90, 120, 180, 300),
+)
+
+# Progressive generation (routers/voice.py): mini preview first, then an upgrade.
+WORLD_UPGRADES_STARTED = REGISTRY.counter(
+    "world_upgrades_started_total", "Higher-quality upgrade generations started or attached to",
+)
+WORLD_UPGRADES_DELIVERED = REGISTRY.counter(
+    "world_upgrades_delivered_total", "upgrade_ready messages pushed to a voice session",
+)
+
+# ---------------------------------------------------------------------------
+# World asset proxy (services/asset_cache.py)
+# ---------------------------------------------------------------------------
+
+ASSET_CACHE_HITS = REGISTRY.counter("asset_cache_hits_total", "World asset requests served from the disk cache")
+ASSET_CACHE_MISSES = REGISTRY.counter(
+    "asset_cache_misses_total", "World asset requests that waited for a CDN download",
+)
+ASSET_CACHE_EVICTIONS = REGISTRY.counter("asset_cache_evictions_total", "Cached world assets deleted (LRU)")
+ASSET_CACHE_BYTES = REGISTRY.gauge("asset_cache_bytes", "Bytes of world assets on disk")
+ASSET_DOWNLOAD_BYTES = REGISTRY.counter(
+    "asset_download_bytes_total", "Bytes downloaded from the World Labs CDN into the asset cache",
+)
@@ -0,0 +1,453 @@
+"""Single in-process poller for World Labs generation operations.
+
+Every watcher of an operation — the /ws/voice world_status notifier and any
+number of REST /api/worlds/status callers — reads from one OperationState,
+and exactly one upstream poll loop runs per operation however many watchers
+it has.
+
+Polling is adaptive: the expected duration for the model comes from recent
+completed generations (defaults below until there are samples), and the
+interval shrinks as the expected finish approaches — sparse early, dense
+near the end, gently backing off once overdue.
+
+Completed operations and their world payloads never change, so they are
+kept in size-bounded LRU+TTL caches: repeat loads of a finished world cost
+no upstream calls until the entry expires (World Labs asset URLs are signed,
+so the TTL should stay below their lifetime). Splat byte sizes for LOD
+selection are probed once per world and cached the same way.
+
+With a WorldCatalog attached, `start_generation` first looks the request up
+by content key: a finished equivalent world is reused instantly and an
+in-flight one is attached to, unless `fresh=True`. New generations then
+queue in a GenerationScheduler for one of `max_in_flight` upstream slots.
+
+Created in main.py's lifespan and shared via `app.state.operations`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+import httpx
+
+from services import metrics
+from services.generation_scheduler import (
+    DEFAULT_MAX_IN_FLIGHT,
+    PRIORITY_INTERACTIVE,
+    GenerationScheduler,
+    QueueListener,
+)
+from services.ttl_cache import TTLCache
+from services.world_catalog import STATUS_GENERATING, STATUS_READY, WorldCatalog, world_key
+from services.world_labs import MAX_POLL_ATTEMPTS, POLL_INTERVAL_S, WorldLabsService
+
+logger = logging.getLogger(__name__)
+
+# Typical generation times until we've observed our own.
+DEFAULT_EXPECTED_S = {
+    "Marble 0.1-mini": 45.0,
+    "Marble 0.1-plus": 300.0,
+}
+FALLBACK_EXPECTED_S = 120.0
+
+MIN_POLL_INTERVAL_S = 1.0
+MAX_POLL_INTERVAL_S = 15.0
+OPERATION_TIMEOUT_S = MAX_POLL_ATTEMPTS * POLL_INTERVAL_S
+DONE_LINGER_S = 300.0  # keep finished states around for late REST pollers
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL_S = 3600.0
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+class DurationModel:
+    """Recent observed generation durations per model."""
+
+    def __init__(self, window: int = 50):
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str | None, duration_s: float) -> None:
+        self._samples[model or ""].append(duration_s)
+
+    def expected(self, model: str | None) -> float:
+        samples = self._samples.get(model or "")
+        if samples:
+            return statistics.median(samples)
+        return DEFAULT_EXPECTED_S.get(model or "", FALLBACK_EXPECTED_S)
+
+
+def next_poll_delay(
+    elapsed_s: float,
+    expected_s: float,
+    min_s: float = MIN_POLL_INTERVAL_S,
+    max_s: float = MAX_POLL_INTERVAL_S,
+) -> float:
+    """Seconds until the next poll.
+
+    Before the expected finish: half the remaining time (so polls get denser
+    as it approaches). After it: start at min_s and back off by 10% of the
+    overrun, so a slow job doesn't get hammered.
+    """
+    remaining = expected_s - elapsed_s
+    if remaining > 0:
+        delay = remaining / 2
+    else:
+        delay = min_s + 0.1 * -remaining
+    return max(min_s, min(max_s, delay))
+
+
+@dataclass(frozen=True)
+class Generation:
+    """Result of start_generation. `reused` is None, "ready" or "in_flight"
+    ("prefetched" when WorldPrefetcher hands over a speculative job)."""
+    operation_id: str
+    reused: str | None = None
+    world_id: str | None = None
+
+
+@dataclass
+class OperationState:
+    operation_id: str
+    model: str | None
+    started_at: float  # time.monotonic()
+    operation: dict | None = None  # latest upstream payload
+    polls: int = 0
+    last_polled_at: float | None = None
+    done: bool = False
+    error: str | None = None
+    finished_at: float | None = None
+    last_exception: Exception | None = None
+    first_poll: asyncio.Event = field(default_factory=asyncio.Event)
+    done_event: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def elapsed_s(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class OperationRegistry:
+    """One adaptive poll loop per World Labs operation, shared by all watchers."""
+
+    def __init__(
+        self,
+        world_labs: WorldLabsService,
+        durations: DurationModel | None = None,
+        min_interval_s: float = MIN_POLL_INTERVAL_S,
+        max_interval_s: float = MAX_POLL_INTERVAL_S,
+        timeout_s: float = OPERATION_TIMEOUT_S,
+        linger_s: float = DONE_LINGER_S,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl_s: float = DEFAULT_CACHE_TTL_S,
+        catalog: WorldCatalog | None = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self.world_labs = world_labs
+        self.catalog = catalog
+        self.durations = durations or DurationModel()
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.timeout_s = timeout_s
+        self.linger_s = linger_s
+        self._states: dict[str, OperationState] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Successful operations and world payloads (immutable once done).
+        self._completed: TTLCache[str, OperationState] = TTLCache(cache_size, cache_ttl_s)
+        self._worlds: TTLCache[str, dict] = TTLCache(cache_size, cache_ttl_s)
+        self._world_fetches: dict[str, asyncio.Task] = {}
+        self._splat_sizes: TTLCache[str, dict[str, int | None]] = TTLCache(cache_size, cache_ttl_s)
+        self._size_probes: dict[str, asyncio.Task] = {}
+        self._fresh_seq = itertools.count()
+        self.scheduler = GenerationScheduler(max_in_flight, expected_s=self.durations.expected)
+
+        metrics.WORLD_OPERATIONS_ACTIVE.set_function(
+            lambda: sum(1 for s in self._states.values() if not s.done)
+        )
+
+    async def start_generation(
+        self,
+        scene_description: str,
+        display_name: str = "QHacks World",
+        model: str = "Marble 0.1-mini",
+        *,
+        location: str | None = None,
+        time_period: str | None = None,
+        lat: float | None = None,
+        lng: float | None = None,
+        year: float | None = None,
+        fresh: bool = False,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_queue: QueueListener | None = None,
+    ) -> Generation:
+        """Start (or reuse) a World Labs generation and begin tracking it.
+
+        Equivalent requests — same normalized scene, location, time period and
+        model — reuse a finished world or attach to the in-flight operation.
+        `fresh=True` always starts a new generation.
+
+        New generations wait in the GenerationScheduler for an upstream slot
+        (by `priority`); `on_queue(position, eta_s)` hears about queue moves.
+        """
+        key = world_key(scene_description, location=location, time_period=time_period, model=model)
+        if not fresh:
+            reused = self._reuse(key, model)
+            if reused is not None:
+                return reused
+
+        async def start() -> str:
+            operation_id = await self.world_labs.generate_world(
+                scene_description=scene_description, display_name=display_name, model=model,
+            )
+            metrics.WORLD_GENERATIONS_STARTED.inc()
+            if self.catalog is not None:
+                self.catalog.record_started(
+                    key, operation_id, model=model, location=location, time_period=time_period,
+                    lat=lat, lng=lng, year=year, display_name=display_name,
+                    scene_description=scene_description,
+                )
+            self.track(operation_id, model=model)
+            return operation_id
+
+        # Identical pending requests share one queued ticket (unless fresh).
+        queue_key = f"{key}#fresh{next(self._fresh_seq)}" if fresh else key
+        ticket, joined = self.scheduler.submit(
+            queue_key, start, model=model, priority=priority, on_queue=on_queue,
+        )
+        ticket.waiters += 1
+        try:
+            operation_id = await asyncio.shield(ticket.future)
+        finally:
+            ticket.waiters -= 1
+            if not ticket.future.done():
+                self.scheduler.withdraw(ticket)  # every caller gave up while queued
+        if joined:
+            metrics.WORLD_CATALOG_REUSED_IN_FLIGHT.inc()
+            return Generation(operation_id, reused="in_flight")
+        return Generation(operation_id)
+
+    def track(self, operation_id: str, model: str | None = None) -> OperationState:
+        """Get the shared state for an operation, starting its poll loop if needed."""
+        state = self._states.get(operation_id) or self._cached_operation(operation_id)
+        if state is None:
+            state = OperationState(operation_id=operation_id, model=model, started_at=time.monotonic())
+            self._states[operation_id] = state
+            self._tasks[operation_id] = asyncio.create_task(self._poll_loop(state))
+        elif model and not state.model:
+            state.model = model
+        return state
+
+    def is_generating(self, operation_id: str) -> bool:
+        state = self._states.get(operation_id)
+        return state is not None and not state.done
+
+    def get(self, operation_id: str) -> OperationState | None:
+        return self._states.get(operation_id) or self._cached_operation(operation_id)
+
+    async def world_assets(self, world_id: str) -> dict:
+        """World details (asset URLs), cached; concurrent misses share one fetch."""
+        cached = self._worlds.get(world_id)
+        if cached is not None:
+            metrics.WORLD_CACHE_HITS.inc()
+            return cached
+        metrics.WORLD_CACHE_MISSES.inc()
+        task = self._world_fetches.get(world_id)
+        if task is None:
+            task = asyncio.create_task(self.world_labs.get_world_assets(world_id))
+            self._world_fetches[world_id] = task
+            task.add_done_callback(lambda t: self._store_world(world_id, t))
+        return await asyncio.shield(task)
+
+    async def splat_sizes(self, world_id: str) -> dict[str, int | None]:
+        """Byte size per splat resolution, probed once per world (for LOD selection)."""
+        cached = self._splat_sizes.get(world_id)
+        if cached is not None:
+            return cached
+        task = self._size_probes.get(world_id)
+        if task is None:
+            task = asyncio.create_task(self._probe_splat_sizes(world_id))
+            self._size_probes[world_id] = task
+            task.add_done_callback(lambda t: self._store_splat_sizes(world_id, t))
+        return await asyncio.shield(task)
+
+    def cache_ttl_remaining(self, world_id: str) -> float:
+        """Seconds the cached world payload stays valid (0 if not cached)."""
+        return self._worlds.ttl_remaining(world_id)
+
+    async def current(self, operation_id: str) -> OperationState:
+        """Latest known state; waits for the first poll of a newly seen operation.
+
+        Re-raises the upstream error if that first poll failed.
+        """
+        state = self.track(operation_id)
+        await state.first_poll.wait()
+        if state.operation is None and state.last_exception is not None:
+            raise state.last_exception
+        return state
+
+    async def wait(self, operation_id: str, model: str | None = None) -> OperationState:
+        """Wait until the operation is done (ready, failed or timed out).
+
+        Check `state.error` on return: it is also set when polling stopped
+        before the operation finished (`state.done` stays False then).
+        """
+        state = self.track(operation_id, model=model)
+        await state.done_event.wait()
+        if state.operation is None and state.last_exception is not None:
+            raise state.last_exception
+        return state
+
+    def next_poll_in(self, state: OperationState) -> float:
+        return next_poll_delay(
+            state.elapsed_s, self.durations.expected(state.model),
+            self.min_interval_s, self.max_interval_s,
+        )
+
+    async def stop(self) -> None:
+        self.scheduler.close()
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    # --- internals ---
+
+    async def _poll_loop(self, state: OperationState) -> None:
+        operation_id = state.operation_id
+        try:
+            while True:
+                try:
+                    operation = await self.world_labs.fetch_operation(operation_id)
+                    state.last_exception = None
+                except httpx.HTTPStatusError as e:
+                    state.last_exception = e
+                    code = e.response.status_code
+                    if 400 <= code < 500 and code != 429:
+                        # Unknown/forbidden operation — polling again won't help.
+                        self._finish(state, error=f"HTTP {code}")
+                        return
+                    operation = None
+                except Exception as e:
+                    state.last_exception = e
+                    operation = None
+
+                now = time.monotonic()
+                if operation is not None:
+                    metrics.WORLD_POLLS.inc()
+                    if operation.get("done") and state.last_polled_at is not None:
+                        metrics.WORLD_READY_DETECTION_GAP.observe(now - state.last_polled_at)
+                    state.operation = operation
+                    state.polls += 1
+                    state.last_polled_at = now
+                state.first_poll.set()
+
+                if operation is not None and operation.get("done"):
+                    error = operation.get("error")
+                    if not error:
+                        self.durations.record(state.model, state.elapsed_s)
+                        metrics.WORLD_GENERATION.observe(state.elapsed_s)
+                    self._finish(state, error=str(error) if error else None)
+                    return
+                if state.elapsed_s > self.timeout_s:
+                    self._finish(state, error=f"World generation timed out after {self.timeout_s:.0f}s")
+                    return
+
+                delay = self.next_poll_in(state)
+                logger.debug(
+                    "operation %s not done (poll %d, %.0fs elapsed) — next poll in %.1fs",
+                    operation_id, state.polls, state.elapsed_s, delay,
+                )
+                await asyncio.sleep(delay)
+        finally:
+            state.first_poll.set()
+            if not state.done:
+                # Stopped (stop()) before upstream said done: wake waiters with
+                # an error, never with what would look like a ready world.
+                state.error = "Polling stopped before the operation finished"
+                print(f"[{_ts()}][WORLD-OPS] {operation_id} polling stopped after {state.polls} polls")
+                state.done_event.set()
+            asyncio.get_running_loop().call_later(self.linger_s, self._evict, operation_id)
+
+    def _reuse(self, key: str, model: str) -> Generation | None:
+        """Catalog hit for `key`: a finished world, or a still-live operation."""
+        entry = self.catalog.lookup(key) if self.catalog is not None else None
+        if entry is None:
+            return None
+        if entry.status == STATUS_READY and entry.world_id:
+            self._seed_ready(entry.operation_id, entry.world_id, entry.model)
+            metrics.WORLD_CATALOG_REUSED_READY.inc()
+            print(f"[{_ts()}][WORLD-OPS] Reusing world {entry.world_id} for {entry.location or 'scene'} ({entry.time_period or '-'})")
+            return Generation(entry.operation_id, reused="ready", world_id=entry.world_id)
+        if entry.status == STATUS_GENERATING and time.time() - entry.created_at < self.timeout_s:
+            self.track(entry.operation_id, model=model)
+            metrics.WORLD_CATALOG_REUSED_IN_FLIGHT.inc()
+            print(f"[{_ts()}][WORLD-OPS] Attaching to in-flight {entry.operation_id}")
+            return Generation(entry.operation_id, reused="in_flight")
+        return None
+
+    def _seed_ready(self, operation_id: str, world_id: str, model: str | None) -> None:
+        """Register a known-finished operation without polling upstream."""
+        if self.get(operation_id) is not None:
+            return
+        state = OperationState(
+            operation_id=operation_id,
+            model=model,
+            started_at=time.monotonic(),
+            operation={"operation_id": operation_id, "done": True, "error": None,
+                       "response": {"world_id": world_id}},
+            done=True,
+            finished_at=time.monotonic(),
+        )
+        state.first_poll.set()
+        state.done_event.set()
+        self._completed.set(operation_id, state)
+
+    def _cached_operation(self, operation_id: str) -> OperationState | None:
+        if operation_id not in self._completed:
+            return None
+        metrics.WORLD_CACHE_HITS.inc()
+        return self._completed.get(operation_id)
+
+    def _store_world(self, world_id: str, task: asyncio.Task) -> None:
+        self._world_fetches.pop(world_id, None)
+        if not task.cancelled() and task.exception() is None:
+            self._worlds.set(world_id, task.result())
+
+    async def _probe_splat_sizes(self, world_id: str) -> dict[str, int | None]:
+        urls = WorldLabsService.extract_splat_urls(await self.world_assets(world_id))
+        sizes = await asyncio.gather(*(self.world_labs.probe_asset_size(url) for url in urls.values()))
+        print(f"[{_ts()}][WORLD] Splat sizes for {world_id}: {dict(zip(urls, sizes))}")
+        return dict(zip(urls, sizes))
+
+    def _store_splat_sizes(self, world_id: str, task: asyncio.Task) -> None:
+        self._size_probes.pop(world_id, None)
+        if not task.cancelled() and task.exception() is None:
+            self._splat_sizes.set(world_id, task.result())
+
+    def _finish(self, state: OperationState, error: str | None) -> None:
+        state.done = True
+        state.error = error
+        state.finished_at = time.monotonic()
+        state.done_event.set()
+        self.scheduler.release(state.operation_id)
+        if error is None:
+            self._completed.set(state.operation_id, state)
+        if self.catalog is not None:
+            world_id = WorldLabsService.extract_world_id((state.operation or {}).get("response") or {})
+            if error is None and world_id:
+                self.catalog.mark_ready(state.operation_id, world_id)
+            else:
+                self.catalog.mark_failed(state.operation_id)
+        print(
+            f"[{_ts()}][WORLD-OPS] {state.operation_id} "
+            f"{'failed: ' + error if error else 'ready'} after {state.elapsed_s:.1f}s, {state.polls} polls"
+        )
+
+    def _evict(self, operation_id: str) -> None:
+        self._states.pop(operation_id, None)
+        self._tasks.pop(operation_id, None)
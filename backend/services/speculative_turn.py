@@ -0,0 +1,113 @@
+"""Speculative Gemini generation for a turn that has not fired yet.
+
+When VAD reports end of speech, the turn detector still waits out a debounce for
+trailing STT words before firing the turn. A SpeculativeResponse starts
+Gemini on the buffered transcript at VAD time and buffers every chunk
+(text and function calls) without sending or executing anything. When the
+turn fires with the same transcript, `replay()` yields the buffered chunks
+and then the live remainder; otherwise `discard()` cancels it.
+
+The speculative request stages its user/model entries in a private list, so
+conversation_history is untouched until `replay()` starts (see
+GeminiGuide.generate_response's `staged` argument).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator
+
+from google.genai import types
+
+from services.gemini_guide import GeminiGuide
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculativeResponse:
+    """One held-back Gemini generation for a candidate user turn."""
+
+    def __init__(
+        self,
+        gemini: GeminiGuide,
+        user_text: str,
+        image_part: types.Part | None = None,
+    ):
+        self.gemini = gemini
+        self.user_text = user_text
+        self.started_at = time.monotonic()
+        self.committed = False
+        self._staged: list[types.Content] = []
+        self._chunks: list[dict] = []
+        self._error: BaseException | None = None
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run(image_part))
+
+    @property
+    def done(self) -> bool:
+        return self._task.done()
+
+    @property
+    def buffered(self) -> int:
+        """Chunks generated so far (the head start a hit gets)."""
+        return len(self._chunks)
+
+    def matches(self, user_text: str) -> bool:
+        return not self._task.cancelled() and self._error is None and user_text == self.user_text
+
+    def discard(self) -> None:
+        """Cancel the generation. Nothing was sent or recorded in history."""
+        if not self.committed and not self._task.done():
+            self._task.cancel()
+
+    async def replay(self) -> AsyncGenerator[dict, None]:
+        """Commit the turn to history and yield its chunks as they become available.
+
+        Same chunk format as GeminiGuide.generate_response. Cancelling the
+        consumer cancels the generation too.
+        """
+        self._commit()
+        sent = 0
+        try:
+            while True:
+                while sent < len(self._chunks):
+                    yield self._chunks[sent]
+                    sent += 1
+                if self._task.done():
+                    break
+                self._changed.clear()
+                await self._changed.wait()
+            if self._error is not None:
+                raise self._error
+        finally:
+            if not self._task.done():
+                self._task.cancel()
+
+    def _commit(self) -> None:
+        self.committed = True
+        self._flush_staged()
+
+    def _flush_staged(self) -> None:
+        # Entries staged after the commit (the model turn, appended when the
+        # stream ends) are flushed again when the generation finishes.
+        self.gemini.conversation_history.extend(self._staged)
+        self._staged.clear()
+
+    async def _run(self, image_part: types.Part | None) -> None:
+        try:
+            async for chunk in self.gemini.generate_response(
+                self.user_text, image_part=image_part, staged=self._staged
+            ):
+                self._chunks.append(chunk)
+                self._changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Speculative generation failed: %s", e)
+            self._error = e
+        finally:
+            if self.committed:
+                self._flush_staged()
+            self._changed.set()
@@ -0,0 +1,111 @@
+"""Pick a splat level of detail for the client's link and device.
+
+World Labs serves each world at several splat resolutions (`100k`, `500k`,
+`full_res`). `extract_renderable_assets` always defaults to the largest,
+which a phone on a slow link downloads before anything renders. Given client
+hints — measured downlink, device memory, GPU tier — `plan_lod` picks:
+
+- a cap: the largest resolution the device should ever hold (weak GPUs and
+  low-memory devices stop at 100k/500k),
+- an initial rung: the largest one under the cap that downloads within
+  FIRST_RENDER_BUDGET_S at the measured downlink,
+- an ordered ladder (smallest first, with byte sizes) the client walks up
+  in the background after the first render.
+
+Byte sizes come from OperationRegistry.splat_sizes (HEAD-probed once per
+world); unknown sizes fall back to nominal estimates. Without hints nothing
+changes: the largest splat is the default.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+RESOLUTION_ORDER = ("100k", "500k", "full_res")
+# Typical .spz sizes, used when a HEAD probe didn't return a length.
+NOMINAL_BYTES = {"100k": 2_500_000, "500k": 12_000_000, "full_res": 48_000_000}
+# Target for the first splat download; larger rungs arrive as upgrades.
+FIRST_RENDER_BUDGET_S = 4.0
+
+
+def _number(value: Any, minimum: float) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number >= minimum else None
+
+
+@dataclass(frozen=True)
+class ClientHints:
+    downlink_mbps: float | None = None  # navigator.connection.downlink
+    device_memory_gb: float | None = None  # navigator.deviceMemory
+    gpu_tier: int | None = None  # 0 = software/very weak, 1 = mobile/integrated, 2 = discrete
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, str], headers: Mapping[str, str] | None = None) -> ClientHints | None:
+        """Hints from query params (`downlink`, `device_memory`, `gpu_tier`), falling
+        back to the standard `Downlink` / `Device-Memory` client-hint headers.
+        None if the client sent none."""
+        headers = headers or {}
+        gpu_tier = _number(params.get("gpu_tier"), 0)
+        hints = cls(
+            downlink_mbps=_number(params.get("downlink") or headers.get("downlink"), 0.01),
+            device_memory_gb=_number(params.get("device_memory") or headers.get("device-memory"), 0.01),
+            gpu_tier=int(gpu_tier) if gpu_tier is not None else None,
+        )
+        return hints if hints != cls() else None
+
+    def max_resolution(self) -> str:
+        if self.gpu_tier == 0 or (self.device_memory_gb is not None and self.device_memory_gb < 2):
+            return "100k"
+        if self.gpu_tier == 1 or (self.device_memory_gb is not None and self.device_memory_gb <= 4):
+            return "500k"
+        return "full_res"
+
+
+def _rank(resolution: str, size: int | None) -> tuple[int, float]:
+    if resolution in RESOLUTION_ORDER:
+        return RESOLUTION_ORDER.index(resolution), 0.0
+    return len(RESOLUTION_ORDER), float(size or 0)
+
+
+def plan_lod(
+    spz_urls: dict[str, str],
+    sizes: dict[str, int | None],
+    hints: ClientHints,
+) -> dict[str, Any] | None:
+    """{"initial": resolution, "ladder": [{"resolution", "url", "bytes"}, ...]} (smallest first)."""
+    if not spz_urls:
+        return None
+    ordered = sorted(spz_urls, key=lambda res: _rank(res, sizes.get(res)))
+    cap = hints.max_resolution()
+    if cap in ordered:
+        ordered = ordered[: ordered.index(cap) + 1]
+    ladder = [
+        {"resolution": res, "url": spz_urls[res], "bytes": sizes.get(res) or NOMINAL_BYTES.get(res)}
+        for res in ordered
+    ]
+
+    initial = ladder[-1]
+    if hints.downlink_mbps is not None:
+        initial = ladder[0]
+        for rung in ladder:
+            seconds = (rung["bytes"] or 0) * 8 / (hints.downlink_mbps * 1e6)
+            if seconds <= FIRST_RENDER_BUDGET_S:
+                initial = rung
+    return {"initial": initial["resolution"], "ladder": ladder}
+
+
+def apply_lod(
+    renderable: dict[str, Any],
+    sizes: dict[str, int | None],
+    hints: ClientHints,
+) -> dict[str, Any]:
+    """Copy of a renderable-assets dict with `lod` set and `default_spz_url` at the initial rung."""
+    lod = plan_lod(renderable.get("spz_urls") or {}, sizes, hints)
+    if lod is None:
+        return renderable
+    initial_url = next(r["url"] for r in lod["ladder"] if r["resolution"] == lod["initial"])
+    return {**renderable, "default_spz_url": initial_url, "lod": lod}
@@ -0,0 +1,81 @@
+"""Record STT message streams for offline turn-taking replay.
+
+Each voice session writes one JSONL file: a header line, then one line per
+STT `text`/`step` message, frontend interrupt and live turn fire, stamped
+with seconds since the session started. replay_turns.py feeds these back
+through services.turn_detector with a simulated clock.
+
+Enabled by setting VOICE_STT_RECORD_DIR (see config.py).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+
+class STTRecorder:
+    """Append-only JSONL log of one session's turn-taking inputs."""
+
+    def __init__(self, path: Path, params: dict | None = None, clock: Callable[[], float] = time.monotonic):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._clock = clock
+        self._t0 = clock()
+        self._file = self.path.open("w", encoding="utf-8")
+        self.events = 0
+        self._write({
+            "kind": "session",
+            "version": RECORDING_VERSION,
+            "started": time.time(),
+            "params": params or {},
+        })
+
+    @classmethod
+    def for_session(cls, directory: str | Path, params: dict | None = None) -> STTRecorder:
+        name = f"stt-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl"
+        return cls(Path(directory) / name, params=params)
+
+    def record(self, kind: str, **fields) -> None:
+        if self._file.closed:
+            return
+        self.events += 1
+        self._write({"t": round(self._clock() - self._t0, 4), "kind": kind, **fields})
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            logger.info("STT recording saved: %s (%d events)", self.path, self.events)
+
+    def _write(self, obj: dict) -> None:
+        try:
+            self._file.write(json.dumps(obj, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.warning("STT recorder write failed, disabling: %s", e)
+            self._file.close()
+
+
+def load_recording(path: str | Path) -> tuple[dict, list[dict]]:
+    """Return (header, events) from a recording, events in time order."""
+    header: dict = {}
+    events: list[dict] = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if obj.get("kind") == "session":
+                header = obj
+            else:
+                events.append(obj)
+    events.sort(key=lambda e: e.get("t", 0.0))
+    return header, events
@@ -0,0 +1,62 @@
+"""Small size-bounded LRU cache with per-entry TTL.
+
+Single-threaded (event loop) use only — no locking. Expired entries are
+dropped lazily on access and when the size bound evicts from the LRU end.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, maxsize: int, ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, maxsize)
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._live(key) is not None
+
+    def get(self, key: K) -> V | None:
+        entry = self._live(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = (self._clock() + self.ttl_s, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def ttl_remaining(self, key: K) -> float:
+        entry = self._live(key)
+        return max(0.0, entry[0] - self._clock()) if entry else 0.0
+
+    def _live(self, key: K) -> tuple[float, V] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._data[key]
+            return None
+        return entry
@@ -0,0 +1,234 @@
+"""Process-wide Gradium TTS session pool.
+
+Opening a TTS stream costs a WebSocket connect plus the setup → "ready"
+handshake, and Gradium caps concurrent sessions per API key. Instead of each
+response doing that inline (and blindly sleeping on "Concurrencylimit"), one
+pool per process:
+
+- keeps `warm` pre-handshaked streams idle and ready to hand out,
+- never has more than `max_concurrent` sessions open or connecting,
+- serves waiting responses strictly in (priority, arrival) order across all
+  voice sessions, and
+- recycles idle streams before the provider times them out.
+
+TTS streams are single-use (the server closes after end_of_stream), so
+`release()` closes the stream and the freed slot is refilled in the
+background. Created in main.py's lifespan and shared via `app.state.tts_pool`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+
+from services import metrics
+from services.gradium_service import GradiumService, GradiumTTSStream
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first.
+PRIORITY_INTERACTIVE = 0   # reply to a user turn — someone is waiting to hear it
+PRIORITY_NORMAL = 1        # greetings, welcome narration
+
+DEFAULT_ACQUIRE_TIMEOUT_S = 6.0
+_JANITOR_INTERVAL_S = 5.0
+_BACKOFF_INITIAL_S = 0.5
+_BACKOFF_MAX_S = 30.0
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+class TTSSessionPool:
+    """Shared, capacity-capped pool of warm Gradium TTS streams."""
+
+    def __init__(
+        self,
+        gradium: GradiumService,
+        max_concurrent: int = 2,
+        warm: int = 1,
+        max_idle_s: float = 45.0,
+    ):
+        self.gradium = gradium
+        self.max_concurrent = max(1, max_concurrent)
+        self.warm = max(0, min(warm, self.max_concurrent))
+        self.max_idle_s = max_idle_s
+
+        self._idle: deque[tuple[GradiumTTSStream, float]] = deque()
+        self._in_use: set[GradiumTTSStream] = set()
+        self._connecting = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._backoff_s = 0.0
+        self._retry_handle: asyncio.TimerHandle | None = None
+        self._janitor: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._stopped = False
+
+        metrics.TTS_POOL_IDLE.set_function(lambda: len(self._idle))
+        metrics.TTS_POOL_OPEN.set_function(lambda: self.open_count)
+        metrics.TTS_POOL_WAITERS.set_function(lambda: len(self._waiters))
+
+    @property
+    def open_count(self) -> int:
+        """Sessions counted against the provider cap (idle + in use + connecting)."""
+        return len(self._idle) + len(self._in_use) + self._connecting
+
+    async def start(self) -> None:
+        """Begin warming streams. Never blocks startup on the provider."""
+        self._stopped = False
+        self._janitor = asyncio.create_task(self._janitor_loop())
+        self._kick()
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._retry_handle:
+            self._retry_handle.cancel()
+        for task in [self._janitor, *self._tasks]:
+            if task:
+                task.cancel()
+        for _, _, fut in self._waiters:
+            if not fut.done():
+                fut.set_exception(ConnectionError("TTS pool stopped"))
+        self._waiters.clear()
+        while self._idle:
+            stream, _ = self._idle.popleft()
+            await self._close(stream)
+
+    async def acquire(
+        self,
+        priority: int = PRIORITY_NORMAL,
+        timeout: float = DEFAULT_ACQUIRE_TIMEOUT_S,
+    ) -> GradiumTTSStream:
+        """Get a ready-to-use TTS stream, waiting fairly for capacity.
+
+        Raises TimeoutError if none becomes available within `timeout`.
+        """
+        if self._stopped:
+            raise ConnectionError("TTS pool stopped")
+        started = time.monotonic()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), fut)
+        heapq.heappush(self._waiters, entry)
+        self._kick()
+        cold = not fut.done()  # not served straight from a warm stream
+        try:
+            stream = await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._abandon(entry)
+            raise TimeoutError(f"No TTS stream available within {timeout:.1f}s") from None
+        except asyncio.CancelledError:
+            self._abandon(entry)
+            raise
+        metrics.TTS_ACQUIRE_WAIT.observe(time.monotonic() - started)
+        if cold:
+            metrics.TTS_ACQUIRE_COLD.inc()
+        return stream
+
+    def release(self, stream: GradiumTTSStream) -> None:
+        """Return a used stream: it is closed and its slot refilled in the background."""
+        if stream not in self._in_use:
+            return
+        self._in_use.discard(stream)
+        self._spawn(self._close(stream))
+        self._kick()
+
+    # --- internals ---
+
+    def _abandon(self, entry: tuple[int, int, asyncio.Future]) -> None:
+        """Drop a waiter that gave up; if it was handed a stream meanwhile, put it back."""
+        _, _, fut = entry
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            stream = fut.result()
+            self._in_use.discard(stream)
+            self._idle.appendleft((stream, time.monotonic()))
+        self._kick()
+
+    def _kick(self) -> None:
+        """Hand idle streams to waiters, then open sessions up to the target."""
+        if self._stopped:
+            return
+        while self._waiters and self._idle:
+            stream, created_at = self._idle.popleft()
+            if not stream.is_open or time.monotonic() - created_at > self.max_idle_s:
+                metrics.TTS_RECYCLED.inc()
+                self._spawn(self._close(stream))
+                continue
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                self._idle.appendleft((stream, created_at))
+                continue
+            self._in_use.add(stream)
+            fut.set_result(stream)
+
+        if self._retry_handle is not None:
+            return  # backing off after a failed handshake
+        wanted = len(self._waiters) + self.warm - len(self._idle) - self._connecting
+        room = self.max_concurrent - self.open_count
+        for _ in range(max(0, min(wanted, room))):
+            self._connecting += 1
+            self._spawn(self._open_one())
+
+    async def _open_one(self) -> None:
+        started = time.monotonic()
+        try:
+            stream = await self.gradium.create_tts_stream()
+        except asyncio.CancelledError:
+            self._connecting -= 1
+            raise
+        except Exception as e:
+            self._connecting -= 1
+            metrics.TTS_HANDSHAKE_FAILURES.inc()
+            self._backoff_s = min(_BACKOFF_MAX_S, max(_BACKOFF_INITIAL_S, self._backoff_s * 2))
+            print(f"[{_ts()}][TTS-POOL] Handshake failed ({e}) — retrying in {self._backoff_s:.1f}s")
+            if self._retry_handle is None and not self._stopped:
+                self._retry_handle = asyncio.get_running_loop().call_later(
+                    self._backoff_s, self._retry_after_backoff
+                )
+            return
+        self._connecting -= 1
+        self._backoff_s = 0.0
+        metrics.TTS_HANDSHAKE.observe(time.monotonic() - started)
+        if self._stopped:
+            await self._close(stream)
+            return
+        self._idle.append((stream, time.monotonic()))
+        self._kick()
+
+    def _retry_after_backoff(self) -> None:
+        self._retry_handle = None
+        self._kick()
+
+    async def _janitor_loop(self) -> None:
+        """Proactively replace idle streams that are dead or about to expire."""
+        while True:
+            await asyncio.sleep(_JANITOR_INTERVAL_S)
+            now = time.monotonic()
+            fresh: deque[tuple[GradiumTTSStream, float]] = deque()
+            for stream, created_at in self._idle:
+                if stream.is_open and now - created_at <= self.max_idle_s:
+                    fresh.append((stream, created_at))
+                else:
+                    metrics.TTS_RECYCLED.inc()
+                    self._spawn(self._close(stream))
+            self._idle = fresh
+            self._kick()
+
+    async def _close(self, stream: GradiumTTSStream) -> None:
+        try:
+            await stream.close()
+        except Exception:
+            pass
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,148 @@
+"""Turn-taking detector: decides when the user has finished speaking.
+
+Pure state machine over Gradium STT messages — no I/O and an injectable
+clock — so the live pipeline (routers/voice.py) and the offline replay
+harness (replay_turns.py) run exactly the same logic.
+
+A turn fires in two stages:
+  1. VAD: a `step` message reports inactivity above `inactivity_threshold`
+     on a horizon >= `min_horizon_s` while words are buffered → turn READY.
+  2. Debounce: no new STT words for `debounce_s` (longer right after a
+     barge-in) → turn FIRED with the buffered transcript.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class TurnParams:
+    # VAD inactivity threshold — only trigger on sustained silence, not brief word pauses.
+    # We check horizons >= 2.0s only. The 1.0s horizon fires on brief inter-word gaps
+    # (e.g. 0.85 after just 500ms of pause between "the" and "world"), but the 2.0s
+    # horizon stays low (0.22) during those same gaps. This prevents premature turns.
+    inactivity_threshold: float = 0.7
+    min_horizon_s: float = 2.0
+    # After VAD says "user stopped", wait this long for STT pipeline to flush
+    # remaining words before firing the turn. Prevents split sentences.
+    debounce_s: float = 0.5
+    # After a barge-in interrupt, the user is typically still mid-sentence.
+    # STT fragments arrive in bursts (mic picks up tail of TTS + user speech).
+    # Use a longer debounce to let the full sentence arrive before firing.
+    debounce_after_interrupt_s: float = 1.5
+    # How long after an interrupt the extended debounce stays active.
+    interrupt_window_s: float = 3.0
+    # Words arriving this soon after a fire are trailing transcription of the
+    # fired turn; they are buffered but don't restart the debounce.
+    late_word_window_s: float = 1.5
+    # Don't re-arm READY this soon after a fire — prevents double-firing
+    # when late STT words arrive after the turn already launched.
+    rearm_guard_s: float = 2.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class VadReading:
+    """Result of one VAD `step` message."""
+    max_inactivity: float
+    horizons: list[tuple[float, float]]  # (horizon_s, inactivity_prob) >= min_horizon_s
+    became_ready: bool
+
+
+@dataclass(frozen=True)
+class Turn:
+    """A fired user turn. Times are on the detector's clock."""
+    text: str
+    fired_at: float
+    vad_ready_at: float
+    last_word_at: float
+    debounce_s: float
+    post_interrupt: bool
+
+
+class TurnDetector:
+    """Feed it STT `text`/`step` messages and interrupts; `poll()` returns fired turns."""
+
+    def __init__(self, params: TurnParams | None = None, clock: Callable[[], float] = time.monotonic):
+        self.params = params or TurnParams()
+        self._clock = clock
+        self.buffer = ""
+        self.turn_ready = False
+        self.vad_ready_at = 0.0
+        self._last_word_at: float | None = None
+        self._fired_at = -math.inf
+        self._interrupt_at = -math.inf
+
+    @property
+    def pending_text(self) -> str:
+        return self.buffer.strip()
+
+    def on_text(self, text: str) -> bool:
+        """Buffer a transcript fragment. Returns True if it was a late (trailing) word."""
+        now = self._clock()
+        self.buffer += " " + text
+        late = now - self._fired_at <= self.params.late_word_window_s
+        if not late:
+            self._last_word_at = now
+        return late
+
+    def on_step(self, vad: list) -> VadReading:
+        """Process a VAD step (list of {horizon_s, inactivity_prob})."""
+        now = self._clock()
+        max_inactivity = 0.0
+        horizons: list[tuple[float, float]] = []
+        for entry in vad:
+            if isinstance(entry, dict):
+                h = entry.get("horizon_s", 0)
+                p = entry.get("inactivity_prob", 0)
+                if h >= self.params.min_horizon_s:
+                    horizons.append((h, p))
+                    max_inactivity = max(max_inactivity, p)
+
+        became_ready = False
+        if max_inactivity > self.params.inactivity_threshold and self.pending_text:
+            if not self.turn_ready and now - self._fired_at > self.params.rearm_guard_s:
+                self.turn_ready = True
+                self.vad_ready_at = now
+                became_ready = True
+        return VadReading(max_inactivity, horizons, became_ready)
+
+    def on_interrupt(self) -> None:
+        """Frontend barge-in: the next turn uses the longer debounce."""
+        self._interrupt_at = self._clock()
+
+    def current_debounce(self) -> tuple[float, bool]:
+        """(debounce seconds, whether the post-interrupt debounce applies)."""
+        post_interrupt = self._clock() - self._interrupt_at < self.params.interrupt_window_s
+        if post_interrupt:
+            return self.params.debounce_after_interrupt_s, True
+        return self.params.debounce_s, False
+
+    def poll(self) -> Turn | None:
+        """Fire the turn if VAD said READY and STT has settled. Call after every message."""
+        now = self._clock()
+        debounce, post_interrupt = self.current_debounce()
+        if not (self.turn_ready
+                and self.pending_text
+                and self._last_word_at is not None
+                and now - self._last_word_at > debounce):
+            return None
+        turn = Turn(
+            text=self.pending_text,
+            fired_at=now,
+            vad_ready_at=self.vad_ready_at,
+            last_word_at=self._last_word_at,
+            debounce_s=debounce,
+            post_interrupt=post_interrupt,
+        )
+        self.buffer = ""
+        self.turn_ready = False
+        self._last_word_at = None
+        self._fired_at = now
+        return turn
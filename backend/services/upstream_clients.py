@@ -0,0 +1,149 @@
+"""Process-wide upstream clients shared by every request and voice session.
+
+Built once in main.py's lifespan and exposed as `app.state.upstreams`:
+
+- one pooled, keep-alive `httpx.AsyncClient` per HTTP upstream (World Labs
+  API, World Labs asset CDN, Deezer), using HTTP/2 when the `h2` package is installed so concurrent
+  polls multiplex over one TLS connection,
+- one `genai.Client` (it keeps its own connection pool),
+- one `GradiumService` (stateless; streams are per-use WebSockets).
+
+Services still accept no client and fall back to a throwaway one, so tests
+and scripts can construct them directly.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass
+
+import httpx
+from google import genai
+
+from services import metrics
+from services.deezer_service import DeezerService
+from services.gradium_service import GradiumService
+from services.world_labs import WorldLabsService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry_s: float = 30.0
+    http2: bool = True
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class PooledHTTPClient:
+    """A shared httpx.AsyncClient plus request/connection stats for /metrics."""
+
+    def __init__(self, name: str, pool: PoolConfig, timeout: float):
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        use_http2 = pool.http2 and http2_available()
+        if pool.http2 and not use_http2:
+            logger.info("%s: h2 not installed, using HTTP/1.1 keep-alive", name)
+        self.http2 = use_http2
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=use_http2,
+            limits=httpx.Limits(
+                max_connections=pool.max_connections,
+                max_keepalive_connections=pool.max_keepalive,
+                keepalive_expiry=pool.keepalive_expiry_s,
+            ),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+        self._latency = metrics.REGISTRY.histogram(
+            f"upstream_{name}_request_seconds", f"{name} HTTP request latency (shared pool)",
+        )
+        metrics.REGISTRY.gauge(
+            f"upstream_{name}_connections", f"{name} pooled connections open",
+        ).set_function(lambda: self.pool_stats()["connections"])
+        metrics.REGISTRY.gauge(
+            f"upstream_{name}_connections_idle", f"{name} pooled connections idle (reusable)",
+        ).set_function(lambda: self.pool_stats()["idle"])
+        self._requests_total = metrics.REGISTRY.counter(
+            f"upstream_{name}_requests_total", f"{name} HTTP requests sent through the shared pool",
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        self._requests_total.inc()
+        request.extensions["started_at"] = time.monotonic()
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        started = response.request.extensions.get("started_at")
+        if started is not None:
+            self._latency.observe(time.monotonic() - started)
+        if response.status_code >= 500:
+            self.errors += 1
+
+    def pool_stats(self) -> dict:
+        """Connection counts from httpcore's pool (best effort — private API)."""
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = 0
+        for conn in connections:
+            try:
+                idle += bool(conn.is_idle())
+            except Exception:
+                pass
+        return {
+            "http2": self.http2,
+            "connections": len(connections),
+            "idle": idle,
+            "requests": self.requests,
+            "errors_5xx": self.errors,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class UpstreamClients:
+    """Everything a router needs to talk to upstream providers."""
+
+    def __init__(
+        self,
+        *,
+        gradium_api_key: str,
+        gemini_api_key: str,
+        world_labs_api_key: str,
+        pool: PoolConfig | None = None,
+    ):
+        pool = pool or PoolConfig()
+        self.world_labs_http = PooledHTTPClient("world_labs", pool, timeout=30)
+        self.deezer_http = PooledHTTPClient("deezer", pool, timeout=10)
+        self.world_assets_http = PooledHTTPClient("world_assets", pool, timeout=120)
+        self.genai = genai.Client(api_key=gemini_api_key)
+        self.gradium = GradiumService(api_key=gradium_api_key)
+        self.world_labs = WorldLabsService(
+            api_key=world_labs_api_key,
+            client=self.world_labs_http.client,
+            assets_client=self.world_assets_http.client,
+        )
+        self.deezer = DeezerService(client=self.deezer_http.client)
+
+    def pool_stats(self) -> dict:
+        return {
+            "world_labs": self.world_labs_http.pool_stats(),
+            "deezer": self.deezer_http.pool_stats(),
+            "world_assets": self.world_assets_http.pool_stats(),
+        }
+
+    async def aclose(self) -> None:
+        for http in (self.world_labs_http, self.deezer_http, self.world_assets_http):
+            try:
+                await http.aclose()
+            except Exception as e:
+                logger.warning("Closing %s client failed: %s", http.name, e)
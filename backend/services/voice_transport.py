@@ -0,0 +1,505 @@
+"""Framing layer for the /ws/voice WebSocket.
+
+Two wire formats are supported, negotiated per connection:
+
+  json    (legacy) — every message is a JSON text frame; PCM audio travels
+          base64-encoded inside {"type": "audio", "data": "..."}.
+  binary  — control messages stay JSON text frames, but PCM audio travels
+          as binary WebSocket frames prefixed with a small fixed header.
+
+The client opts in with ``/ws/voice?framing=binary``. The server always
+answers with a ``session_config`` message naming the framing it will use,
+and the client must not send binary audio until it has seen that ack — so
+an old server (which ignores the query param) keeps working too.
+
+Binary frame layout (little-endian, 8-byte header + raw PCM):
+
+  offset 0  u8   stream     1 = mic audio (FE→BE), 2 = TTS audio (BE→FE)
+  offset 1  u8   version    FRAME_VERSION
+  offset 2  u16  seq        per-stream sequence number (wraps at 65536)
+  offset 4  u32  response   numeric responseId ("resp-<n>"); 0 for mic audio
+  offset 8  ...  PCM bytes
+
+Outbound messages go through a per-session writer task (VoiceTransport);
+inbound mic audio goes through a separate bounded lane (InboundAudioLane)
+so the receive loop never waits on the upstream STT socket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from services import metrics
+
+FRAMING_JSON = "json"
+FRAMING_BINARY = "binary"
+
+FRAME_VERSION = 1
+STREAM_MIC_AUDIO = 1
+STREAM_TTS_AUDIO = 2
+
+_HEADER = struct.Struct("<BBHI")
+HEADER_SIZE = _HEADER.size
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+def encode_audio_frame(stream: int, seq: int, response_num: int, pcm: bytes) -> bytes:
+    """Prefix raw PCM with the binary frame header."""
+    return _HEADER.pack(stream, FRAME_VERSION, seq & 0xFFFF, response_num & 0xFFFFFFFF) + pcm
+
+
+def decode_audio_frame(frame: bytes) -> tuple[int, int, int, bytes]:
+    """Split a binary frame into (stream, seq, response_num, pcm).
+
+    Raises ValueError on truncated frames or an unknown header version.
+    """
+    if len(frame) < HEADER_SIZE:
+        raise ValueError(f"binary frame too short: {len(frame)} bytes")
+    stream, version, seq, response_num = _HEADER.unpack_from(frame)
+    if version != FRAME_VERSION:
+        raise ValueError(f"unsupported binary frame version: {version}")
+    return stream, seq, response_num, frame[HEADER_SIZE:]
+
+
+def response_num(response_id: str) -> int:
+    """Numeric part of a "resp-<n>" responseId (0 if it has none)."""
+    _, _, tail = response_id.rpartition("-")
+    return int(tail) if tail.isdigit() else 0
+
+
+def json_audio_size(pcm_len: int, extra_fields: int = 0) -> int:
+    """Bytes a PCM chunk would take as a legacy base64 JSON audio message."""
+    b64_len = 4 * ((pcm_len + 2) // 3)
+    # {"type": "audio", "data": "..."} plus optional "responseId" field
+    return b64_len + 30 + extra_fields
+
+
+@dataclass
+class FramingStats:
+    """Per-session byte and CPU accounting for the voice socket."""
+
+    audio_in_frames: int = 0
+    audio_in_bytes: int = 0          # bytes actually received on the wire
+    audio_in_json_bytes: int = 0     # what the same audio costs in JSON mode
+    audio_out_frames: int = 0
+    audio_out_bytes: int = 0
+    audio_out_json_bytes: int = 0
+    text_out_frames: int = 0
+    text_out_bytes: int = 0
+    codec_s: float = 0.0             # time spent encoding/decoding frames
+
+    def summary(self) -> str:
+        wire = self.audio_in_bytes + self.audio_out_bytes
+        legacy = self.audio_in_json_bytes + self.audio_out_json_bytes
+        saved = legacy - wire
+        pct = (saved / legacy * 100) if legacy else 0.0
+        return (
+            f"audio in={self.audio_in_frames} frames/{self.audio_in_bytes}B, "
+            f"audio out={self.audio_out_frames} frames/{self.audio_out_bytes}B, "
+            f"text out={self.text_out_frames} frames/{self.text_out_bytes}B, "
+            f"saved vs json={saved}B ({pct:.1f}%), codec cpu={self.codec_s * 1000:.1f}ms"
+        )
+
+
+# Outbound lanes, drained in this order by the writer task. Control messages
+# jump ahead of everything so barge-in never waits behind queued audio.
+LANE_CONTROL = 0
+LANE_TEXT = 1
+LANE_AUDIO = 2
+
+CONTROL_MESSAGE_TYPES = frozenset({
+    "session_config", "interrupt", "response_start", "world_status", "request_frame",
+})
+# Per-lane bounds. Control is unbounded (tiny, and must never block);
+# ~250 audio chunks is 20s of 80ms TTS audio.
+TEXT_LANE_MAX = 512
+AUDIO_LANE_MAX = 250
+
+
+@dataclass
+class _Outbound:
+    lane: int
+    msg: dict | None            # JSON message (None for audio)
+    pcm: bytes | None           # TTS PCM (None for JSON)
+    response_id: str | None
+    enqueued_at: float
+    on_sent: Callable[[], None] | None = None
+
+
+@dataclass
+class QueueStats:
+    """Outbound writer counters, exposed for logging and metrics."""
+
+    enqueued: int = 0
+    written: int = 0
+    dropped_stale: int = 0      # superseded responseId, dropped before write
+    dropped_closed: int = 0     # enqueued after the socket closed
+    max_depth: int = 0
+    max_wait_s: float = 0.0     # longest time an item sat in the queue
+
+    def summary(self) -> str:
+        return (
+            f"enqueued={self.enqueued} written={self.written} "
+            f"dropped_stale={self.dropped_stale} dropped_closed={self.dropped_closed} "
+            f"max_depth={self.max_depth} max_wait={self.max_wait_s * 1000:.0f}ms"
+        )
+
+
+class VoiceTransport:
+    """Per-session send/receive wrapper around the frontend WebSocket.
+
+    Owns the `closed` flag (no sends after the socket dies), the negotiated
+    framing mode, and the byte counters used to compare the two modes.
+
+    Sends never touch the socket directly: `send_json` / `send_audio` enqueue
+    into bounded per-priority lanes and a single writer task drains them.
+    A slow client therefore only back-pressures the TTS forwarder (audio lane
+    full), never Gemini streaming or control messages. Items tagged with a
+    responseId that has since been superseded are dropped before writing.
+    """
+
+    def __init__(self, ws: WebSocket, framing: str = FRAMING_JSON):
+        self.ws = ws
+        self.framing = FRAMING_BINARY if framing == FRAMING_BINARY else FRAMING_JSON
+        self.closed = asyncio.Event()
+        self.stats = FramingStats()
+        self.queue_stats = QueueStats()
+        self._audio_seq = 0
+        self._lanes: tuple[deque[_Outbound], ...] = (deque(), deque(), deque())
+        self._lane_max = (0, TEXT_LANE_MAX, AUDIO_LANE_MAX)
+        self._cond = asyncio.Condition()
+        self._active_response_id: str | None = None
+        self._writer_task: asyncio.Task | None = None
+
+    @property
+    def binary(self) -> bool:
+        return self.framing == FRAMING_BINARY
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+
+    def start(self) -> None:
+        """Start the outbound writer task."""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
+
+    async def close(self, flush_timeout: float = 0.0) -> None:
+        """Stop the writer, optionally letting queued messages drain first."""
+        if flush_timeout > 0 and not self.closed.is_set():
+            try:
+                await asyncio.wait_for(self._wait_drained(), timeout=flush_timeout)
+            except asyncio.TimeoutError:
+                pass
+        await self._mark_closed()
+        if self._writer_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _mark_closed(self) -> None:
+        """Set `closed` and wake every producer and waiter blocked on `_cond`."""
+        self.closed.set()
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def send_session_config(self) -> None:
+        """Acknowledge the negotiated framing — always the first message sent."""
+        await self.send_json({
+            "type": "session_config",
+            "framing": self.framing,
+            "frameVersion": FRAME_VERSION,
+        })
+
+    async def send_json(self, msg: dict) -> None:
+        """Queue a JSON message for the frontend, unless closed."""
+        msg_type = msg.get("type")
+        lane = LANE_CONTROL if msg_type in CONTROL_MESSAGE_TYPES else LANE_TEXT
+        if msg_type == "response_start":
+            await self._supersede(msg.get("responseId"))
+        elif msg_type == "interrupt":
+            await self._supersede(None)
+        await self._enqueue(_Outbound(lane, msg, None, msg.get("responseId"), time.monotonic()))
+
+    async def send_audio(
+        self, pcm: bytes, response_id: str, on_sent: Callable[[], None] | None = None,
+    ) -> None:
+        """Queue a TTS PCM chunk; framing is applied by the writer.
+
+        `on_sent` (if given) runs right after the chunk is written to the socket.
+        """
+        await self._enqueue(_Outbound(LANE_AUDIO, None, pcm, response_id, time.monotonic(), on_sent))
+
+    async def cancel_audio(self) -> None:
+        """Drop all queued response output (e.g. on a frontend barge-in)."""
+        await self._supersede(None)
+
+    # --- queue internals ---
+
+    def _is_stale(self, item: _Outbound) -> bool:
+        return item.response_id is not None and item.response_id != self._active_response_id
+
+    async def _supersede(self, response_id: str | None) -> None:
+        """Mark `response_id` as the only live response and purge the rest."""
+        async with self._cond:
+            self._active_response_id = response_id
+            for lane in (self._lanes[LANE_TEXT], self._lanes[LANE_AUDIO]):
+                before = len(lane)
+                live = [item for item in lane if not self._is_stale(item)]
+                if len(live) != before:
+                    lane.clear()
+                    lane.extend(live)
+                    self.queue_stats.dropped_stale += before - len(live)
+            self._cond.notify_all()
+
+    async def _enqueue(self, item: _Outbound) -> None:
+        if self.closed.is_set():
+            self.queue_stats.dropped_closed += 1
+            if item.msg is not None:
+                print(f"[{_ts()}][WS→FE] BLOCKED (ws closed): {item.msg.get('type')}")
+            return
+        lane = self._lanes[item.lane]
+        limit = self._lane_max[item.lane]
+        async with self._cond:
+            while limit and len(lane) >= limit and not self.closed.is_set():
+                await self._cond.wait()
+            if self.closed.is_set():
+                self.queue_stats.dropped_closed += 1
+                return
+            lane.append(item)
+            self.queue_stats.enqueued += 1
+            self.queue_stats.max_depth = max(self.queue_stats.max_depth, self.queue_depth)
+            self._cond.notify_all()
+
+    async def _wait_drained(self) -> None:
+        async with self._cond:
+            while self.queue_depth and not self.closed.is_set():
+                await self._cond.wait()
+
+    async def _writer(self) -> None:
+        while True:
+            async with self._cond:
+                while not self.queue_depth and not self.closed.is_set():
+                    await self._cond.wait()
+                if self.closed.is_set():
+                    return
+                lane = next(lane for lane in self._lanes if lane)
+                item = lane.popleft()
+                self._cond.notify_all()  # wake producers waiting for space
+            if self._is_stale(item):
+                self.queue_stats.dropped_stale += 1
+                continue
+            self.queue_stats.max_wait_s = max(
+                self.queue_stats.max_wait_s, time.monotonic() - item.enqueued_at
+            )
+            if item.pcm is not None:
+                await self._write_audio(item.pcm, item.response_id or "")
+            else:
+                await self._write_json(item.msg or {})
+            self.queue_stats.written += 1
+            if item.on_sent and not self.closed.is_set():
+                item.on_sent()
+
+    async def _write_json(self, msg: dict) -> None:
+        try:
+            raw = json.dumps(msg)
+            await self.ws.send_text(raw)
+            self.stats.text_out_frames += 1
+            self.stats.text_out_bytes += len(raw)
+            print(f"[{_ts()}][WS→FE] {raw if len(raw) <= 500 else raw[:500] + '...'}")
+        except Exception as e:
+            print(f"[{_ts()}][WS→FE] SEND ERROR: {e}")
+            await self._mark_closed()
+
+    async def _write_audio(self, pcm: bytes, response_id: str) -> None:
+        start = time.perf_counter()
+        seq = self._audio_seq
+        self._audio_seq = (self._audio_seq + 1) & 0xFFFF
+        json_size = json_audio_size(len(pcm), extra_fields=len(response_id) + 16)
+        try:
+            if self.binary:
+                frame = encode_audio_frame(STREAM_TTS_AUDIO, seq, response_num(response_id), pcm)
+                self.stats.codec_s += time.perf_counter() - start
+                await self.ws.send_bytes(frame)
+                wire = len(frame)
+            else:
+                raw = json.dumps({
+                    "type": "audio",
+                    "data": base64.b64encode(pcm).decode("ascii"),
+                    "responseId": response_id,
+                })
+                self.stats.codec_s += time.perf_counter() - start
+                await self.ws.send_text(raw)
+                wire = len(raw)
+            self.stats.audio_out_frames += 1
+            self.stats.audio_out_bytes += wire
+            self.stats.audio_out_json_bytes += json_size
+        except Exception as e:
+            print(f"[{_ts()}][WS→FE] AUDIO SEND ERROR: {e}")
+            await self._mark_closed()
+
+    async def receive(self) -> tuple[str, dict | bytes]:
+        """Receive the next client message.
+
+        Returns ("audio", pcm_bytes) for mic audio in either framing, or
+        ("json", msg) for every other message. Raises WebSocketDisconnect
+        when the client goes away.
+        """
+        while True:
+            message = await self.ws.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            data = message.get("bytes")
+            if data is not None:
+                start = time.perf_counter()
+                try:
+                    stream, _seq, _resp, pcm = decode_audio_frame(data)
+                except ValueError as e:
+                    print(f"[{_ts()}][FE→BE] Bad binary frame: {e}")
+                    continue
+                self.stats.codec_s += time.perf_counter() - start
+                if stream != STREAM_MIC_AUDIO:
+                    print(f"[{_ts()}][FE→BE] Unexpected binary stream type {stream}")
+                    continue
+                self.stats.audio_in_frames += 1
+                self.stats.audio_in_bytes += len(data)
+                self.stats.audio_in_json_bytes += json_audio_size(len(pcm))
+                return "audio", pcm
+
+            raw = message.get("text")
+            if raw is None:
+                continue
+            start = time.perf_counter()
+            msg = json.loads(raw)
+            if msg.get("type") == "audio":
+                pcm = base64.b64decode(msg["data"])
+                self.stats.codec_s += time.perf_counter() - start
+                self.stats.audio_in_frames += 1
+                self.stats.audio_in_bytes += len(raw)
+                self.stats.audio_in_json_bytes += len(raw)
+                return "audio", pcm
+            return "json", msg
+
+
+# Inbound mic audio lane bound: 50 × 80ms chunks = 4s of audio buffered
+# towards STT before the overflow policy kicks in.
+AUDIO_IN_LANE_MAX = 50
+
+
+@dataclass
+class LaneStats:
+    """Inbound audio lane counters (FE → STT)."""
+
+    received: int = 0
+    forwarded: int = 0
+    dropped_overflow: int = 0   # oldest chunks discarded because the lane was full
+    dropped_closed: int = 0     # chunks arriving after the STT sender stopped
+    max_depth: int = 0
+    last_lag_s: float = 0.0     # enqueue → handed to STT, most recent chunk
+    max_lag_s: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"received={self.received} forwarded={self.forwarded} "
+            f"dropped_overflow={self.dropped_overflow} dropped_closed={self.dropped_closed} "
+            f"max_depth={self.max_depth} max_lag={self.max_lag_s * 1000:.0f}ms"
+        )
+
+
+class InboundAudioLane:
+    """Bounded FE→STT audio lane drained by a dedicated sender task.
+
+    The /ws/voice receive loop only calls `put()`, which never blocks, so
+    control messages (interrupt, frame, context) are handled immediately even
+    when the upstream STT socket back-pressures.
+
+    Overflow policy is drop-oldest: under sustained STT stalls we keep the
+    most recent speech (what a barge-in or new turn depends on) and discard
+    audio that would be transcribed seconds late anyway.
+    """
+
+    def __init__(self, send: Callable[[bytes], Awaitable[None]], maxsize: int = AUDIO_IN_LANE_MAX):
+        self._send = send
+        self._maxsize = maxsize
+        self._chunks: deque[tuple[bytes, float]] = deque()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopped = False
+        self.stats = LaneStats()
+
+    @property
+    def depth(self) -> int:
+        return len(self._chunks)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sender())
+
+    def put(self, pcm: bytes) -> None:
+        """Queue a mic chunk for STT without waiting."""
+        self.stats.received += 1
+        if self._stopped:
+            self.stats.dropped_closed += 1
+            return
+        if len(self._chunks) >= self._maxsize:
+            self._chunks.popleft()
+            self.stats.dropped_overflow += 1
+            metrics.INBOUND_AUDIO_DROPPED.inc()
+            metrics.INBOUND_AUDIO_DEPTH.dec()
+            if self.stats.dropped_overflow <= 3 or self.stats.dropped_overflow % 50 == 0:
+                print(f"[{_ts()}][FE→STT] Audio lane full — dropped oldest chunk "
+                      f"({self.stats.dropped_overflow} total)")
+        self._chunks.append((pcm, time.monotonic()))
+        metrics.INBOUND_AUDIO_DEPTH.inc()
+        self.stats.max_depth = max(self.stats.max_depth, len(self._chunks))
+        self._ready.set()
+
+    async def close(self) -> None:
+        self._stopped = True
+        self._drop_queued()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _sender(self) -> None:
+        while True:
+            if not self._chunks:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            pcm, enqueued_at = self._chunks.popleft()
+            metrics.INBOUND_AUDIO_DEPTH.dec()
+            lag = time.monotonic() - enqueued_at
+            self.stats.last_lag_s = lag
+            self.stats.max_lag_s = max(self.stats.max_lag_s, lag)
+            metrics.INBOUND_AUDIO_LAG.observe(lag)
+            try:
+                await self._send(pcm)
+            except Exception as e:
+                print(f"[{_ts()}][FE→STT] STT send failed, stopping audio lane: {e}")
+                self._stopped = True
+                self._drop_queued()
+                return
+            self.stats.forwarded += 1
+
+    def _drop_queued(self) -> None:
+        metrics.INBOUND_AUDIO_DEPTH.dec(len(self._chunks))
+        self._chunks.clear()
@@ -0,0 +1,200 @@
+"""Persistent catalog of generated worlds, keyed by normalized request content.
+
+A Marble generation takes minutes, but the same destination is requested
+over and over. Each generation is recorded (SQLite, stdlib only) under a
+content key derived from the normalized scene description, location, time
+period and model, so an equivalent request can:
+
+- reuse the finished world_id instantly, or
+- attach to the operation already generating it.
+
+Asset URLs are NOT stored: World Labs signs them, so reused worlds re-fetch
+/worlds/{id} (one fast GET, cached by OperationRegistry) instead.
+
+Ready rows with a lat/lng are mirrored into an in-memory GeoTemporalIndex
+(`catalog.index`) for "nearest existing world" lookups.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from services.world_index import GeoTemporalIndex, NearbyWorld
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = "v1"
+STATUS_GENERATING = "generating"
+STATUS_READY = "ready"
+
+# Words that vary between otherwise identical Gemini scene descriptions.
+_STOPWORDS = frozenset(
+    "a an the and or of in on at to with by for from as is are was were be its it this that".split()
+)
+_NON_WORD = re.compile(r"[^\w\s-]+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS worlds (
+    key TEXT PRIMARY KEY,
+    operation_id TEXT NOT NULL,
+    world_id TEXT,
+    status TEXT NOT NULL,
+    model TEXT,
+    location TEXT,
+    time_period TEXT,
+    lat REAL,
+    lng REAL,
+    year REAL,
+    display_name TEXT,
+    scene_description TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS worlds_operation_id ON worlds(operation_id);
+"""
+
+
+def normalize_text(text: str | None) -> str:
+    """Lowercase, strip punctuation and filler words, collapse whitespace."""
+    words = _NON_WORD.sub(" ", (text or "").lower()).split()
+    return " ".join(w for w in words if w not in _STOPWORDS)
+
+
+def world_key(
+    scene_description: str,
+    *,
+    location: str | None = None,
+    time_period: str | None = None,
+    model: str = "",
+) -> str:
+    """Content key for a generation request (stable across wording/case noise)."""
+    parts = [
+        KEY_VERSION,
+        model.strip().lower(),
+        normalize_text(location),
+        normalize_text(time_period),
+        normalize_text(scene_description),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def to_float(value) -> float | None:
+    """Lenient float parse for context values ("", "-44", "1920", None)."""
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    key: str
+    operation_id: str
+    world_id: str | None
+    status: str
+    model: str | None
+    location: str | None
+    time_period: str | None
+    lat: float | None
+    lng: float | None
+    year: float | None
+    display_name: str | None
+    scene_description: str | None
+    created_at: float
+    updated_at: float
+
+
+class WorldCatalog:
+    """SQLite-backed key → world mapping. Calls are synchronous and sub-millisecond."""
+
+    def __init__(self, path: str | Path = ":memory:"):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self.index = GeoTemporalIndex(self.ready_entries())
+
+    def lookup(self, key: str) -> CatalogEntry | None:
+        row = self._db.execute("SELECT * FROM worlds WHERE key = ?", (key,)).fetchone()
+        return CatalogEntry(**dict(row)) if row else None
+
+    def by_operation(self, operation_id: str) -> CatalogEntry | None:
+        row = self._db.execute(
+            "SELECT * FROM worlds WHERE operation_id = ?", (operation_id,)
+        ).fetchone()
+        return CatalogEntry(**dict(row)) if row else None
+
+    def ready_entries(self) -> list[CatalogEntry]:
+        rows = self._db.execute("SELECT * FROM worlds WHERE status = ?", (STATUS_READY,)).fetchall()
+        return [CatalogEntry(**dict(r)) for r in rows]
+
+    def record_started(
+        self,
+        key: str,
+        operation_id: str,
+        *,
+        model: str | None = None,
+        location: str | None = None,
+        time_period: str | None = None,
+        lat: float | None = None,
+        lng: float | None = None,
+        year: float | None = None,
+        display_name: str | None = None,
+        scene_description: str | None = None,
+    ) -> None:
+        """Record a new in-flight generation (replaces any stale row for the key)."""
+        self.index.remove(key)
+        now = time.time()
+        self._db.execute(
+            """INSERT OR REPLACE INTO worlds
+               (key, operation_id, world_id, status, model, location, time_period,
+                lat, lng, year, display_name, scene_description, created_at, updated_at)
+               VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (key, operation_id, STATUS_GENERATING, model, location, time_period,
+             lat, lng, year, display_name, scene_description, now, now),
+        )
+        self._db.commit()
+
+    def mark_ready(self, operation_id: str, world_id: str) -> CatalogEntry | None:
+        self._db.execute(
+            "UPDATE worlds SET status = ?, world_id = ?, updated_at = ? WHERE operation_id = ?",
+            (STATUS_READY, world_id, time.time(), operation_id),
+        )
+        self._db.commit()
+        entry = self.by_operation(operation_id)
+        if entry is not None:
+            self.index.add(entry)
+        return entry
+
+    def mark_failed(self, operation_id: str) -> None:
+        """Forget a failed generation so the next request starts a fresh one."""
+        entry = self.by_operation(operation_id)
+        if entry is not None:
+            self.index.remove(entry.key)
+        self._db.execute("DELETE FROM worlds WHERE operation_id = ?", (operation_id,))
+        self._db.commit()
+
+    def nearby(
+        self,
+        lat: float,
+        lng: float,
+        *,
+        year: float | None = None,
+        radius_km: float = 50.0,
+        years: float = 50.0,
+        limit: int = 5,
+    ) -> list[NearbyWorld]:
+        """Ready worlds near (lat, lng[, year]), closest first — served from the index."""
+        return self.index.nearest(lat, lng, year=year, radius_km=radius_km, years=years, limit=limit)
+
+    def close(self) -> None:
+        self._db.close()
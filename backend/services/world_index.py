@@ -0,0 +1,146 @@
+"""In-memory geo-temporal index over finished worlds.
+
+Answers "closest ready world within N km and M years of (lat, lng, year)"
+without touching SQLite. Worlds are bucketed into a fixed lat/lng grid; each
+cell keeps its worlds sorted by year, so a query scans only the cells that
+intersect the search radius and bisects straight to the year window.
+
+Built from WorldCatalog.ready_entries() at startup and kept current by the
+catalog as generations finish or are forgotten.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from services.world_catalog import CatalogEntry
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+# ~55 km cells: the usual 25–200 km query touches a handful of cells.
+DEFAULT_CELL_DEG = 0.5
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass(frozen=True)
+class NearbyWorld:
+    entry: CatalogEntry
+    distance_km: float
+    year_delta: float | None
+
+
+class GeoTemporalIndex:
+    """Grid-bucketed spatial index with a per-cell sorted year index."""
+
+    def __init__(self, entries: Iterable[CatalogEntry] = (), cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._rows = math.ceil(180 / cell_deg)
+        self._cols = math.ceil(360 / cell_deg)
+        # cell → sorted [(year or -inf, key)], key → entry
+        self._cells: dict[tuple[int, int], list[tuple[float, str]]] = {}
+        self._entries: dict[str, CatalogEntry] = {}
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: CatalogEntry) -> None:
+        """Index a ready world (replacing any previous entry with the same key)."""
+        self.remove(entry.key)
+        if entry.lat is None or entry.lng is None or not entry.world_id:
+            return
+        self._entries[entry.key] = entry
+        bisect.insort(self._cells.setdefault(self._cell(entry.lat, entry.lng), []), self._item(entry))
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        cell = self._cell(entry.lat, entry.lng)
+        items = self._cells.get(cell, [])
+        item = self._item(entry)
+        i = bisect.bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+        if not items:
+            self._cells.pop(cell, None)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        *,
+        year: float | None = None,
+        radius_km: float = 50.0,
+        years: float = 50.0,
+        limit: int = 5,
+    ) -> list[NearbyWorld]:
+        """Worlds within `radius_km` (and `years` of `year`, if given), closest first.
+
+        With a `year`, worlds that have no year are excluded; ties on distance
+        are broken by the smaller year gap.
+        """
+        found: list[NearbyWorld] = []
+        for cell in self._cells_within(lat, lng, radius_km):
+            items = self._cells.get(cell)
+            if not items:
+                continue
+            if year is None:
+                window = items
+            else:
+                lo = bisect.bisect_left(items, (year - years, ""))
+                hi = bisect.bisect_right(items, (year + years, "\uffff"))
+                window = items[lo:hi]
+            for _, key in window:
+                entry = self._entries[key]
+                distance = haversine_km(lat, lng, entry.lat, entry.lng)
+                if distance > radius_km:
+                    continue
+                delta = abs(entry.year - year) if year is not None and entry.year is not None else None
+                found.append(NearbyWorld(entry, distance, delta))
+        found.sort(key=lambda n: (n.distance_km, n.year_delta or 0.0))
+        return found[:limit]
+
+    @staticmethod
+    def _item(entry: CatalogEntry) -> tuple[float, str]:
+        return (entry.year if entry.year is not None else -math.inf, entry.key)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        row = min(self._rows - 1, max(0, int((lat + 90) // self.cell_deg)))
+        col = int(((lng + 180) % 360) // self.cell_deg) % self._cols
+        return row, col
+
+    def _cells_within(self, lat: float, lng: float, radius_km: float) -> Iterable[tuple[int, int]]:
+        """Grid cells overlapping the radius's bounding box (wrapping the antimeridian)."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        row_lo, _ = self._cell(max(-90.0, lat - dlat), lng)
+        row_hi, _ = self._cell(min(90.0, lat + dlat), lng)
+        # Longitude degrees shrink toward the poles; near them, scan every column.
+        widest = max(abs(lat) + dlat, 0.0)
+        cos_lat = math.cos(math.radians(min(widest, 90.0)))
+        if cos_lat < 1e-6 or radius_km / (KM_PER_DEG_LAT * cos_lat) >= 180:
+            cols: range | set[int] = range(self._cols)
+        else:
+            dlng = radius_km / (KM_PER_DEG_LAT * cos_lat)
+            _, col_lo = self._cell(lat, lng - dlng)
+            span = math.ceil(2 * dlng / self.cell_deg) + 1
+            cols = {(col_lo + i) % self._cols for i in range(min(span, self._cols))}
+        if (row_hi - row_lo + 1) * len(cols) > len(self._cells):
+            # Sparse index / huge radius: the occupied cells are the shorter list.
+            yield from list(self._cells)
+            return
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                yield row, col
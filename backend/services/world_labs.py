@@ -7,7 +7,8 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 import httpx
 
@@ -21,13 +22,39 @@ MAX_POLL_ATTEMPTS = 120  # 10 minutes max
 class WorldLabsService:
     """Client for World Labs Marble API."""
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        client: httpx.AsyncClient | None = None,
+        assets_client: httpx.AsyncClient | None = None,
+    ):
         self.api_key = api_key
+        self._client = client
+        # CDN asset requests (size probes) go through the world_assets pool.
+        self._assets_client = assets_client
         self._headers = {
             "WLT-Api-Key": api_key,
             "Content-Type": "application/json",
         }
 
+    @asynccontextmanager
+    async def _http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """The shared keep-alive client if one was injected, else a one-off client."""
+        if self._client is not None:
+            yield self._client
+            return
+        async with httpx.AsyncClient(timeout=30) as client:
+            yield client
+
+    @asynccontextmanager
+    async def _assets_http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """The shared CDN client if one was injected, else the API client."""
+        if self._assets_client is not None:
+            yield self._assets_client
+            return
+        async with self._http() as client:
+            yield client
+
     async def generate_world(
         self,
         scene_description: str,
@@ -35,7 +62,7 @@ class WorldLabsService:
         model: str = "Marble 0.1-mini",
     ) -> str:
         """Start world generation. Returns operation_id for polling."""
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with self._http() as client:
             response = await client.post(
                 f"{BASE_URL}/worlds:generate",
                 headers=self._headers,
@@ -56,7 +83,7 @@ class WorldLabsService:
 
     async def poll_status(self, operation_id: str) -> dict:
         """Poll until generation is done. Returns the world result dict."""
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with self._http() as client:
             for attempt in range(MAX_POLL_ATTEMPTS):
                 data = await self.fetch_operation(operation_id, client=client)
 
@@ -96,7 +123,7 @@ class WorldLabsService:
             response.raise_for_status()
             return response.json()
 
-        async with httpx.AsyncClient(timeout=30) as new_client:
+        async with self._http() as new_client:
             response = await new_client.get(
                 f"{BASE_URL}/operations/{operation_id}",
                 headers=self._headers,
@@ -106,7 +133,7 @@ class WorldLabsService:
 
     async def get_world_assets(self, world_id: str) -> dict:
         """Fetch world details including asset URLs."""
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{BASE_URL}/worlds/{world_id}",
                 headers=self._headers,
@@ -114,6 +141,28 @@ class WorldLabsService:
             response.raise_for_status()
             return response.json()
 
+    async def probe_asset_size(self, url: str) -> int | None:
+        """Byte size of a signed asset URL without downloading it (None if unknown).
+
+        HEAD first; signed URLs are often valid for GET only, so fall back to a
+        one-byte ranged GET and read the total from Content-Range. The GET is
+        streamed and closed unread, so a CDN that ignores Range and answers
+        200 doesn't make us download the whole splat.
+        """
+        async with self._assets_http() as client:
+            try:
+                response = await client.head(url)
+                if response.is_success and response.headers.get("content-length"):
+                    return int(response.headers["content-length"])
+                async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as response:
+                    status = response.status_code
+                    total = response.headers.get("content-range", "").rpartition("/")[2]
+                if status == 206 and total.isdigit():
+                    return int(total)
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("Size probe failed for %s: %s", url.split("?")[0], e)
+            return None
+
     @staticmethod
     def extract_world_id(world_data: dict[str, Any]) -> str | None:
         """Extract world id from either world object or operation response payload."""
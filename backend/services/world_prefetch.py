@@ -0,0 +1,262 @@
+"""Speculative world pre-generation while the user is still on the globe.
+
+Normally a world only starts generating after confirm_exploration →
+summarize_session, so the user watches the loading screen for the whole
+generation. With prefetch enabled, once a session settles on a location
+(a `suggest_location` call or a `context` update that isn't replaced for
+`settle_s`), a cheap Marble mini world is started for it in the background.
+When the frontend then asks for a world near that place and year, the
+speculative operation is adopted instead of starting from zero.
+
+Spend is bounded two ways: each session may start at most
+`session_budget` speculative generations, and at most `global_budget` may be
+generating at once across the process. World Labs has no cancel endpoint,
+so a job the user moves away from is abandoned (no longer the session's
+pick) but keeps generating into the world catalog, where later equivalent
+requests can still reuse it. Jobs older than `max_age_s` are not adopted.
+
+Created in main.py's lifespan and shared via `app.state.world_prefetch`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from services import metrics
+from services.generation_scheduler import PRIORITY_SPECULATIVE
+from services.operation_registry import Generation, OperationRegistry
+from services.world_index import haversine_km
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_MODEL = "Marble 0.1-mini"
+DEFAULT_SETTLE_S = 4.0
+DEFAULT_SESSION_BUDGET = 2
+DEFAULT_GLOBAL_BUDGET = 4
+DEFAULT_MAX_AGE_S = 900.0
+MATCH_RADIUS_KM = 25.0
+MATCH_YEARS = 25.0
+
+
+def _ts() -> str:
+    return f"{time.time():.3f}"
+
+
+def prefetch_prompt(location: str, time_period: str | None, year: float | None) -> str:
+    """Generic scene description for a place and time (no conversation needed)."""
+    when = time_period or (f"the year {int(year)}" if year is not None else "the present day")
+    return (
+        f"{location} during {when}. A wide, detailed street-level view of the place as it "
+        f"looked at that time: characteristic architecture and building materials, streets "
+        f"and landmarks, vegetation, natural daylight, and signs of everyday life."
+    )
+
+
+@dataclass
+class PrefetchJob:
+    operation_id: str
+    location: str
+    lat: float
+    lng: float
+    year: float | None
+    started_at: float
+    adopted: bool = False
+    abandoned: bool = False
+
+    def matches(self, lat: float, lng: float, year: float | None, radius_km: float, years: float) -> float | None:
+        """Distance in km if this job covers (lat, lng, year), else None."""
+        if year is not None and self.year is not None and abs(year - self.year) > years:
+            return None
+        distance = haversine_km(lat, lng, self.lat, self.lng)
+        return distance if distance <= radius_km else None
+
+
+class PrefetchSession:
+    """Per-/ws/voice handle: debounces location changes into at most one live pick."""
+
+    def __init__(self, owner: WorldPrefetcher):
+        self.owner = owner
+        self.started = 0
+        self.job: PrefetchJob | None = None
+        self._pending: asyncio.Task | None = None
+
+    def request(
+        self,
+        *,
+        location: str,
+        lat: float | None,
+        lng: float | None,
+        year: float | None = None,
+        time_period: str | None = None,
+    ) -> None:
+        """The user is looking at this place; speculate once they stay on it for `settle_s`."""
+        if not self.owner.enabled or not location or lat is None or lng is None:
+            return
+        self.cancel_pending()
+        if self.job is not None and self.job.matches(
+            lat, lng, year, self.owner.match_radius_km, self.owner.match_years,
+        ) is not None:
+            return  # Already generating this place.
+        self._pending = asyncio.create_task(self._settle_then_start(location, lat, lng, year, time_period))
+
+    def cancel_pending(self) -> None:
+        if self._pending and not self._pending.done():
+            self._pending.cancel()
+        self._pending = None
+
+    def close(self) -> None:
+        """Session over. The current job stays adoptable (the REST call comes later)."""
+        self.cancel_pending()
+
+    async def _settle_then_start(
+        self, location: str, lat: float, lng: float, year: float | None, time_period: str | None,
+    ) -> None:
+        await asyncio.sleep(self.owner.settle_s)
+        if self.job is not None and not self.job.adopted:
+            self.job.abandoned = True
+            metrics.WORLD_PREFETCH_ABANDONED.inc()
+            print(f"[{_ts()}][PREFETCH] Abandoned {self.job.operation_id} ({self.job.location}) — user moved on")
+        self.job = None
+        try:
+            job = await self.owner.start(self, location, lat, lng, year, time_period)
+        except Exception as e:
+            logger.warning("Prefetch for %s failed to start: %s", location, e)
+            return
+        if job is not None:
+            self.job = job
+
+
+class WorldPrefetcher:
+    """Budgeted speculative mini generations, adopted by location + year match."""
+
+    def __init__(
+        self,
+        operations: OperationRegistry,
+        *,
+        enabled: bool = True,
+        model: str = PREFETCH_MODEL,
+        settle_s: float = DEFAULT_SETTLE_S,
+        session_budget: int = DEFAULT_SESSION_BUDGET,
+        global_budget: int = DEFAULT_GLOBAL_BUDGET,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+        match_radius_km: float = MATCH_RADIUS_KM,
+        match_years: float = MATCH_YEARS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.operations = operations
+        self.enabled = enabled
+        self.model = model
+        self.settle_s = settle_s
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.max_age_s = max_age_s
+        self.match_radius_km = match_radius_km
+        self.match_years = match_years
+        self._clock = clock
+        self._jobs: list[PrefetchJob] = []
+        self._reserved = 0  # starts awaiting World Labs' generate call
+
+    def session(self) -> PrefetchSession:
+        return PrefetchSession(self)
+
+    @property
+    def generating(self) -> int:
+        """Speculative jobs still generating upstream (counted against the global budget)."""
+        self._prune()
+        live = sum(1 for job in self._jobs if self.operations.is_generating(job.operation_id))
+        return live + self._reserved
+
+    async def start(
+        self,
+        session: PrefetchSession,
+        location: str,
+        lat: float,
+        lng: float,
+        year: float | None,
+        time_period: str | None,
+    ) -> PrefetchJob | None:
+        """Start (or reuse) a speculative generation, if budgets allow."""
+        if session.started >= self.session_budget:
+            metrics.WORLD_PREFETCH_SKIPPED.inc()
+            print(f"[{_ts()}][PREFETCH] Session budget spent ({self.session_budget}) — skipping {location}")
+            return None
+        if self.generating >= self.global_budget:
+            metrics.WORLD_PREFETCH_SKIPPED.inc()
+            print(f"[{_ts()}][PREFETCH] Global budget full ({self.global_budget}) — skipping {location}")
+            return None
+
+        # Reserve both budgets before the upstream call so overlapping starts can't overspend.
+        session.started += 1
+        self._reserved += 1
+        try:
+            generation = await self.operations.start_generation(
+                scene_description=prefetch_prompt(location, time_period, year),
+                display_name=f"{location} — {time_period or 'preview'}",
+                model=self.model,
+                location=location,
+                time_period=time_period,
+                lat=lat,
+                lng=lng,
+                year=year,
+                priority=PRIORITY_SPECULATIVE,
+            )
+        except BaseException:
+            session.started -= 1
+            raise
+        finally:
+            self._reserved -= 1
+        if generation.reused is not None:
+            session.started -= 1  # Nothing new was spent upstream.
+        else:
+            metrics.WORLD_PREFETCH_STARTED.inc()
+        job = PrefetchJob(
+            operation_id=generation.operation_id,
+            location=location,
+            lat=lat,
+            lng=lng,
+            year=year,
+            started_at=self._clock(),
+        )
+        self._jobs.append(job)
+        print(
+            f"[{_ts()}][PREFETCH] {'Reusing' if generation.reused else 'Started'} "
+            f"{generation.operation_id} for {location} ({time_period or year or '-'})"
+        )
+        return job
+
+    def adopt(self, *, lat: float | None, lng: float | None, year: float | None = None) -> Generation | None:
+        """Hand over the closest live speculative job for this place and year, if any."""
+        if not self.enabled or lat is None or lng is None:
+            return None
+        self._prune()
+        best: tuple[float, PrefetchJob] | None = None
+        for job in self._jobs:
+            state = self.operations.get(job.operation_id)
+            if state is not None and state.error:
+                continue
+            distance = job.matches(lat, lng, year, self.match_radius_km, self.match_years)
+            if distance is not None and (best is None or distance < best[0]):
+                best = (distance, job)
+        if best is None:
+            return None
+
+        job = best[1]
+        job.adopted = True
+        state = self.operations.get(job.operation_id)
+        done = state is not None and state.done
+        saved = state.elapsed_s if state is not None else self._clock() - job.started_at
+        metrics.WORLD_PREFETCH_ADOPTED.inc()
+        metrics.WORLD_PREFETCH_WAIT_SAVED.observe(saved)
+        print(
+            f"[{_ts()}][PREFETCH] Adopted {job.operation_id} ({job.location}) — "
+            f"{'ready' if done else 'in flight'}, {saved:.1f}s of generation already done"
+        )
+        return Generation(job.operation_id, reused="prefetched")
+
+    def _prune(self) -> None:
+        now = self._clock()
+        self._jobs = [j for j in self._jobs if now - j.started_at < self.max_age_s]
@@ -0,0 +1,123 @@
+"""Tests for the world asset proxy (services/asset_cache.py, /api/worlds/assets)."""
+
+import asyncio
+import gzip
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import worlds
+from services.asset_cache import AssetCache
+from services.operation_registry import OperationRegistry
+from tests.test_operation_registry import FakeWorldLabs
+
+SPZ = bytes(range(256)) * 40
+PANO = b"<jpeg bytes>" * 100
+
+
+class FakeWorldLabsWithCdnAssets(FakeWorldLabs):
+    async def get_world_assets(self, world_id: str) -> dict:
+        return {
+            "world_id": world_id,
+            "assets": {
+                "splats": {"spz_urls": {"500k": "https://cdn/500k.spz"}},
+                "imagery": {"pano_url": "https://cdn/pano.jpg"},
+            },
+        }
+
+
+class FakeCdn(httpx.AsyncBaseTransport):
+    """Streams raw bodies (MockTransport pre-reads them, which hides encoding)."""
+
+    def __init__(self, hits: list[str]):
+        self.hits = hits
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.hits.append(request.url.path)
+        if request.url.path == "/500k.spz":
+            body, headers = SPZ, {"content-type": "application/octet-stream"}
+        elif request.url.path == "/pano.jpg":
+            body, headers = gzip.compress(PANO), {"content-type": "image/jpeg", "content-encoding": "gzip"}
+        else:
+            return httpx.Response(404)
+        return httpx.Response(200, headers=headers, stream=httpx.ByteStream(body))
+
+
+def _cdn(hits: list[str]) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=FakeCdn(hits))
+
+
+def _client(tmp_path, hits: list[str]) -> TestClient:
+    app = FastAPI()
+    app.include_router(worlds.router)
+    app.state.operations = OperationRegistry(
+        FakeWorldLabsWithCdnAssets(polls_until_done=1), min_interval_s=0.01, max_interval_s=0.02,
+    )
+    app.state.asset_cache = AssetCache(tmp_path, max_bytes=1 << 20, client=_cdn(hits))
+    return TestClient(app)
+
+
+def test_status_points_at_proxy_and_assets_download_once(tmp_path):
+    hits: list[str] = []
+    client = _client(tmp_path, hits)
+
+    assets = client.get("/api/worlds/status/op_1").json()["assets"]
+    assert assets["spz_urls"] == {"500k": "/api/worlds/assets/world_1/spz_500k"}
+    assert assets["default_spz_url"] == "/api/worlds/assets/world_1/spz_500k"
+    assert assets["pano_url"] == "/api/worlds/assets/world_1/pano"
+
+    first = client.get("/api/worlds/assets/world_1/spz_500k")
+    assert first.status_code == 200 and first.content == SPZ
+    assert "immutable" in first.headers["cache-control"]
+    etag = first.headers["etag"]
+
+    partial = client.get("/api/worlds/assets/world_1/spz_500k", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == SPZ[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(SPZ)}"
+
+    not_modified = client.get("/api/worlds/assets/world_1/spz_500k", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    # Stored compressed and passed through with its Content-Encoding.
+    pano = client.get("/api/worlds/assets/world_1/pano")
+    assert pano.headers["content-encoding"] == "gzip"
+    assert pano.content == PANO
+
+    assert hits == ["/500k.spz", "/pano.jpg"]
+    assert client.get("/api/worlds/assets/world_1/collider_mesh").status_code == 404
+    assert client.get("/api/worlds/assets/world_1/..").status_code in (400, 404)
+
+
+def test_concurrent_misses_share_one_download(tmp_path):
+    hits: list[str] = []
+
+    async def run():
+        cache = AssetCache(tmp_path, max_bytes=1 << 20, client=_cdn(hits))
+        return await asyncio.gather(*(cache.fetch("w1", "spz_500k", "https://cdn/500k.spz") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert hits == ["/500k.spz"]
+    assert len({r.path for r in results}) == 1
+
+
+def test_lru_eviction_and_reload_from_disk(tmp_path):
+    hits: list[str] = []
+
+    async def run():
+        cache = AssetCache(tmp_path, max_bytes=2 * len(SPZ), client=_cdn(hits))
+        await cache.fetch("a", "spz_500k", "https://cdn/500k.spz")
+        await cache.fetch("b", "spz_500k", "https://cdn/500k.spz")
+        assert cache.lookup("a", "spz_500k") is not None  # a is now most recent
+        await cache.fetch("c", "spz_500k", "https://cdn/500k.spz")  # evicts b
+        return cache
+
+    cache = asyncio.run(run())
+    assert cache.lookup("b", "spz_500k") is None
+    assert not (tmp_path / "b" / "spz_500k").exists()
+    assert cache.total_bytes == 2 * len(SPZ)
+
+    reopened = AssetCache(tmp_path, max_bytes=2 * len(SPZ))
+    assert reopened.total_bytes == 2 * len(SPZ)
+    assert reopened.lookup("a", "spz_500k").etag == cache.lookup("a", "spz_500k").etag
@@ -0,0 +1,125 @@
+"""Tests for phase config memoization and Gemini context caching (services/context_cache.py)."""
+
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from services.context_cache import ContextCache
+from services.gemini_guide import GeminiGuide
+
+
+class FakeCaches:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.created: list[types.CreateCachedContentConfig] = []
+        self.deleted: list[str] = []
+
+    async def create(self, *, model, config):
+        if self.fail:
+            raise RuntimeError("quota")
+        self.created.append(config)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    async def delete(self, *, name):
+        self.deleted.append(name)
+
+
+def _client(caches: FakeCaches):
+    return SimpleNamespace(aio=SimpleNamespace(caches=caches))
+
+
+def test_phase_config_is_memoized_per_context():
+    a = GeminiGuide(api_key="", client=object())
+    b = GeminiGuide(api_key="", client=object())
+
+    assert a._build_config() is a._build_config()
+    assert a._build_config() is b._build_config()  # shared across sessions
+
+    a.update_context(phase="exploring", location_name="Kyoto", time_period="1600")
+    exploring = a._build_config()
+    assert exploring is not b._build_config()
+    assert "Kyoto" in exploring.system_instruction
+    a.update_context(location_name="Kyoto")  # unchanged values keep the same config
+    assert a._build_config() is exploring
+
+
+def test_guide_switches_to_cached_prefix_once_created():
+    async def run():
+        caches = FakeCaches()
+        cache = ContextCache(_client(caches), model="m", min_tokens=0)
+        guide = GeminiGuide(api_key="", client=object(), context_cache=cache)
+
+        first = guide._request_config()
+        await asyncio.sleep(0)
+        second = guide._request_config()
+
+        guide.update_context(phase="exploring", location_name="Rome", time_period="50 AD")
+        third = guide._request_config()  # new prefix: inline until its cache exists
+        await asyncio.sleep(0)
+        guide.close()
+        await asyncio.sleep(0)
+        return caches, first, second, third
+
+    caches, first, second, third = asyncio.run(run())
+    assert first.system_instruction and first.cached_content is None
+    assert second.cached_content == "cachedContents/1"
+    assert second.system_instruction is None and second.tools is None
+    assert third.cached_content is None and "Rome" in third.system_instruction
+    assert len(caches.created) == 2
+    assert caches.created[0].tools == first.tools
+    assert caches.deleted == ["cachedContents/1", "cachedContents/2"]  # nobody uses them any more
+
+
+def test_shared_cache_survives_until_last_session_releases():
+    async def run():
+        caches = FakeCaches()
+        cache = ContextCache(_client(caches), model="m", min_tokens=0)
+        a = GeminiGuide(api_key="", client=object(), context_cache=cache)
+        b = GeminiGuide(api_key="", client=object(), context_cache=cache)
+        a._request_config()
+        await asyncio.sleep(0)
+        assert b._request_config().cached_content == "cachedContents/1"
+        a.close()
+        await asyncio.sleep(0)
+        assert caches.deleted == []
+        b.close()
+        await asyncio.sleep(0)
+        return caches
+
+    assert asyncio.run(run()).deleted == ["cachedContents/1"]
+
+
+def test_small_or_failing_prefixes_stay_inline():
+    async def run():
+        small = ContextCache(_client(FakeCaches()), model="m", min_tokens=10**6)
+        failing_caches = FakeCaches(fail=True)
+        failing = ContextCache(_client(failing_caches), model="m", min_tokens=0)
+        results = []
+        for cache in (small, failing):
+            guide = GeminiGuide(api_key="", client=object(), context_cache=cache)
+            for _ in range(3):
+                results.append(guide._request_config().cached_content)
+                await asyncio.sleep(0)
+        return results, failing_caches
+
+    results, failing_caches = asyncio.run(run())
+    assert results == [None] * 6
+    assert failing_caches.created == []
+
+
+def test_expiring_cache_is_replaced():
+    async def run():
+        now = [0.0]
+        caches = FakeCaches()
+        cache = ContextCache(_client(caches), model="m", ttl_s=100, min_tokens=0, clock=lambda: now[0])
+        guide = GeminiGuide(api_key="", client=object(), context_cache=cache)
+        guide._request_config()
+        await asyncio.sleep(0)
+        assert guide._request_config().cached_content == "cachedContents/1"
+        now[0] = 90.0  # inside the expiry margin
+        assert guide._request_config().cached_content is None
+        await asyncio.sleep(0)
+        return guide._request_config().cached_content
+
+    assert asyncio.run(run()) == "cachedContents/2"
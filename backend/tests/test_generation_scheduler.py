@@ -0,0 +1,107 @@
+"""Tests for the World Labs generation queue (no network)."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.generation_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SPECULATIVE,
+    GenerationScheduler,
+)
+
+
+class FakeUpstream:
+    """generate_world stand-in: op ids in call order, optional 429s first."""
+
+    def __init__(self, rate_limited: int = 0):
+        self.calls: list[str] = []
+        self.rate_limited = rate_limited
+
+    def start(self, name: str):
+        async def call() -> str:
+            if self.rate_limited:
+                self.rate_limited -= 1
+                request = httpx.Request("POST", "https://example/worlds:generate")
+                response = httpx.Response(429, headers={"retry-after": "0.01"}, request=request)
+                raise httpx.HTTPStatusError("slow down", request=request, response=response)
+            self.calls.append(name)
+            return f"op_{name}"
+        return call
+
+
+def test_max_in_flight_queues_with_positions_and_eta():
+    async def run():
+        upstream = FakeUpstream()
+        scheduler = GenerationScheduler(max_in_flight=1, expected_s=lambda model: 30.0)
+        updates: dict[str, list] = {"b": [], "c": []}
+        a, _ = scheduler.submit("a", upstream.start("a"), model="m")
+        b, _ = scheduler.submit("b", upstream.start("b"), model="m", on_queue=lambda *u: updates["b"].append(u))
+        c, _ = scheduler.submit("c", upstream.start("c"), model="m", on_queue=lambda *u: updates["c"].append(u))
+        await a.future
+        await asyncio.sleep(0)
+        started_before_release = list(upstream.calls)
+        scheduler.release("op_a")
+        await b.future
+        return upstream, started_before_release, updates, scheduler
+
+    upstream, started_before_release, updates, scheduler = asyncio.run(run())
+    assert started_before_release == ["a"]
+    assert upstream.calls == ["a", "b"]
+    assert updates["b"][0] == (0, 30.0)
+    assert updates["c"][0] == (1, 60.0)
+    assert updates["c"][-1][0] == 0  # moved up when b dispatched
+    assert scheduler.queued == 1 and scheduler.in_flight == 1
+
+
+def test_priority_classes_and_promotion():
+    async def run():
+        upstream = FakeUpstream()
+        scheduler = GenerationScheduler(max_in_flight=1)
+        busy, _ = scheduler.submit("busy", upstream.start("busy"), model="m")
+        await busy.future
+        scheduler.submit("batch", upstream.start("batch"), model="m", priority=PRIORITY_BATCH)
+        spec, _ = scheduler.submit("spec", upstream.start("spec"), model="m", priority=PRIORITY_SPECULATIVE)
+        # A user now wants the batch job's world: it jumps the speculative one.
+        promoted, joined = scheduler.submit(
+            "batch", upstream.start("unused"), model="m", priority=PRIORITY_INTERACTIVE,
+        )
+        scheduler.release("op_busy")
+        await promoted.future
+        scheduler.release("op_batch")
+        await spec.future
+        return upstream, joined
+
+    upstream, joined = asyncio.run(run())
+    assert joined
+    assert upstream.calls == ["busy", "batch", "spec"]
+
+
+def test_rate_limited_start_is_requeued_not_failed():
+    async def run():
+        upstream = FakeUpstream(rate_limited=2)
+        scheduler = GenerationScheduler(max_in_flight=2)
+        ticket, _ = scheduler.submit("a", upstream.start("a"), model="m")
+        return await asyncio.wait_for(ticket.future, 2), ticket.attempts
+
+    operation_id, attempts = asyncio.run(run())
+    assert operation_id == "op_a" and attempts == 3
+
+
+def test_withdrawn_ticket_is_never_started():
+    async def run():
+        upstream = FakeUpstream()
+        scheduler = GenerationScheduler(max_in_flight=1)
+        busy, _ = scheduler.submit("busy", upstream.start("busy"), model="m")
+        await busy.future
+        waiting, _ = scheduler.submit("gone", upstream.start("gone"), model="m")
+        scheduler.withdraw(waiting)
+        scheduler.release("op_busy")
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting.future
+        return upstream
+
+    assert asyncio.run(run()).calls == ["busy"]
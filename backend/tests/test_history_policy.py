@@ -0,0 +1,111 @@
+"""Tests for conversation history compaction (services/history_policy.py)."""
+
+import asyncio
+
+from google.genai import types
+
+from services import history_policy
+from services.history_policy import IMAGE_PLACEHOLDER, SUMMARY_PREFIX, HistoryPolicy
+
+
+def _user(text: str, image: bool = False) -> types.Content:
+    parts = [types.Part(text=text)]
+    if image:
+        parts.append(types.Part.from_bytes(data=b"\xff\xd8jpeg", mime_type="image/jpeg"))
+    return types.Content(role="user", parts=parts)
+
+
+def _model(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def _call(name: str) -> list[types.Content]:
+    return [
+        types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args={}))]),
+        types.Content(role="user", parts=[types.Part(
+            function_response=types.FunctionResponse(name=name, response={"status": "displayed"}),
+        )]),
+    ]
+
+
+def _has_image(entry: types.Content) -> bool:
+    return any(p.inline_data is not None for p in entry.parts)
+
+
+def test_images_dropped_from_older_turns():
+    history = []
+    for i in range(4):
+        history += [_user(f"turn {i}", image=True), _model(f"reply {i}")]
+    policy = HistoryPolicy(keep_image_turns=2)
+
+    policy.compact(history)
+
+    assert [_has_image(e) for e in history if e.role == "user"] == [False, False, True, True]
+    assert history[0].parts[-1].text == IMAGE_PLACEHOLDER
+    assert history[0].parts[0].text == "turn 0"
+    assert policy.images_evicted == 2
+
+
+def test_tokens_are_counted_incrementally(monkeypatch):
+    counted = []
+    real = history_policy.estimate_tokens
+    monkeypatch.setattr(history_policy, "estimate_tokens", lambda e: counted.append(e) or real(e))
+    history = [_user("a" * 400), _model("b" * 400)]
+    policy = HistoryPolicy()
+
+    first = policy.compact(history)
+    history += [_user("c" * 40), _model("d" * 40)]
+    second = policy.compact(history)
+
+    assert len(counted) == 4  # the first two entries weren't re-counted
+    assert second - first == 2 * (40 // 4 + 4)
+    history.clear()
+    assert policy.compact(history) == 0
+
+
+def test_over_budget_rolls_old_turns_into_summary_in_background():
+    async def run():
+        release = asyncio.Event()
+        transcripts = []
+
+        async def summarizer(transcript: str) -> str:
+            transcripts.append(transcript)
+            await release.wait()
+            return "They chose Kyoto in 1600."
+
+        history = [_user("earlier " * 200), _model("long answer " * 200), *_call("generate_fact")]
+        for i in range(3):
+            history += [_user(f"recent {i}"), _model(f"reply {i}")]
+        recent = history[4:]
+        policy = HistoryPolicy(token_budget=100, keep_recent_turns=3, summarizer=summarizer)
+
+        policy.compact(history)
+        await asyncio.sleep(0)
+        assert len(history) == 10  # request isn't blocked; history untouched until the summary lands
+        release.set()
+        await asyncio.sleep(0.01)
+        return history, recent, transcripts, policy
+
+    history, recent, transcripts, policy = asyncio.run(run())
+    assert "Guide called generate_fact" in transcripts[0]
+    assert history[0].parts[0].text == f"{SUMMARY_PREFIX} They chose Kyoto in 1600."
+    assert history[1:] == recent  # function call and result went into the summary together
+    assert policy.turns_summarized == 1
+    assert policy.compact(history) < 100
+
+
+def test_summary_is_dropped_if_history_was_reset():
+    async def run():
+        async def summarizer(transcript: str) -> str:
+            await asyncio.sleep(0.01)
+            return "summary"
+
+        history = [_user("x" * 2000), _model("y" * 2000), _user("now"), _model("ok")]
+        policy = HistoryPolicy(token_budget=10, keep_recent_turns=1, summarizer=summarizer)
+        policy.compact(history)
+        history[:] = [_user("fresh session")]
+        await asyncio.sleep(0.05)
+        return history
+
+    history = asyncio.run(run())
+    assert [e.parts[0].text for e in history] == ["fresh session"]
@@ -0,0 +1,52 @@
+"""Tests for the in-process metrics registry and /metrics exposition."""
+
+import math
+
+import pytest
+
+from services.metrics import Histogram, Registry
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram("test_latency_seconds", "test", buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.2, 0.3, 0.7, 2.0):
+        hist.observe(value)
+
+    text = "\n".join(hist.render())
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="0.5"} 3' in text
+    assert 'test_latency_seconds_bucket{le="1"} 4' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 5' in text
+    assert "test_latency_seconds_count 5" in text
+    assert hist.quantile(0.5) == 0.3
+    assert hist.quantile(0.99) == 2.0
+
+
+def test_histogram_empty_quantile_is_nan():
+    assert math.isnan(Histogram("h", "h").quantile(0.5))
+
+
+def test_registry_dedupes_and_renders():
+    reg = Registry()
+    c1 = reg.counter("turns_total", "turns")
+    c2 = reg.counter("turns_total", "turns")
+    assert c1 is c2
+    c1.inc()
+    reg.gauge("depth", "queue depth", fn=lambda: 7)
+    text = reg.render()
+    assert "# TYPE turns_total counter\nturns_total 1" in text
+    assert "depth 7" in text
+
+
+def test_metrics_endpoint():
+    """GET /metrics serves Prometheus text (requires .env keys or stubs)."""
+    try:
+        from fastapi.testclient import TestClient
+        from main import app
+    except Exception as e:
+        pytest.skip(f"App creation failed (likely missing .env): {e}")
+
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert "voice_time_to_first_audio_seconds_bucket" in response.text
+    assert "voice_turns_total" in response.text
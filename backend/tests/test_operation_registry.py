@@ -0,0 +1,98 @@
+"""Tests for the shared World Labs operation poller (fake World Labs — no network)."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.operation_registry import DurationModel, OperationRegistry, next_poll_delay
+
+
+class FakeWorldLabs:
+    """Reports an operation done after `polls_until_done` fetches."""
+
+    def __init__(self, polls_until_done: int = 3, status_code: int = 200):
+        self.polls_until_done = polls_until_done
+        self.status_code = status_code
+        self.fetches = 0
+
+    async def fetch_operation(self, operation_id: str) -> dict:
+        self.fetches += 1
+        if self.status_code != 200:
+            request = httpx.Request("GET", f"https://example/operations/{operation_id}")
+            response = httpx.Response(self.status_code, request=request)
+            raise httpx.HTTPStatusError("boom", request=request, response=response)
+        done = self.fetches >= self.polls_until_done
+        return {
+            "operation_id": operation_id,
+            "done": done,
+            "error": None,
+            "response": {"world_id": "world_1"} if done else None,
+        }
+
+
+def _registry(world_labs: FakeWorldLabs) -> OperationRegistry:
+    return OperationRegistry(world_labs, min_interval_s=0.01, max_interval_s=0.02, linger_s=60)
+
+
+def test_poll_delay_is_sparse_early_and_dense_near_finish():
+    early = next_poll_delay(elapsed_s=0, expected_s=60, min_s=1, max_s=15)
+    near = next_poll_delay(elapsed_s=57, expected_s=60, min_s=1, max_s=15)
+    overdue = next_poll_delay(elapsed_s=90, expected_s=60, min_s=1, max_s=15)
+    assert early == 15
+    assert near == 1.5
+    assert near < overdue <= 15
+
+
+def test_duration_model_learns_from_samples():
+    model = DurationModel()
+    assert model.expected("Marble 0.1-mini") == 45.0
+    for d in (20, 22, 30):
+        model.record("Marble 0.1-mini", d)
+    assert model.expected("Marble 0.1-mini") == 22
+
+
+def test_many_watchers_share_one_poll_loop():
+    async def run() -> tuple[FakeWorldLabs, list]:
+        world_labs = FakeWorldLabs(polls_until_done=3)
+        registry = _registry(world_labs)
+        states = await asyncio.gather(*(registry.wait("op_1") for _ in range(5)))
+        # REST callers after completion are served from the shared state.
+        for _ in range(10):
+            await registry.current("op_1")
+        await registry.stop()
+        return world_labs, states
+
+    world_labs, states = asyncio.run(run())
+    assert world_labs.fetches == 3
+    assert all(s is states[0] for s in states)
+    assert states[0].done and states[0].error is None
+    assert states[0].operation["response"]["world_id"] == "world_1"
+
+
+def test_unknown_operation_fails_fast():
+    async def run():
+        world_labs = FakeWorldLabs(status_code=404)
+        registry = _registry(world_labs)
+        with pytest.raises(httpx.HTTPStatusError):
+            await registry.current("op_missing")
+        state = registry.get("op_missing")
+        await registry.stop()
+        return world_labs, state
+
+    world_labs, state = asyncio.run(run())
+    assert world_labs.fetches == 1
+    assert state.done and state.error == "HTTP 404"
+
+
+def test_stop_does_not_report_a_pending_operation_ready():
+    async def run():
+        registry = _registry(FakeWorldLabs(polls_until_done=1000))
+        waiter = asyncio.create_task(registry.wait("op_1"))
+        await registry.current("op_1")
+        await registry.stop()
+        return await asyncio.wait_for(waiter, timeout=1.0)
+
+    state = asyncio.run(run())
+    assert not state.done
+    assert state.error == "Polling stopped before the operation finished"
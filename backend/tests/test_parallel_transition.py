@@ -0,0 +1,122 @@
+"""Tests for the parallel transition burst in routers/voice.py (fake Gemini — no network)."""
+
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from routers import voice
+from services.gemini_guide import GeminiGuide
+
+ARGS = {
+    "summarize_session": {"user_profile": "Loves temples.", "world_description": "A misty Kyoto street."},
+    "generate_loading_messages": {"messages": ["Folding paper cranes"]},
+    "select_music": {"era": "edo", "region": "japan", "mood": "peaceful", "song_suggestions": []},
+}
+
+
+class TaskModels:
+    """Answers each transition task with its tool call after a per-tool delay."""
+
+    def __init__(self, delays: dict[str, float], fail: str | None = None):
+        self.delays = delays
+        self.fail = fail
+        self.configs: list[types.GenerateContentConfig] = []
+
+    async def generate_content(self, model, contents, config):
+        self.configs.append(config)
+        name = config.tool_config.function_calling_config.allowed_function_names[0]
+        await asyncio.sleep(self.delays.get(name, 0))
+        if name == self.fail:
+            raise RuntimeError("503")
+        return SimpleNamespace(function_calls=[types.FunctionCall(name=name, args=ARGS[name])])
+
+
+class FakeTransport:
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send_json(self, msg: dict) -> None:
+        self.sent.append(msg)
+
+
+def _transition(models: TaskModels) -> tuple[GeminiGuide, FakeTransport]:
+    guide = GeminiGuide(api_key="test", client=SimpleNamespace(aio=SimpleNamespace(models=models)))
+    guide.update_context(phase="transition", location_name="Kyoto", time_period="Edo period")
+    guide.conversation_history.append(types.Content(role="user", parts=[types.Part(text="Kyoto please")]))
+    transport = FakeTransport()
+    asyncio.run(voice._process_transition(transport, guide, operations=None))
+    return guide, transport
+
+
+def test_each_task_is_forwarded_as_it_lands():
+    models = TaskModels({"summarize_session": 0.02, "generate_loading_messages": 0.06, "select_music": 0.04})
+    guide, transport = _transition(models)
+
+    types_sent = [m["type"] for m in transport.sent]
+    assert types_sent == ["response_start", "session_summary", "music", "loading_messages", "transition_complete"]
+    # Each request was scoped to its own tool, with the destination in its prompt.
+    for config in models.configs:
+        assert len(config.tools[0].function_declarations) == 1
+        assert "Kyoto, Edo period" in config.system_instruction
+    model_turn, results = guide.conversation_history[-2:]
+    assert [p.function_call.name for p in model_turn.parts] == [
+        "summarize_session", "select_music", "generate_loading_messages",
+    ]
+    assert [p.function_response.name for p in results.parts] == [
+        "summarize_session", "select_music", "generate_loading_messages",
+    ]
+
+
+def test_failed_task_does_not_block_the_others():
+    guide, transport = _transition(TaskModels({}, fail="generate_loading_messages"))
+
+    types_sent = {m["type"] for m in transport.sent}
+    assert {"session_summary", "music", "transition_complete"} <= types_sent
+    assert "loading_messages" not in types_sent
+    assert len(guide.conversation_history[-2].parts) == 2
+
+
+def test_transition_after_a_guide_reply_keeps_turns_alternating():
+    models = TaskModels({})
+    guide = GeminiGuide(api_key="test", client=SimpleNamespace(aio=SimpleNamespace(models=models)))
+    guide.update_context(phase="transition", location_name="Kyoto", time_period="Edo period")
+    guide.conversation_history.extend([
+        types.Content(role="user", parts=[types.Part(text="Kyoto please")]),
+        types.Content(role="model", parts=[types.Part(text="Wonderful choice! Press Enter when ready.")]),
+    ])
+    asyncio.run(voice._process_transition(FakeTransport(), guide, operations=None))
+
+    roles = [c.role for c in guide.conversation_history]
+    assert roles == ["user", "model", "user", "model", "user"]
+    assert "Enter button" in guide.conversation_history[2].parts[0].text
+
+
+def test_cancelled_transition_leaves_no_stale_results():
+    async def run():
+        models = TaskModels({"summarize_session": 0.0, "generate_loading_messages": 1.0, "select_music": 1.0})
+        guide = GeminiGuide(api_key="test", client=SimpleNamespace(aio=SimpleNamespace(models=models)))
+        guide.update_context(phase="transition")
+        history = [types.Content(role="user", parts=[types.Part(text="Kyoto please")])]
+        guide.conversation_history.extend(history)
+        transport = FakeTransport()
+        task = asyncio.create_task(voice._process_transition(transport, guide, operations=None))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return guide, transport, history, task
+
+    guide, transport, history, task = asyncio.run(run())
+    assert task.cancelled()
+    assert "session_summary" in [m["type"] for m in transport.sent]  # landed before the cancel
+    assert {"music", "loading_messages", "transition_complete"}.isdisjoint(m["type"] for m in transport.sent)
+    # Only the confirmation turn was added; no calls or results.
+    assert guide.conversation_history[:-1] == history
+    assert guide.conversation_history[-1].role == "user"
+    # A later turn calling the same tool gets only its own result.
+    guide.record_function_calls([{"name": "summarize_session", "args": {}}])
+    guide.add_function_result("summarize_session", {"status": "session_saved", "turn": "new"})
+    guide.record_function_results()
+    assert [p.function_response.response for p in guide.conversation_history[-1].parts] == [
+        {"status": "session_saved", "turn": "new"},
+    ]
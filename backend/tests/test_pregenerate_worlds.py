@@ -0,0 +1,71 @@
+"""Tests for the batch world pre-generation CLI (fake World Labs — no network)."""
+
+import asyncio
+
+from pregenerate_worlds import DEFAULT_MODEL, load_destinations, pregenerate
+from services.operation_registry import OperationRegistry
+from services.world_catalog import WorldCatalog, world_key
+from tests.test_world_cache import FakeWorldLabsWithAssets
+
+
+class FakeGeneratingWorldLabs(FakeWorldLabsWithAssets):
+    def __init__(self):
+        super().__init__(polls_until_done=1)
+        self.generated: list[str] = []
+
+    async def generate_world(self, scene_description: str, display_name: str, model: str) -> str:
+        self.generated.append(display_name)
+        return f"op_{len(self.generated)}"
+
+
+def _run(destinations, world_labs, catalog_path):
+    async def run():
+        catalog = WorldCatalog(catalog_path)
+        operations = OperationRegistry(
+            world_labs, catalog=catalog, min_interval_s=0.01, max_interval_s=0.02, max_in_flight=2,
+        )
+        results = await pregenerate(destinations, operations)
+        await operations.stop()
+        catalog.close()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_load_destinations_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "d.csv"
+    csv_path.write_text("location,lat,lng,year,time_period\nRome,41.9,12.5,100,Roman Empire\nKyoto,35.0,135.8,,\n")
+    jsonl_path = tmp_path / "d.jsonl"
+    jsonl_path.write_text('{"location": "Giza", "lat": 29.98, "lng": 31.13, "scene_description": "Pyramids at dawn"}\n')
+
+    rome, kyoto = load_destinations(csv_path)
+    assert rome.year == 100 and rome.time_period == "Roman Empire"
+    assert kyoto.year is None and "Kyoto" in kyoto.scene(None)
+    [giza] = load_destinations(jsonl_path)
+    assert giza.scene("{location} template") == "Pyramids at dawn"
+
+
+def test_reruns_are_idempotent_and_resume_in_flight_work(tmp_path):
+    csv_path = tmp_path / "d.csv"
+    csv_path.write_text("location,lat,lng,year\nRome,41.9,12.5,100\nKyoto,35.0,135.8,1600\nGiza,29.98,31.13,-2500\n")
+    rome, kyoto, giza = load_destinations(csv_path)
+    catalog_path = tmp_path / "catalog.sqlite3"
+
+    # An interrupted earlier run left Giza generating upstream.
+    catalog = WorldCatalog(catalog_path)
+    key = world_key(giza.scene(None), location=giza.location, time_period=None, model=DEFAULT_MODEL)
+    catalog.record_started(key, "op_giza", location="Giza", lat=giza.lat, lng=giza.lng)
+    catalog.close()
+
+    world_labs = FakeGeneratingWorldLabs()
+    first = _run([rome, kyoto, giza], world_labs, catalog_path)
+    assert [r.outcome for r in first] == ["generated", "generated", "generated"]
+    assert first[2].operation_id == "op_giza"
+    assert world_labs.generated == ["Rome", "Kyoto"]
+
+    second = _run([rome, kyoto, giza], world_labs, catalog_path)
+    assert [r.outcome for r in second] == ["reused", "reused", "reused"]
+    assert len(world_labs.generated) == 2
+
+    catalog = WorldCatalog(catalog_path)
+    assert len(catalog.ready_entries()) == 3 and len(catalog.nearby(41.9, 12.5)) == 1
@@ -0,0 +1,53 @@
+"""Tests for progressive (preview → upgrade) world generation in routers/voice.py."""
+
+import asyncio
+
+from routers import voice
+from services.operation_registry import OperationRegistry
+from services.world_catalog import WorldCatalog
+from tests.test_world_cache import FakeWorldLabsWithAssets
+
+
+class FakeTransport:
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send_json(self, msg: dict) -> None:
+        self.sent.append(msg)
+
+
+class FakeGeneratingWorldLabs(FakeWorldLabsWithAssets):
+    def __init__(self):
+        super().__init__(polls_until_done=2)
+        self.models: list[str] = []
+
+    async def generate_world(self, scene_description: str, display_name: str, model: str) -> str:
+        self.models.append(model)
+        return f"op_{len(self.models)}"
+
+
+def test_upgrade_is_shared_across_sessions_and_pushed_as_upgrade_ready():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs()
+        operations = OperationRegistry(
+            world_labs, catalog=WorldCatalog(), min_interval_s=0.01, max_interval_s=0.02,
+        )
+        context = dict(location="Rome", time_period="Roman Empire", lat=41.9, lng=12.5, year=100)
+        # Transition session starts the upgrade without watching it...
+        transition_ops: dict = {"preview": "op_preview"}
+        await voice._start_world_upgrade("The Forum at dusk", "Rome", operations, transition_ops, **context)
+        # ...the reconnected exploring session attaches and gets notified.
+        explore_ops: dict = {}
+        transport = FakeTransport()
+        await voice._start_world_upgrade(
+            "The Forum at dusk", "Rome", operations, explore_ops, transport, **context,
+        )
+        await operations.stop()
+        return world_labs, transition_ops, explore_ops, transport
+
+    world_labs, transition_ops, explore_ops, transport = asyncio.run(run())
+    assert world_labs.models == [voice.WORLD_UPGRADE_MODEL]
+    assert transition_ops["upgrade"] == explore_ops["upgrade"] == "op_1"
+    [msg] = transport.sent
+    assert msg["type"] == "world_status" and msg["status"] == "upgrade_ready"
+    assert msg["worldId"] == "world_1" and msg["worldAssets"]["default_spz_url"]
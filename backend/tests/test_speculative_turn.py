@@ -0,0 +1,97 @@
+"""Tests for speculative Gemini generation (fake Gemini client — no network)."""
+
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from services.gemini_guide import GeminiGuide
+from services.speculative_turn import SpeculativeResponse
+
+
+def _chunk(part: types.Part):
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+class FakeModels:
+    """Streams fixed parts, pausing before each so tests can interleave."""
+
+    def __init__(self, parts: list[types.Part], delay_s: float = 0.01):
+        self.parts = parts
+        self.delay_s = delay_s
+        self.calls: list[list[types.Content]] = []
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls.append(list(contents))
+
+        async def stream():
+            for part in self.parts:
+                await asyncio.sleep(self.delay_s)
+                yield _chunk(part)
+
+        return stream()
+
+
+def _guide(parts: list[types.Part], delay_s: float = 0.01) -> tuple[GeminiGuide, FakeModels]:
+    guide = GeminiGuide(api_key="test")
+    models = FakeModels(parts, delay_s)
+    guide.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    guide.conversation_history.append(types.Content(role="user", parts=[types.Part(text="earlier")]))
+    return guide, models
+
+
+def _texts(history: list[types.Content]) -> list[tuple[str, str]]:
+    return [(c.role, "".join(p.text or "" for p in c.parts)) for c in history]
+
+
+def test_discarded_speculation_leaves_history_untouched():
+    async def run() -> tuple[GeminiGuide, FakeModels]:
+        guide, models = _guide([types.Part(text="Hello "), types.Part(text="there")])
+        spec = SpeculativeResponse(guide, "what is this")
+        await asyncio.sleep(0.1)  # let it finish generating
+        assert spec.done and spec.buffered == 2
+        spec.discard()
+        return guide, models
+
+    guide, models = asyncio.run(run())
+    assert _texts(guide.conversation_history) == [("user", "earlier")]
+    # The speculative request still saw the history plus the candidate turn.
+    assert _texts(models.calls[0]) == [("user", "earlier"), ("user", "what is this")]
+
+
+def test_replay_commits_buffered_and_live_chunks_in_order():
+    async def run() -> tuple[GeminiGuide, list[dict]]:
+        guide, _ = _guide([types.Part(text="A"), types.Part(text="B"), types.Part(text="C")], delay_s=0.03)
+        spec = SpeculativeResponse(guide, "tell me more")
+        await asyncio.sleep(0.045)  # roughly one chunk buffered, the rest still streaming
+        assert not spec.done
+        chunks = [chunk async for chunk in spec.replay()]
+        return guide, chunks
+
+    guide, chunks = asyncio.run(run())
+    assert [c["text"] for c in chunks] == ["A", "B", "C"]
+    assert _texts(guide.conversation_history) == [
+        ("user", "earlier"), ("user", "tell me more"), ("model", "ABC"),
+    ]
+
+
+def test_function_calls_are_buffered_not_executed():
+    async def run() -> list[dict]:
+        part = types.Part(function_call=types.FunctionCall(name="generate_fact", args={"fact": "x"}))
+        guide, _ = _guide([part])
+        spec = SpeculativeResponse(guide, "any facts?")
+        await asyncio.sleep(0.05)
+        return [chunk async for chunk in spec.replay()]
+
+    assert asyncio.run(run()) == [{"type": "function_call", "name": "generate_fact", "args": {"fact": "x"}}]
+
+
+def test_matches_only_exact_transcript():
+    async def run() -> tuple[bool, bool]:
+        guide, _ = _guide([types.Part(text="ok")])
+        spec = SpeculativeResponse(guide, "go to rome")
+        result = spec.matches("go to rome"), spec.matches("go to rome please")
+        spec.discard()
+        return result
+
+    assert asyncio.run(run()) == (True, False)
@@ -0,0 +1,90 @@
+"""Tests for splat level-of-detail selection (services/splat_lod.py)."""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import worlds
+from services.operation_registry import OperationRegistry
+from services.splat_lod import ClientHints, plan_lod
+from tests.test_operation_registry import FakeWorldLabs
+
+URLS = {"full_res": "https://cdn/full.spz", "100k": "https://cdn/100k.spz", "500k": "https://cdn/500k.spz"}
+SIZES = {"100k": 2_000_000, "500k": 10_000_000, "full_res": 40_000_000}
+
+
+def test_hints_parse_params_then_headers():
+    assert ClientHints.from_params({}) is None
+    hints = ClientHints.from_params({"gpu_tier": "0"}, {"downlink": "1.5", "device-memory": "4"})
+    assert hints == ClientHints(downlink_mbps=1.5, device_memory_gb=4.0, gpu_tier=0)
+    assert ClientHints.from_params({"downlink": "10"}, {"downlink": "1"}).downlink_mbps == 10.0
+
+
+def test_slow_link_starts_small_and_ladders_up_to_full_res():
+    lod = plan_lod(URLS, SIZES, ClientHints(downlink_mbps=5))
+    assert lod["initial"] == "100k"  # 500k would take 16 s at 5 Mbps
+    assert [r["resolution"] for r in lod["ladder"]] == ["100k", "500k", "full_res"]
+    assert lod["ladder"][2] == {"resolution": "full_res", "url": URLS["full_res"], "bytes": 40_000_000}
+
+
+def test_fast_link_starts_at_full_res():
+    assert plan_lod(URLS, SIZES, ClientHints(downlink_mbps=200))["initial"] == "full_res"
+
+
+def test_weak_devices_are_capped():
+    phone = plan_lod(URLS, SIZES, ClientHints(downlink_mbps=200, device_memory_gb=4, gpu_tier=1))
+    assert phone["initial"] == "500k"
+    assert [r["resolution"] for r in phone["ladder"]] == ["100k", "500k"]
+    software = plan_lod(URLS, SIZES, ClientHints(gpu_tier=0))
+    assert [r["resolution"] for r in software["ladder"]] == ["100k"]
+
+
+def test_unknown_sizes_fall_back_to_nominal():
+    lod = plan_lod(URLS, {}, ClientHints(downlink_mbps=30))
+    assert lod["initial"] == "500k"
+    assert all(r["bytes"] for r in lod["ladder"])
+
+
+class FakeWorldLabsWithSizes(FakeWorldLabs):
+    def __init__(self):
+        super().__init__(polls_until_done=1)
+        self.probes: list[str] = []
+
+    async def get_world_assets(self, world_id: str) -> dict:
+        return {"world_id": world_id, "assets": {"splats": {"spz_urls": URLS}}}
+
+    async def probe_asset_size(self, url: str) -> int | None:
+        self.probes.append(url)
+        return SIZES[next(res for res, u in URLS.items() if u == url)]
+
+
+def test_status_applies_hints_and_probes_sizes_once():
+    world_labs = FakeWorldLabsWithSizes()
+    app = FastAPI()
+    app.include_router(worlds.router)
+    app.state.operations = OperationRegistry(world_labs, min_interval_s=0.01, max_interval_s=0.02)
+    client = TestClient(app)
+
+    plain = client.get("/api/worlds/status/op_1").json()
+    assert plain["splat_url"] == URLS["full_res"] and plain["assets"]["lod"] is None
+    assert world_labs.probes == []
+
+    for _ in range(2):
+        hinted = client.get("/api/worlds/status/op_1?downlink=5&device_memory=8").json()
+        assert hinted["splat_url"] == URLS["100k"]
+        assert hinted["assets"]["default_spz_url"] == URLS["100k"]
+        assert hinted["assets"]["lod"]["initial"] == "100k"
+        assert [r["bytes"] for r in hinted["assets"]["lod"]["ladder"]] == [2_000_000, 10_000_000, 40_000_000]
+    assert sorted(world_labs.probes) == sorted(URLS.values())
+
+
+def test_ready_status_varies_on_hint_headers():
+    app = FastAPI()
+    app.include_router(worlds.router)
+    app.state.operations = OperationRegistry(FakeWorldLabsWithSizes(), min_interval_s=0.01, max_interval_s=0.02)
+    client = TestClient(app)
+
+    plain = client.get("/api/worlds/status/op_1")
+    hinted = client.get("/api/worlds/status/op_1", headers={"Downlink": "5"})
+    assert hinted.json()["splat_url"] == URLS["100k"] != plain.json()["splat_url"]
+    for response in (plain, hinted):
+        assert response.headers["vary"] == "Downlink, Device-Memory"
@@ -0,0 +1,220 @@
+"""Tests for tool execution in routers/voice.py: fire-and-forget vs blocking rounds,
+concurrent dispatch, timeouts and barge-in (fake Gemini — no network)."""
+
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from routers import voice
+from services.gemini_guide import GeminiGuide
+
+
+def _chunk(part: types.Part):
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+def _call(name: str, **args) -> types.Part:
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+class ScriptedModels:
+    """Streams the next scripted list of parts on each request."""
+
+    def __init__(self, rounds: list[list[types.Part]], delay_s: float = 0.0):
+        self.rounds = list(rounds)
+        self.delay_s = delay_s
+        self.calls = 0
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+        parts = self.rounds.pop(0) if self.rounds else [types.Part(text="(follow-up)")]
+
+        async def stream():
+            for part in parts:
+                await asyncio.sleep(self.delay_s)
+                yield _chunk(part)
+
+        return stream()
+
+
+class FakeTransport:
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.log: list[str] = []
+
+    async def send_json(self, msg: dict) -> None:
+        self.sent.append(msg)
+        if msg["type"] == "guide_text":
+            self.log.append(f"text:{msg['text']}")
+
+
+class NoTTS:
+    async def acquire(self, priority: int = 0):
+        raise RuntimeError("no TTS in tests")
+
+
+def _turn(rounds: list[list[types.Part]], delay_s: float = 0.0):
+    models = ScriptedModels(rounds, delay_s)
+    guide = GeminiGuide(api_key="test", client=SimpleNamespace(aio=SimpleNamespace(models=models)))
+    transport = FakeTransport()
+    return guide, models, transport, voice._process_gemini_response(
+        "tell me something", transport, guide, NoTTS(), operations=None,
+    )
+
+
+def _run_turn(rounds: list[list[types.Part]], delay_s: float = 0.0) -> tuple[GeminiGuide, ScriptedModels, FakeTransport]:
+    guide, models, transport, turn = _turn(rounds, delay_s)
+    asyncio.run(turn)
+    return guide, models, transport
+
+
+def _slow_tool(log: list[str], delay_s: float):
+    async def handle(fc, transport, gemini, *args, **kwargs):
+        log.append(f"start:{fc['name']}")
+        try:
+            await asyncio.sleep(delay_s)
+        except asyncio.CancelledError:
+            log.append(f"cancelled:{fc['name']}")
+            raise
+        log.append(f"done:{fc['name']}")
+        gemini.add_function_result(fc["name"], {"status": "ok"})
+
+    return handle
+
+
+def _shape(history: list[types.Content]) -> list[tuple[str, list[str]]]:
+    def kind(part: types.Part) -> str:
+        if part.function_call is not None:
+            return f"call:{part.function_call.name}"
+        if part.function_response is not None:
+            return f"result:{part.function_response.name}"
+        return "text"
+
+    return [(c.role, [kind(p) for p in c.parts]) for c in history]
+
+
+FACT = {"fact_text": "Kyoto was the capital for over a thousand years.", "category": "politics"}
+
+
+def test_fire_and_forget_tool_with_text_needs_no_follow_up():
+    guide, models, transport = _run_turn([[types.Part(text="Kyoto was the capital. "), _call("generate_fact", **FACT)]])
+
+    assert models.calls == 1
+    assert any(m["type"] == "fact" for m in transport.sent)
+    assert _shape(guide.conversation_history) == [
+        ("user", ["text"]),
+        ("model", ["text", "call:generate_fact"]),
+        ("user", ["result:generate_fact"]),
+    ]
+
+
+def test_fire_and_forget_tool_without_text_still_gets_a_spoken_follow_up():
+    guide, models, _ = _run_turn([[_call("generate_fact", **FACT)], [types.Part(text="Here is a fact.")]])
+
+    assert models.calls == 2
+    assert _shape(guide.conversation_history) == [
+        ("user", ["text"]),
+        ("model", ["call:generate_fact"]),
+        ("user", ["result:generate_fact"]),
+        ("model", ["text"]),
+    ]
+
+
+def test_blocking_tool_result_goes_back_to_gemini():
+    guide, models, _ = _run_turn([
+        [types.Part(text="Let me note that. "), _call("summarize_session", user_profile="p", world_description="w"),
+         _call("generate_fact", **FACT)],
+        [types.Part(text="Done.")],
+    ])
+
+    assert models.calls == 2
+    assert _shape(guide.conversation_history)[2] == ("user", ["result:summarize_session", "result:generate_fact"])
+
+
+def test_text_keeps_streaming_while_a_tool_runs(monkeypatch):
+    log: list[str] = []
+    monkeypatch.setattr(voice, "_handle_function_call", _slow_tool(log, 0.1))
+
+    async def run():
+        guide, models, transport, turn = _turn(
+            [[_call("select_music", era="edo"), types.Part(text="A"), types.Part(text="B")], [types.Part(text="C")]],
+            delay_s=0.01,
+        )
+        transport.log = log
+        await turn
+        return guide, models
+
+    guide, models = asyncio.run(run())
+    # Both chunks streamed before the tool finished; the follow-up waited for it.
+    assert log == ["start:select_music", "text:A", "text:B", "done:select_music", "text:C"]
+    assert models.calls == 2
+    assert _shape(guide.conversation_history) == [
+        ("user", ["text"]),
+        ("model", ["text", "call:select_music"]),
+        ("user", ["result:select_music"]),
+        ("model", ["text"]),
+    ]
+
+
+def test_tool_past_its_timeout_gets_an_error_result(monkeypatch):
+    log: list[str] = []
+    monkeypatch.setattr(voice, "_handle_function_call", _slow_tool(log, 1.0))
+    monkeypatch.setitem(voice.TOOL_TIMEOUTS_S, "select_music", 0.02)
+
+    guide, models, _ = _run_turn([[types.Part(text="One moment. "), _call("select_music", era="edo")]])
+
+    assert log == ["start:select_music", "cancelled:select_music"]
+    result = guide.conversation_history[2].parts[0].function_response
+    assert (result.name, result.response) == ("select_music", {"status": "error", "error": "timed out"})
+    assert models.calls == 2
+
+
+def test_barge_in_cancels_running_tools(monkeypatch):
+    log: list[str] = []
+    monkeypatch.setattr(voice, "_handle_function_call", _slow_tool(log, 1.0))
+
+    async def run():
+        guide, _, _, turn = _turn([[_call("select_music", era="edo"), _call("generate_fact", **FACT)]])
+        task = asyncio.create_task(turn)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return guide
+
+    guide = asyncio.run(run())
+    assert sorted(log) == sorted([
+        "start:select_music", "start:generate_fact", "cancelled:select_music", "cancelled:generate_fact",
+    ])
+    # The model turn was already recorded, so each call still gets a response.
+    assert _shape(guide.conversation_history)[-2:] == [
+        ("model", ["call:select_music", "call:generate_fact"]),
+        ("user", ["result:select_music", "result:generate_fact"]),
+    ]
+    assert [p.function_response.response for p in guide.conversation_history[-1].parts] == [
+        {"status": "cancelled"}, {"status": "cancelled"},
+    ]
+
+
+def test_barge_in_keeps_results_that_already_arrived(monkeypatch):
+    log: list[str] = []
+    slow = _slow_tool(log, 1.0)
+    fast = _slow_tool(log, 0.0)
+    monkeypatch.setattr(
+        voice, "_handle_function_call",
+        lambda fc, *args, **kwargs: (fast if fc["name"] == "generate_fact" else slow)(fc, *args, **kwargs),
+    )
+
+    async def run():
+        guide, _, _, turn = _turn([[_call("select_music", era="edo"), _call("generate_fact", **FACT)]])
+        task = asyncio.create_task(turn)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return guide
+
+    results = asyncio.run(run()).conversation_history[-1].parts
+    assert [(p.function_response.name, p.function_response.response) for p in results] == [
+        ("select_music", {"status": "cancelled"}), ("generate_fact", {"status": "ok"}),
+    ]
@@ -0,0 +1,118 @@
+"""Tests for the process-wide TTS session pool (fake Gradium — no network)."""
+
+import asyncio
+
+import pytest
+
+from services.tts_pool import PRIORITY_INTERACTIVE, PRIORITY_NORMAL, TTSSessionPool
+
+
+class FakeStream:
+    def __init__(self, n: int):
+        self.n = n
+        self.is_open = True
+
+    async def close(self) -> None:
+        self.is_open = False
+
+
+class FakeGradium:
+    """Counts handshakes and tracks how many sessions are open at once."""
+
+    def __init__(self, handshake_s: float = 0.01):
+        self.handshake_s = handshake_s
+        self.created = 0
+        self.streams: list[FakeStream] = []
+
+    @property
+    def open_now(self) -> int:
+        return sum(1 for s in self.streams if s.is_open)
+
+    async def create_tts_stream(self) -> FakeStream:
+        await asyncio.sleep(self.handshake_s)
+        self.created += 1
+        stream = FakeStream(self.created)
+        self.streams.append(stream)
+        return stream
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+
+
+def test_warm_stream_is_ready_before_acquire():
+    async def run():
+        gradium = FakeGradium()
+        pool = TTSSessionPool(gradium, max_concurrent=2, warm=1)
+        await pool.start()
+        await _settle()
+        assert gradium.created == 1
+        stream = await pool.acquire(timeout=1)
+        assert stream.n == 1
+        pool.release(stream)
+        await _settle()
+        # Released stream closed, a replacement was warmed.
+        assert not stream.is_open
+        assert gradium.created == 2
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+def test_cap_is_respected_and_waiters_served_in_priority_order():
+    async def run():
+        gradium = FakeGradium()
+        pool = TTSSessionPool(gradium, max_concurrent=1, warm=0)
+        await pool.start()
+        first = await pool.acquire(timeout=1)
+
+        order: list[str] = []
+
+        async def wait_for(label: str, priority: int):
+            stream = await pool.acquire(priority=priority, timeout=2)
+            order.append(label)
+            await asyncio.sleep(0.02)
+            pool.release(stream)
+
+        normal = asyncio.create_task(wait_for("normal", PRIORITY_NORMAL))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(wait_for("interactive", PRIORITY_INTERACTIVE))
+        await _settle()
+        assert gradium.open_now == 1  # still only the first stream
+
+        pool.release(first)
+        await asyncio.gather(normal, interactive)
+        assert order == ["interactive", "normal"]
+        assert gradium.open_now <= 1
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+def test_acquire_times_out_when_capacity_is_held():
+    async def run():
+        pool = TTSSessionPool(FakeGradium(), max_concurrent=1, warm=0)
+        await pool.start()
+        held = await pool.acquire(timeout=1)
+        with pytest.raises(TimeoutError):
+            await pool.acquire(timeout=0.05)
+        assert not pool._waiters
+        pool.release(held)
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+def test_dead_idle_stream_is_recycled():
+    async def run():
+        gradium = FakeGradium()
+        pool = TTSSessionPool(gradium, max_concurrent=2, warm=1)
+        await pool.start()
+        await _settle()
+        gradium.streams[0].is_open = False  # provider dropped the idle session
+        stream = await pool.acquire(timeout=1)
+        assert stream.n == 2
+        await pool.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,112 @@
+"""Tests for the turn detector, STT recorder and offline replay harness."""
+
+from replay_turns import main as replay_main
+from replay_turns import replay_session
+from services.stt_recorder import STTRecorder, load_recording
+from services.turn_detector import TurnDetector, TurnParams
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _vad(p: float) -> list[dict]:
+    return [{"horizon_s": 0.5, "inactivity_prob": 0.99}, {"horizon_s": 2.0, "inactivity_prob": p}]
+
+
+def test_fires_after_vad_and_debounce():
+    clock = FakeClock()
+    det = TurnDetector(clock=clock)
+    det.on_text("take me")
+    clock.now += 0.3
+    det.on_text("to rome")
+    assert not det.on_step(_vad(0.2)).became_ready  # only short horizons are silent
+    clock.now += 0.1
+    assert det.on_step(_vad(0.9)).became_ready
+    clock.now += 0.3
+    assert det.poll() is None  # STT not settled for debounce_s yet
+    clock.now += 0.2
+    turn = det.poll()
+    assert turn is not None
+    assert turn.text == "take me to rome"
+    assert abs(turn.fired_at - turn.last_word_at - 0.6) < 1e-9
+    assert det.pending_text == ""
+
+
+def test_late_words_do_not_rearm_or_reset_debounce():
+    clock = FakeClock()
+    det = TurnDetector(clock=clock)
+    det.on_text("hello")
+    det.on_step(_vad(0.9))
+    clock.now += 0.6
+    assert det.poll() is not None
+    clock.now += 0.5
+    assert det.on_text("there")  # trailing word of the fired turn
+    assert not det.on_step(_vad(0.9)).became_ready  # within rearm guard
+    clock.now += 3.0
+    det.on_step(_vad(0.9))
+    assert det.poll() is None  # no counted word yet — waits for new speech
+
+
+def test_post_interrupt_debounce_is_longer():
+    clock = FakeClock()
+    det = TurnDetector(TurnParams(debounce_s=0.5, debounce_after_interrupt_s=1.5), clock=clock)
+    det.on_interrupt()
+    det.on_text("wait actually")
+    det.on_step(_vad(0.9))
+    clock.now += 1.0
+    assert det.poll() is None
+    clock.now += 0.6
+    turn = det.poll()
+    assert turn is not None and turn.post_interrupt and turn.debounce_s == 1.5
+
+
+def _record_session(path) -> None:
+    clock = FakeClock()
+    rec = STTRecorder(path, params=TurnParams().to_dict(), clock=clock)
+    # "show me the market" … pause … "in the morning" — split if debounce is short.
+    for t, kind, fields in [
+        (0.0, "text", {"text": "show me"}),
+        (0.3, "text", {"text": "the market"}),
+        (0.4, "step", {"vad": _vad(0.9)}),
+        (0.7, "step", {"vad": _vad(0.9)}),
+        (0.85, "text", {"text": "in the morning"}),
+        (1.0, "step", {"vad": _vad(0.9)}),
+        (1.2, "step", {"vad": _vad(0.9)}),
+        (1.5, "step", {"vad": _vad(0.9)}),
+        (2.0, "step", {"vad": _vad(0.9)}),
+        (2.5, "step", {"vad": _vad(0.9)}),
+        (2.5, "fired", {"text": "show me the market in the morning"}),
+    ]:
+        clock.now = 100.0 + t
+        rec.record(kind, **fields)
+    rec.close()
+
+
+def test_recording_roundtrip_and_replay(tmp_path):
+    path = tmp_path / "session.jsonl"
+    _record_session(path)
+    header, events = load_recording(path)
+    assert header["params"]["debounce_s"] == 0.5
+    assert len(events) == 11
+
+    default = replay_session(events, TurnParams())
+    assert [t.text for t in default.turns] == ["show me the market in the morning"]
+    assert default.splits == 0 and default.live_turns == 1
+
+    eager = replay_session(events, TurnParams(debounce_s=0.25))
+    assert [t.text for t in eager.turns] == ["show me the market"]
+    assert eager.splits == 1
+    assert eager.pending == 1  # "in the morning" never fired (late word)
+
+
+def test_replay_cli_sweeps_grid(tmp_path, capsys):
+    path = tmp_path / "session.jsonl"
+    _record_session(path)
+    assert replay_main([str(path), "--debounce", "0.25,0.5", "--threshold", "0.7"]) == 0
+    out = capsys.readouterr().out
+    assert "2 parameter set(s)" in out
@@ -0,0 +1,46 @@
+"""Tests for shared upstream clients (mocked transport — no network)."""
+
+import asyncio
+
+import httpx
+
+from services.deezer_service import DeezerService
+from services.upstream_clients import PoolConfig, PooledHTTPClient, http2_available
+from services.world_labs import WorldLabsService
+
+
+def test_services_reuse_injected_client():
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.host == "api.deezer.com":
+            return httpx.Response(200, json={"data": [{"preview": "https://cdn/x.mp3", "title": "T"}]})
+        return httpx.Response(200, json={"operation_id": "op_1", "done": False})
+
+    async def run() -> tuple[list, bool]:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        world_labs = WorldLabsService(api_key="WLT-test", client=client)
+        deezer = DeezerService(client=client)
+        await world_labs.fetch_operation("op_1")
+        await world_labs.fetch_operation("op_1")
+        tracks = await deezer.search_tracks("rome")
+        await client.aclose()
+        return tracks, client.is_closed
+
+    tracks, closed = asyncio.run(run())
+    assert seen == ["/marble/v1/operations/op_1", "/marble/v1/operations/op_1", "/search"]
+    assert tracks[0]["preview_url"] == "https://cdn/x.mp3"
+    assert closed  # services never close a client they were given
+
+
+def test_pooled_client_stats_and_http2_fallback():
+    async def run() -> dict:
+        pooled = PooledHTTPClient("test_upstream", PoolConfig(max_keepalive=4, http2=True), timeout=5)
+        stats = pooled.pool_stats()
+        await pooled.aclose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["http2"] == http2_available()
+    assert stats["connections"] == 0 and stats["requests"] == 0
@@ -0,0 +1,251 @@
+"""Tests for /ws/voice framing (binary audio frames + legacy JSON)."""
+
+import asyncio
+import base64
+import json
+
+import pytest
+
+from services import metrics
+from services.voice_transport import (
+    AUDIO_LANE_MAX,
+    FRAMING_BINARY,
+    FRAMING_JSON,
+    HEADER_SIZE,
+    InboundAudioLane,
+    STREAM_MIC_AUDIO,
+    STREAM_TTS_AUDIO,
+    VoiceTransport,
+    decode_audio_frame,
+    encode_audio_frame,
+    response_num,
+)
+
+
+class FakeWebSocket:
+    """Minimal stand-in for starlette's WebSocket send/receive surface."""
+
+    def __init__(self, inbound: list[dict] | None = None):
+        self.inbound = list(inbound or [])
+        self.sent: list[str | bytes] = []
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def receive(self) -> dict:
+        return self.inbound.pop(0)
+
+
+def test_frame_roundtrip():
+    pcm = bytes(range(256)) * 30
+    frame = encode_audio_frame(STREAM_TTS_AUDIO, 7, 1739000000, pcm)
+    assert len(frame) == HEADER_SIZE + len(pcm)
+    stream, seq, resp, payload = decode_audio_frame(frame)
+    assert (stream, seq, resp) == (STREAM_TTS_AUDIO, 7, 1739000000)
+    assert payload == pcm
+
+
+def test_frame_seq_wraps():
+    frame = encode_audio_frame(STREAM_MIC_AUDIO, 65536 + 3, 0, b"")
+    assert decode_audio_frame(frame)[1] == 3
+
+
+def test_frame_rejects_truncated():
+    with pytest.raises(ValueError):
+        decode_audio_frame(b"\x01\x01")
+
+
+def test_response_num():
+    assert response_num("resp-1739000123") == 1739000123
+    assert response_num("legacy") == 0
+
+
+def test_binary_audio_out_is_smaller():
+    pcm = b"\x00\x01" * 3840
+    ws_bin, ws_json = FakeWebSocket(), FakeWebSocket()
+    bin_t = VoiceTransport(ws_bin, framing=FRAMING_BINARY)
+    json_t = VoiceTransport(ws_json, framing=FRAMING_JSON)
+
+    async def send(transport: VoiceTransport) -> None:
+        transport.start()
+        await transport.send_json({"type": "response_start", "responseId": "resp-42"})
+        await transport.send_audio(pcm, "resp-42")
+        await transport.close(flush_timeout=1.0)
+
+    asyncio.run(send(bin_t))
+    asyncio.run(send(json_t))
+    ws_bin.sent.pop(0)
+    ws_json.sent.pop(0)
+
+    assert isinstance(ws_bin.sent[0], bytes)
+    assert decode_audio_frame(ws_bin.sent[0])[2] == 42
+    legacy = json.loads(ws_json.sent[0])
+    assert base64.b64decode(legacy["data"]) == pcm
+    assert bin_t.stats.audio_out_bytes < json_t.stats.audio_out_bytes
+    print(f"\n  binary: {bin_t.stats.summary()}\n  json:   {json_t.stats.summary()}")
+
+
+def test_receive_both_framings():
+    pcm = b"\x10\x20" * 1920
+    ws = FakeWebSocket([
+        {"type": "websocket.receive", "bytes": encode_audio_frame(STREAM_MIC_AUDIO, 0, 0, pcm)},
+        {"type": "websocket.receive", "text": json.dumps({"type": "audio", "data": base64.b64encode(pcm).decode()})},
+        {"type": "websocket.receive", "text": json.dumps({"type": "phase", "phase": "exploring"})},
+    ])
+    transport = VoiceTransport(ws, framing=FRAMING_BINARY)
+
+    assert asyncio.run(transport.receive()) == ("audio", pcm)
+    assert asyncio.run(transport.receive()) == ("audio", pcm)
+    assert asyncio.run(transport.receive()) == ("json", {"type": "phase", "phase": "exploring"})
+    assert transport.stats.audio_in_frames == 2
+
+
+def test_unknown_framing_falls_back_to_json():
+    assert VoiceTransport(FakeWebSocket(), framing="msgpack").framing == FRAMING_JSON
+
+
+def test_control_jumps_ahead_of_queued_audio():
+    """Queued audio is written after control messages enqueued later."""
+    async def run() -> list:
+        ws = FakeWebSocket()
+        transport = VoiceTransport(ws, framing=FRAMING_BINARY)
+        await transport.send_json({"type": "response_start", "responseId": "resp-1"})
+        for _ in range(5):
+            await transport.send_audio(b"\x00" * 16, "resp-1")
+        await transport.send_json({"type": "world_status", "status": "ready"})
+        transport.start()
+        await transport.close(flush_timeout=1.0)
+        return ws.sent
+
+    sent = asyncio.run(run())
+    assert json.loads(sent[0])["type"] == "response_start"
+    assert json.loads(sent[1])["type"] == "world_status"
+    assert all(isinstance(frame, bytes) for frame in sent[2:])
+
+
+def test_superseded_audio_is_dropped():
+    """Audio from a response replaced by a newer response_start never hits the wire."""
+    async def run() -> tuple[list, VoiceTransport]:
+        ws = FakeWebSocket()
+        transport = VoiceTransport(ws, framing=FRAMING_BINARY)
+        await transport.send_json({"type": "response_start", "responseId": "resp-1"})
+        for _ in range(10):
+            await transport.send_audio(b"\x00" * 16, "resp-1")
+        await transport.send_json({"type": "response_start", "responseId": "resp-2"})
+        await transport.send_audio(b"\x01" * 16, "resp-2")
+        transport.start()
+        await transport.close(flush_timeout=1.0)
+        return ws.sent, transport
+
+    sent, transport = asyncio.run(run())
+    frames = [frame for frame in sent if isinstance(frame, bytes)]
+    assert [decode_audio_frame(f)[2] for f in frames] == [2]
+    assert transport.queue_stats.dropped_stale == 11  # 10 audio + stale response_start
+
+
+def test_cancel_audio_drops_queue():
+    async def run() -> VoiceTransport:
+        transport = VoiceTransport(FakeWebSocket(), framing=FRAMING_JSON)
+        await transport.send_json({"type": "response_start", "responseId": "resp-1"})
+        await transport.send_audio(b"\x00" * 16, "resp-1")
+        await transport.cancel_audio()
+        transport.start()
+        await transport.close(flush_timeout=1.0)
+        return transport
+
+    transport = asyncio.run(run())
+    assert transport.stats.audio_out_frames == 0
+
+
+def test_send_failure_wakes_producer_waiting_on_full_lane():
+    """A dead socket must release a producer blocked on a full audio lane."""
+    class DyingWebSocket(FakeWebSocket):
+        def __init__(self):
+            super().__init__()
+            self.fail = asyncio.Event()
+
+        async def send_bytes(self, data: bytes) -> None:
+            await self.fail.wait()
+            raise RuntimeError("connection reset")
+
+    async def run() -> VoiceTransport:
+        ws = DyingWebSocket()
+        transport = VoiceTransport(ws, framing=FRAMING_BINARY)
+        await transport.send_json({"type": "response_start", "responseId": "resp-1"})
+        transport.start()
+        await transport.send_audio(b"\x00" * 16, "resp-1")
+        while transport.queue_depth:  # the writer takes it and stalls in send
+            await asyncio.sleep(0)
+        for _ in range(AUDIO_LANE_MAX):
+            await transport.send_audio(b"\x00" * 16, "resp-1")
+        blocked = asyncio.create_task(transport.send_audio(b"\x00" * 16, "resp-1"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        ws.fail.set()
+        await asyncio.wait_for(blocked, timeout=1.0)
+        await transport.close()
+        return transport
+
+    transport = asyncio.run(run())
+    assert transport.closed.is_set()
+    assert transport.queue_stats.dropped_closed == 1
+
+
+def test_inbound_lane_never_blocks_and_drops_oldest():
+    """A stalled STT send must not block put(); overflow drops the oldest chunk."""
+    async def run() -> tuple[list[bytes], InboundAudioLane]:
+        release = asyncio.Event()
+        forwarded: list[bytes] = []
+
+        async def slow_send(pcm: bytes) -> None:
+            await release.wait()
+            forwarded.append(pcm)
+
+        lane = InboundAudioLane(slow_send, maxsize=3)
+        lane.start()
+        for i in range(6):
+            lane.put(bytes([i]))
+            await asyncio.sleep(0)
+        release.set()
+        while lane.depth:
+            await asyncio.sleep(0.01)
+        await lane.close()
+        return forwarded, lane
+
+    forwarded, lane = asyncio.run(run())
+    # Chunk 0 was already in flight when STT stalled; 1 and 2 were dropped.
+    assert forwarded == [bytes([0]), bytes([3]), bytes([4]), bytes([5])]
+    assert lane.stats.dropped_overflow == 2
+    assert lane.stats.max_depth == 3
+
+
+def test_inbound_lane_lag_and_depth_reach_metrics():
+    async def run() -> tuple[float, int]:
+        release = asyncio.Event()
+
+        async def slow_send(pcm: bytes) -> None:
+            await release.wait()
+
+        lane = InboundAudioLane(slow_send, maxsize=2)
+        lane.start()
+        for i in range(4):
+            lane.put(bytes([i]))
+            await asyncio.sleep(0)
+        depth = metrics.INBOUND_AUDIO_DEPTH.value - depth_before
+        release.set()
+        while lane.depth:
+            await asyncio.sleep(0.01)
+        await lane.close()
+        return depth, metrics.INBOUND_AUDIO_LAG.count - lag_before
+
+    depth_before = metrics.INBOUND_AUDIO_DEPTH.value
+    lag_before = metrics.INBOUND_AUDIO_LAG.count
+    dropped_before = metrics.INBOUND_AUDIO_DROPPED.value
+    depth, lagged = asyncio.run(run())
+    assert depth == 2  # chunk 0 in flight, 1 dropped, 2 and 3 waiting
+    assert lagged == 3
+    assert metrics.INBOUND_AUDIO_DROPPED.value - dropped_before == 1
+    assert metrics.INBOUND_AUDIO_DEPTH.value == depth_before
@@ -0,0 +1,134 @@
+"""Tests for the completed-world cache, HTTP caching and SSE on /api/worlds."""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import worlds
+from services.operation_registry import OperationRegistry
+from services.ttl_cache import TTLCache
+from tests.test_operation_registry import FakeWorldLabs
+
+
+class FakeWorldLabsWithAssets(FakeWorldLabs):
+    def __init__(self, polls_until_done: int = 1):
+        super().__init__(polls_until_done=polls_until_done)
+        self.world_fetches = 0
+
+    async def get_world_assets(self, world_id: str) -> dict:
+        self.world_fetches += 1
+        return {
+            "world_id": world_id,
+            "display_name": "Rome",
+            "assets": {"splats": {"spz_urls": {"500k": "https://cdn/500k.spz"}}},
+        }
+
+
+def test_ttl_cache_lru_and_expiry():
+    now = [0.0]
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_s=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # a is now most recent
+    cache.set("c", 3)       # evicts b
+    assert "b" not in cache and cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is None and len(cache) == 1  # c still stored, expires lazily
+
+
+def _client(world_labs: FakeWorldLabsWithAssets) -> TestClient:
+    app = FastAPI()
+    app.include_router(worlds.router)
+    app.state.operations = OperationRegistry(world_labs, min_interval_s=0.01, max_interval_s=0.02)
+    return TestClient(app)
+
+
+def test_ready_status_is_cached_with_etag_and_304():
+    world_labs = FakeWorldLabsWithAssets()
+    client = _client(world_labs)
+
+    first = client.get("/api/worlds/status/op_1")
+    assert first.status_code == 200
+    assert first.json()["status"] == "ready"
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and "max-age=" in first.headers["cache-control"]
+
+    again = client.get("/api/worlds/status/op_1")
+    assert again.headers["etag"] == etag
+    not_modified = client.get("/api/worlds/status/op_1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # One operation fetch and one world fetch, however many times it's loaded.
+    assert world_labs.fetches == 1
+    assert world_labs.world_fetches == 1
+
+
+def test_generating_status_is_not_cacheable():
+    client = _client(FakeWorldLabsWithAssets(polls_until_done=1000))
+    response = client.get("/api/worlds/status/op_2")
+    assert response.json()["status"] == "generating"
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+
+def _sse_statuses(client: TestClient, path: str) -> list[dict]:
+    statuses = []
+    with client.stream("GET", path) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                statuses.append(json.loads(line[len("data: "):]))
+    return statuses
+
+
+def test_stream_pushes_generating_then_ready_from_the_shared_poller():
+    world_labs = FakeWorldLabsWithAssets(polls_until_done=3)
+    client = _client(world_labs)
+
+    statuses = _sse_statuses(client, "/api/worlds/stream/op_3")
+    assert [s["status"] for s in statuses] == ["generating", "ready"]
+    assert statuses[-1]["assets"]["default_spz_url"] == "https://cdn/500k.spz"
+    # Late subscriber: served the finished state straight away.
+    assert [s["status"] for s in _sse_statuses(client, "/api/worlds/stream/op_3")] == ["ready"]
+    assert world_labs.fetches == 3
+
+
+def test_stream_reports_unknown_operation_as_error_event():
+    client = _client(FakeWorldLabsWithAssets())
+    client.app.state.operations.world_labs.status_code = 404
+    [status] = _sse_statuses(client, "/api/worlds/stream/op_missing")
+    assert status["status"] == "error" and status["done"]
+
+
+class FakeWorldLabsWithMissing(FakeWorldLabsWithAssets):
+    async def fetch_operation(self, operation_id: str) -> dict:
+        self.status_code = 404 if operation_id.startswith("missing") else 200
+        return await super().fetch_operation(operation_id)
+
+
+def test_batch_status_reports_per_item_and_reuses_cache():
+    world_labs = FakeWorldLabsWithMissing()
+    client = _client(world_labs)
+    client.get("/api/worlds/status/op_a")  # warm: op_a finished and cached
+
+    response = client.post(
+        "/api/worlds/status:batch",
+        json={"operation_ids": ["op_a", "missing_1", "op_a", "op_b"]},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["operation_id"] for r in results] == ["op_a", "missing_1", "op_a", "op_b"]
+    assert results[0]["status"]["status"] == "ready" and results[0]["error"] is None
+    assert results[1]["status"] is None and "404" in results[1]["error"]
+    assert results[3]["status"]["world_id"] == "world_1"
+    # op_a from cache, op_a deduped: one fetch each for op_a (warm-up), missing_1, op_b.
+    assert world_labs.fetches == 3
+
+
+def test_batch_status_rejects_oversized_requests():
+    client = _client(FakeWorldLabsWithAssets())
+    too_many = [f"op_{i}" for i in range(worlds.BATCH_MAX_OPERATIONS + 1)]
+    assert client.post("/api/worlds/status:batch", json={"operation_ids": too_many}).status_code == 422
+    assert client.post("/api/worlds/status:batch", json={"operation_ids": []}).status_code == 422
@@ -0,0 +1,166 @@
+"""Tests for content-addressed world reuse and the nearby-world index."""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import worlds
+from services.operation_registry import OperationRegistry
+from services.world_catalog import STATUS_READY, WorldCatalog, normalize_text, world_key
+from tests.test_operation_registry import FakeWorldLabs
+
+
+class FakeGeneratingWorldLabs(FakeWorldLabs):
+    def __init__(self, polls_until_done: int = 1, fail: bool = False):
+        super().__init__(polls_until_done=polls_until_done)
+        self.generations = 0
+        self.fail = fail
+
+    async def generate_world(self, scene_description: str, display_name: str, model: str) -> str:
+        self.generations += 1
+        await asyncio.sleep(0)
+        return f"op_{self.generations}"
+
+    async def fetch_operation(self, operation_id: str) -> dict:
+        operation = await super().fetch_operation(operation_id)
+        if self.fail and operation["done"]:
+            operation.update(error={"message": "content policy"}, response=None)
+        return operation
+
+
+def _registry(world_labs: FakeWorldLabs, catalog: WorldCatalog) -> OperationRegistry:
+    return OperationRegistry(world_labs, catalog=catalog, min_interval_s=0.01, max_interval_s=0.02)
+
+
+ROME = dict(location="Rome, Italy", time_period="Ancient Rome")
+
+
+def test_world_key_ignores_case_punctuation_and_filler():
+    assert normalize_text("The Forum, at DUSK!") == "forum dusk"
+    assert world_key("The Forum at dusk.", **ROME) == world_key("forum   DUSK", **ROME)
+    assert world_key("forum dusk", **ROME) != world_key("forum dusk", location="Athens")
+    assert world_key("forum dusk", model="Marble 0.1-mini") != world_key("forum dusk", model="Marble 0.1-plus")
+
+
+def test_finished_world_is_reused_without_generating():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs()
+        catalog = WorldCatalog()
+        registry = _registry(world_labs, catalog)
+        first = await registry.start_generation("The Forum at dusk", **ROME, lat=41.9, lng=12.5, year=-44)
+        await registry.wait(first.operation_id)
+        second = await registry.start_generation("forum, dusk", **ROME)
+        state = await registry.current(second.operation_id)
+        await registry.stop()
+        return world_labs, catalog, first, second, state
+
+    world_labs, catalog, first, second, state = asyncio.run(run())
+    assert world_labs.generations == 1
+    assert first.reused is None
+    assert second.reused == "ready" and second.world_id == "world_1"
+    assert second.operation_id == first.operation_id and state.done
+    [entry] = catalog.ready_entries()
+    assert entry.status == STATUS_READY and entry.year == -44
+
+
+def test_concurrent_equivalent_requests_share_one_generation():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs(polls_until_done=1000)
+        registry = _registry(world_labs, WorldCatalog())
+        results = await asyncio.gather(
+            *(registry.start_generation("forum at dusk", **ROME) for _ in range(3))
+        )
+        # Once started (catalog row present), later callers attach as well.
+        later = await registry.start_generation("Forum at dusk", **ROME)
+        await registry.stop()
+        return world_labs, results, later
+
+    world_labs, results, later = asyncio.run(run())
+    assert world_labs.generations == 1
+    assert {r.operation_id for r in results} == {"op_1"} == {later.operation_id}
+    assert sorted(str(r.reused) for r in results) == ["None", "in_flight", "in_flight"]
+    assert later.reused == "in_flight"
+
+
+def test_fresh_bypasses_catalog():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs()
+        registry = _registry(world_labs, WorldCatalog())
+        first = await registry.start_generation("forum at dusk", **ROME)
+        await registry.wait(first.operation_id)
+        fresh = await registry.start_generation("forum at dusk", **ROME, fresh=True)
+        await registry.stop()
+        return world_labs, fresh
+
+    world_labs, fresh = asyncio.run(run())
+    assert world_labs.generations == 2
+    assert fresh.reused is None and fresh.operation_id == "op_2"
+
+
+def test_failed_generation_is_not_reused():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs(fail=True)
+        catalog = WorldCatalog()
+        registry = _registry(world_labs, catalog)
+        first = await registry.start_generation("forum at dusk", **ROME)
+        state = await registry.wait(first.operation_id)
+        retry = await registry.start_generation("forum at dusk", **ROME)
+        await registry.stop()
+        return world_labs, catalog, state, retry
+
+    world_labs, catalog, state, retry = asyncio.run(run())
+    assert state.error
+    assert retry.reused is None and world_labs.generations == 2
+    assert catalog.by_operation("op_1") is None
+
+
+def _ready(catalog: WorldCatalog, n: int, location: str, lat: float, lng: float, year: float) -> None:
+    key = world_key(f"scene {n}", location=location)
+    catalog.record_started(key, f"op_{n}", location=location, lat=lat, lng=lng, year=year)
+    catalog.mark_ready(f"op_{n}", f"world_{n}")
+
+
+def test_nearby_filters_by_radius_and_year_closest_first():
+    catalog = WorldCatalog()
+    _ready(catalog, 1, "Colosseum", 41.8902, 12.4922, 80)
+    _ready(catalog, 2, "Pantheon", 41.8986, 12.4769, 125)
+    _ready(catalog, 3, "Rome 1960", 41.9, 12.5, 1960)
+    _ready(catalog, 4, "Naples", 40.85, 14.27, 79)
+    _ready(catalog, 5, "Fiji", -17.7, 179.9, 1900)  # antimeridian neighbour of 6
+    _ready(catalog, 6, "Taveuni", -16.8, -179.95, 1900)
+
+    found = catalog.nearby(41.8986, 12.4769, year=100, radius_km=50, years=50)
+    assert [n.entry.world_id for n in found] == ["world_2", "world_1"]
+    assert found[0].distance_km < 0.01 and found[1].year_delta == 20
+
+    assert [n.entry.world_id for n in catalog.nearby(41.9, 12.5, radius_km=300)][-1] == "world_4"
+    assert [n.entry.world_id for n in catalog.nearby(-17.0, 179.99, radius_km=150)] == ["world_6", "world_5"]
+    assert len(catalog.nearby(0, 0, radius_km=20_000, limit=50)) == 6
+
+
+def test_nearby_index_tracks_catalog_changes(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    catalog = WorldCatalog(path)
+    _ready(catalog, 1, "Colosseum", 41.89, 12.49, 80)
+    catalog.record_started(world_key("pending", location="Forum"), "op_2", lat=41.89, lng=12.48, year=80)
+    assert len(catalog.index) == 1
+    catalog.close()
+
+    reopened = WorldCatalog(path)  # index rebuilt from the ready rows
+    assert [n.entry.world_id for n in reopened.nearby(41.89, 12.49)] == ["world_1"]
+    reopened.mark_failed("op_1")
+    assert reopened.nearby(41.89, 12.49) == []
+
+
+def test_nearby_endpoint():
+    app = FastAPI()
+    app.include_router(worlds.router)
+    app.state.world_catalog = WorldCatalog()
+    _ready(app.state.world_catalog, 1, "Colosseum", 41.89, 12.49, 80)
+    client = TestClient(app)
+
+    body = client.get("/api/worlds/nearby", params={"lat": 41.9, "lng": 12.5, "year": 100}).json()
+    assert body["worlds"][0]["world_id"] == "world_1"
+    assert body["worlds"][0]["operation_id"] == "op_1"
+    assert client.get("/api/worlds/nearby", params={"lat": 95, "lng": 0}).status_code == 422
@@ -1,5 +1,8 @@
 """Tests for World Labs service (mocked — no real API calls to save credits)."""
 
+import asyncio
+
+import httpx
 import pytest
 
 from services.world_labs import WorldLabsService
@@ -125,3 +128,38 @@ def test_world_data_structure():
     assert "caption" in assets
     assert "thumbnail_url" in assets
     assert len(assets["splats"]["spz_urls"]) == 3  # 100k, 500k, full_res
+
+
+class RangeIgnoringCdn(httpx.AsyncBaseTransport):
+    """Rejects HEAD and answers the ranged GET with the full body (200)."""
+
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "HEAD":
+            return httpx.Response(403)
+        cdn = self
+
+        class Body(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                for _ in range(cdn.chunks):
+                    cdn.sent += 1
+                    yield b"\0" * 65536
+
+        return httpx.Response(200, headers={"content-length": str(self.chunks * 65536)}, stream=Body())
+
+
+def test_size_probe_does_not_download_when_range_is_ignored():
+    """A 200 to the ranged GET is closed unread, on the assets client."""
+    cdn = RangeIgnoringCdn(chunks=100)
+
+    async def run():
+        assets = httpx.AsyncClient(transport=cdn)
+        api = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: pytest.fail("probe used the API client")))
+        svc = WorldLabsService(api_key="k", client=api, assets_client=assets)
+        return await svc.probe_asset_size("https://cdn.worldlabs.ai/w/full.spz?sig=x")
+
+    assert asyncio.run(run()) is None
+    assert cdn.sent == 0
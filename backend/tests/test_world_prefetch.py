@@ -0,0 +1,100 @@
+"""Tests for speculative globe-phase world pre-generation (fake World Labs)."""
+
+import asyncio
+
+from services.operation_registry import OperationRegistry
+from services.world_prefetch import WorldPrefetcher
+from tests.test_world_catalog import FakeGeneratingWorldLabs
+
+ROME = dict(location="Rome", lat=41.9, lng=12.5, year=100, time_period="Roman Empire")
+PARIS = dict(location="Paris", lat=48.86, lng=2.35, year=1889, time_period="Belle Époque")
+
+
+def _prefetcher(world_labs, **kwargs) -> WorldPrefetcher:
+    registry = OperationRegistry(world_labs, min_interval_s=0.01, max_interval_s=0.02)
+    return WorldPrefetcher(registry, settle_s=0.01, **kwargs)
+
+
+async def _settle(prefetcher: WorldPrefetcher) -> None:
+    await asyncio.sleep(prefetcher.settle_s * 5)
+
+
+def test_settled_location_is_prefetched_and_adopted():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs(polls_until_done=1000)
+        prefetcher = _prefetcher(world_labs)
+        session = prefetcher.session()
+        session.request(**ROME)
+        await _settle(prefetcher)
+        adopted = prefetcher.adopt(lat=41.89, lng=12.49, year=110)
+        miss = prefetcher.adopt(lat=41.89, lng=12.49, year=1900)
+        await prefetcher.operations.stop()
+        return world_labs, adopted, miss
+
+    world_labs, adopted, miss = asyncio.run(run())
+    assert world_labs.generations == 1
+    assert adopted.operation_id == "op_1" and adopted.reused == "prefetched"
+    assert miss is None
+
+
+def test_rapid_changes_only_prefetch_the_final_pick():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs(polls_until_done=1000)
+        prefetcher = _prefetcher(world_labs)
+        session = prefetcher.session()
+        session.request(**PARIS)
+        session.request(**ROME)  # before Paris settled
+        await _settle(prefetcher)
+        session.request(**ROME)  # same place again: no new job
+        await _settle(prefetcher)
+        await prefetcher.operations.stop()
+        return world_labs, session
+
+    world_labs, session = asyncio.run(run())
+    assert world_labs.generations == 1
+    assert session.job.location == "Rome" and session.started == 1
+
+
+def test_budgets_cap_speculative_spend():
+    async def run():
+        world_labs = FakeGeneratingWorldLabs(polls_until_done=1000)
+        prefetcher = _prefetcher(world_labs, session_budget=1, global_budget=2)
+        first = prefetcher.session()
+        first.request(**ROME)
+        await _settle(prefetcher)
+        first.request(**PARIS)  # session budget spent
+        await _settle(prefetcher)
+        abandoned = first.job is None
+
+        others = [prefetcher.session() for _ in range(2)]
+        others[0].request(location="Athens", lat=37.97, lng=23.73, year=-400)
+        others[1].request(location="Cairo", lat=30.04, lng=31.24, year=-2500)  # global budget full
+        await _settle(prefetcher)
+        await prefetcher.operations.stop()
+        return world_labs, abandoned, others
+
+    world_labs, abandoned, others = asyncio.run(run())
+    assert world_labs.generations == 2
+    assert abandoned
+    assert others[0].job is not None and others[1].job is None
+
+
+def test_disabled_and_aged_out_jobs_are_not_adopted():
+    async def run():
+        now = [0.0]
+        world_labs = FakeGeneratingWorldLabs(polls_until_done=1000)
+        prefetcher = _prefetcher(world_labs, max_age_s=60, clock=lambda: now[0])
+        prefetcher.session().request(**ROME)
+        await _settle(prefetcher)
+        now[0] = 61
+        aged = prefetcher.adopt(lat=41.9, lng=12.5, year=100)
+
+        disabled = _prefetcher(world_labs, enabled=False)
+        disabled.session().request(**ROME)
+        await _settle(disabled)
+        await prefetcher.operations.stop()
+        return world_labs, aged
+
+    world_labs, aged = asyncio.run(run())
+    assert aged is None
+    assert world_labs.generations == 1
@@ -265,7 +265,16 @@ function App() {
 
     void (async () => {
       try {
-        const result = await generateWorld(worldDescription, abortController.signal);
+        // Read at call time so a late selection change doesn't restart the effect.
+        const target = useAppStore.getState().location;
+        const { selectedEra: era, selectedYear: year } = useSelectionStore.getState();
+        const result = await generateWorld(worldDescription, abortController.signal, {
+          location: target?.name,
+          timePeriod: era,
+          lat: target?.lat,
+          lng: target?.lng,
+          year,
+        });
         if (abortController.signal.aborted) return;
         console.log('[WORLD] generation complete, switching to exploring:', {
           worldId: result.worldId,
@@ -273,6 +282,7 @@ function App() {
           defaultSpzUrl: result.assets.defaultSpzUrl,
           marbleUrl: result.assets.worldMarbleUrl,
           spzVariants: Object.keys(result.assets.spzUrls),
+          lodLadder: result.assets.lodLadder.map((rung) => rung.resolution),
         });
 
         setRenderableWorldData(result.worldId, {
@@ -283,6 +293,7 @@ function App() {
           thumbnailUrl: result.assets.thumbnailUrl,
           caption: result.assets.caption,
           worldMarbleUrl: result.assets.worldMarbleUrl,
+          lodLadder: result.assets.lodLadder,
         });
         setPhase('exploring');
       } catch (err) {
@@ -6,11 +6,18 @@
  *
  * Protocol (matches backend/routers/voice.py):
  *   Outbound: audio, context, phase, interrupt
- *   Inbound:  transcript, audio, guide_text, fact, world_status, music, suggested_location, interrupt
+ *   Inbound:  session_config, transcript, audio, guide_text, fact, world_status, music, suggested_location, interrupt
+ *
+ * Framing (matches backend/services/voice_transport.py): we connect with
+ * ?framing=binary. Once the backend acks with session_config, PCM audio in
+ * both directions travels as binary frames with an 8-byte header instead of
+ * base64 JSON. Until the ack (or against an older backend) we stay on JSON.
  */
 
 import { AudioCaptureService } from "./AudioCaptureService";
 import { AudioPlaybackService } from "./AudioPlaybackService";
+import { clientHintsParams } from "../utils/clientHints";
+import type { RenderableAssetsResponse } from "../utils/worldGeneration";
 
 export type ConnectionStatus =
   | "disconnected"
@@ -27,6 +34,8 @@ export type VoiceEventMap = {
     worldId?: string,
     splatUrl?: string,
   ) => void;
+  /** Progressive generation: higher-quality assets for the world being explored. */
+  worldUpgrade: (worldId: string, assets: RenderableAssetsResponse) => void;
   music: (msg: MusicMessage) => void;
   suggestedLocation: (lat: number, lng: number, name: string, year?: number) => void;
   sessionSummary: (userProfile: string, worldDescription: string) => void;
@@ -55,6 +64,12 @@ type Listener = (...args: never[]) => void;
 let audioChunksSent = 0;
 let msgCount = 0;
 
+// Binary audio frame header — keep in sync with backend/services/voice_transport.py
+const FRAME_HEADER_SIZE = 8;
+const FRAME_VERSION = 1;
+const STREAM_MIC_AUDIO = 1;
+const STREAM_TTS_AUDIO = 2;
+
 export class VoiceConnection {
   private ws: WebSocket | null = null;
   private capture = new AudioCaptureService();
@@ -68,6 +83,9 @@ export class VoiceConnection {
   private firstAudioForResponse = true;
   /** Mic mute state (currently always on — spacebar PTT removed). */
   private _muted = false;
+  /** True once the backend acked binary framing via session_config. */
+  private binaryFraming = false;
+  private micSeq = 0;
 
   get status(): ConnectionStatus {
     return this._status;
@@ -86,9 +104,15 @@ export class VoiceConnection {
     this.setStatus("connecting");
 
     const proto = window.location.protocol === "https:" ? "wss:" : "ws:";
-    const url = `${proto}//${window.location.host}/ws/voice`;
+    // Splat LOD hints ride along so world_status assets fit this device.
+    const params = clientHintsParams();
+    params.set("framing", "binary");
+    const url = `${proto}//${window.location.host}/ws/voice?${params}`;
     console.log("[VC] Connecting to:", url);
+    this.binaryFraming = false;
+    this.micSeq = 0;
     this.ws = new WebSocket(url);
+    this.ws.binaryType = "arraybuffer";
 
     this.ws.onopen = async () => {
       console.log("[VC] WebSocket opened");
@@ -100,13 +124,17 @@ export class VoiceConnection {
           (pcmBytes: ArrayBuffer) => {
             if (this.ws?.readyState === WebSocket.OPEN) {
               audioChunksSent++;
-              const base64 = arrayBufferToBase64(pcmBytes);
               if (audioChunksSent <= 3 || audioChunksSent % 100 === 0) {
                 console.log(
-                  `[VC→BE] Audio #${audioChunksSent}: ${pcmBytes.byteLength}B`,
+                  `[VC→BE] Audio #${audioChunksSent}: ${pcmBytes.byteLength}B (${this.binaryFraming ? "binary" : "json"})`,
                 );
               }
-              this.ws.send(JSON.stringify({ type: "audio", data: base64 }));
+              if (this.binaryFraming) {
+                this.ws.send(encodeAudioFrame(STREAM_MIC_AUDIO, this.micSeq++, 0, pcmBytes));
+              } else {
+                const base64 = arrayBufferToBase64(pcmBytes);
+                this.ws.send(JSON.stringify({ type: "audio", data: base64 }));
+              }
             }
           },
           undefined, // VAD not used for interrupt — speech-based interrupt via STT transcript
@@ -125,6 +153,10 @@ export class VoiceConnection {
     };
 
     this.ws.onmessage = (event: MessageEvent) => {
+      if (event.data instanceof ArrayBuffer) {
+        this.handleBinaryFrame(event.data);
+        return;
+      }
       try {
         const msg = JSON.parse(event.data as string) as Record<
           string,
@@ -255,6 +287,13 @@ export class VoiceConnection {
     msgCount++;
 
     switch (msg.type) {
+      case "session_config":
+        this.binaryFraming = msg.framing === "binary" && msg.frameVersion === FRAME_VERSION;
+        console.log(
+          `[BE→VC] #${msgCount} SESSION_CONFIG: framing=${this.binaryFraming ? "binary" : "json"}`,
+        );
+        break;
+
       case "response_start":
         // New response starting — update active ID and clear any leftover playback
         this.activeResponseId = msg.responseId as string;
@@ -295,17 +334,7 @@ export class VoiceConnection {
           break;
         }
         const dataStr = msg.data as string;
-        const pcm = base64ToArrayBuffer(dataStr);
-        if (msgCount <= 5 || msgCount % 50 === 0) {
-          console.log(
-            `[BE→VC] #${msgCount} AUDIO: ${pcm.byteLength}B, playback.isPlaying=${this.playback.isPlaying}`,
-          );
-        }
-        this.playback.playChunk(pcm);
-        if (this.firstAudioForResponse) {
-          this.firstAudioForResponse = false;
-          this.emit("audioPlaybackStart");
-        }
+        this.playAudio(base64ToArrayBuffer(dataStr));
         break;
       }
 
@@ -337,6 +366,13 @@ export class VoiceConnection {
           msg.worldId as string | undefined,
           msg.splatUrl as string | undefined,
         );
+        if (msg.status === "upgrade_ready" && msg.worldId && msg.worldAssets) {
+          this.emit(
+            "worldUpgrade",
+            msg.worldId as string,
+            msg.worldAssets as RenderableAssetsResponse,
+          );
+        }
         break;
 
       case "music": {
@@ -419,6 +455,42 @@ export class VoiceConnection {
     }
   }
 
+  private handleBinaryFrame(frame: ArrayBuffer): void {
+    msgCount++;
+    if (frame.byteLength < FRAME_HEADER_SIZE) return;
+    const view = new DataView(frame);
+    const stream = view.getUint8(0);
+    const version = view.getUint8(1);
+    if (stream !== STREAM_TTS_AUDIO || version !== FRAME_VERSION) {
+      console.log(`[BE→VC] #${msgCount} UNKNOWN binary frame: stream=${stream} v=${version}`);
+      return;
+    }
+    const responseId = `resp-${view.getUint32(4, true)}`;
+    if (responseId !== this.activeResponseId) {
+      this.droppedAudioCount++;
+      if (this.droppedAudioCount <= 3) {
+        console.log(
+          `[BE→VC] #${msgCount} AUDIO DROPPED (stale ${responseId} != active ${this.activeResponseId})`,
+        );
+      }
+      return;
+    }
+    this.playAudio(frame.slice(FRAME_HEADER_SIZE));
+  }
+
+  private playAudio(pcm: ArrayBuffer): void {
+    if (msgCount <= 5 || msgCount % 50 === 0) {
+      console.log(
+        `[BE→VC] #${msgCount} AUDIO: ${pcm.byteLength}B, playback.isPlaying=${this.playback.isPlaying}`,
+      );
+    }
+    this.playback.playChunk(pcm);
+    if (this.firstAudioForResponse) {
+      this.firstAudioForResponse = false;
+      this.emit("audioPlaybackStart");
+    }
+  }
+
   private cleanup(): void {
     console.log(
       `[VC] cleanup: ${audioChunksSent} audio chunks sent, ${msgCount} msgs received`,
@@ -426,10 +498,29 @@ export class VoiceConnection {
     this.capture.stop();
     this.playback.stop();
     this.activeResponseId = null;
+    this.binaryFraming = false;
     this.ws = null;
   }
 }
 
+// --- binary frame helpers ---
+
+function encodeAudioFrame(
+  stream: number,
+  seq: number,
+  responseNum: number,
+  pcm: ArrayBuffer,
+): ArrayBuffer {
+  const frame = new Uint8Array(FRAME_HEADER_SIZE + pcm.byteLength);
+  const view = new DataView(frame.buffer);
+  view.setUint8(0, stream);
+  view.setUint8(1, FRAME_VERSION);
+  view.setUint16(2, seq & 0xffff, true);
+  view.setUint32(4, responseNum >>> 0, true);
+  frame.set(new Uint8Array(pcm), FRAME_HEADER_SIZE);
+  return frame.buffer;
+}
+
 // --- base64 helpers ---
 
 function arrayBufferToBase64(buffer: ArrayBuffer): string {
@@ -33,13 +33,21 @@ export default function WorldExplorer() {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
-  // Build ordered splat URL candidates: prefer 500k for balanced quality/perf.
+  // Build ordered splat URL candidates. With an LOD ladder, start at the
+  // backend's pick for this device and link (smaller rungs as fallbacks);
+  // otherwise prefer 500k for balanced quality/perf.
   const splatCandidates = useMemo(() => {
     if (!worldAssets) return [];
     const urls: string[] = [];
     const tryPush = (url: string | null | undefined) => {
       if (url && !urls.includes(url)) urls.push(url);
     };
+    const ladder = worldAssets.lodLadder;
+    if (ladder.length > 0) {
+      tryPush(worldAssets.defaultSpzUrl);
+      const initial = ladder.findIndex((rung) => rung.url === worldAssets.defaultSpzUrl);
+      for (const rung of ladder.slice(0, Math.max(0, initial)).reverse()) tryPush(rung.url);
+    }
     tryPush(worldAssets.spzUrls['500k']);
     tryPush(worldAssets.spzUrls['100k']);
     tryPush(worldAssets.defaultSpzUrl);
@@ -50,6 +58,13 @@ export default function WorldExplorer() {
     return urls;
   }, [worldAssets]);
 
+  // Larger LOD rungs to swap in, in order, once the first splat renders.
+  const upgradeUrls = useMemo(() => {
+    const ladder = worldAssets?.lodLadder ?? [];
+    const initial = ladder.findIndex((rung) => rung.url === worldAssets?.defaultSpzUrl);
+    return initial < 0 ? [] : ladder.slice(initial + 1).map((rung) => rung.url);
+  }, [worldAssets]);
+
   const panoUrl = worldAssets?.panoUrl ?? null;
 
   useEffect(() => {
@@ -161,6 +176,12 @@ export default function WorldExplorer() {
         let packedSplats: Awaited<ReturnType<SplatLoader['loadAsync']>> | null = null;
         let lastErr: unknown = null;
         const splatLoader = new SplatLoader();
+        const makeMesh = (splats: NonNullable<typeof packedSplats>) => {
+          const splatMesh = new SplatMesh({ packedSplats: splats, editable: false });
+          splatMesh.quaternion.set(1, 0, 0, 0); // 180° X rotation: OpenCV → OpenGL coord flip
+          splatMesh.frustumCulled = false;
+          return splatMesh;
+        };
 
         for (const url of splatCandidates) {
           if (disposed) return;
@@ -187,9 +208,7 @@ export default function WorldExplorer() {
         if (disposed) return;
 
         // Create SplatMesh
-        const mesh = new SplatMesh({ packedSplats, editable: false });
-        mesh.quaternion.set(1, 0, 0, 0); // 180° X rotation: OpenCV → OpenGL coord flip
-        mesh.frustumCulled = false;
+        const mesh = makeMesh(packedSplats);
         scene.add(mesh);
         worldMesh = mesh;
 
@@ -201,6 +220,29 @@ export default function WorldExplorer() {
 
         setProgress(1);
         setIsLoading(false);
+
+        // Walk up the LOD ladder in the background, swapping each larger
+        // splat in once it's ready (camera stays where the user put it).
+        for (const url of upgradeUrls) {
+          if (disposed) return;
+          try {
+            const upgraded = makeMesh(await splatLoader.loadAsync(url));
+            await upgraded.initialized;
+            if (disposed) {
+              upgraded.dispose();
+              return;
+            }
+            scene.add(upgraded);
+            if (worldMesh) {
+              scene.remove(worldMesh);
+              worldMesh.dispose();
+            }
+            worldMesh = upgraded;
+          } catch (err) {
+            console.warn('[WorldExplorer] LOD upgrade failed, keeping current splat:', url, err);
+            return;
+          }
+        }
       } catch (err) {
         if (disposed) return;
         setError(err instanceof Error ? err.message : 'Failed to load world');
@@ -251,7 +293,7 @@ export default function WorldExplorer() {
         mount.removeChild(canvas);
       }
     };
-  }, [panoUrl, splatCandidates, setCaptureWorldFrame]);
+  }, [panoUrl, splatCandidates, upgradeUrls, setCaptureWorldFrame]);
 
   return (
     <div className="world-explorer">
@@ -14,6 +14,7 @@ import {
 import { useAppStore } from "../store";
 import { useSelectionStore } from "../selectionStore";
 import { musicService } from "../audio/MusicService";
+import { toRenderableAssets, type RenderableAssetsResponse } from "../utils/worldGeneration";
 
 export interface VoiceState {
   status: ConnectionStatus;
@@ -124,6 +125,14 @@ export function useVoiceConnection(): VoiceState {
       }
     });
 
+    // Progressive generation: swap the mini preview for the upgraded world
+    vc.on("worldUpgrade", (worldId: string, assets: RenderableAssetsResponse) => {
+      const state = useAppStore.getState();
+      if (state.phase !== "exploring" || state.worldId === worldId) return;
+      console.log(`[WORLD] Upgrade ready: ${state.worldId} → ${worldId}`);
+      state.setRenderableWorldData(worldId, toRenderableAssets(assets));
+    });
+
     // Backend signals all confirm_exploration tool calls are done
     vc.on("transitionComplete", () => {
       useAppStore.getState().setTransitionComplete(true);
@@ -12,6 +12,13 @@ export interface TimePeriodData {
   label: string;
 }
 
+/** One splat resolution in the backend's LOD upgrade ladder (smallest first). */
+export interface SplatLodRung {
+  resolution: string;
+  url: string;
+  bytes: number | null;
+}
+
 export interface WorldRenderableAssets {
   spzUrls: Record<string, string>;
   defaultSpzUrl: string | null;
@@ -20,6 +27,8 @@ export interface WorldRenderableAssets {
   thumbnailUrl: string | null;
   caption: string | null;
   worldMarbleUrl: string | null;
+  /** Empty unless the backend planned an LOD ladder; defaultSpzUrl is its initial rung. */
+  lodLadder: SplatLodRung[];
 }
 
 export type TileMode = 'dark' | 'voyager';
@@ -143,6 +152,7 @@ export const useAppStore = create<AppState>((set) => ({
         thumbnailUrl: null,
         caption: null,
         worldMarbleUrl: null,
+        lodLadder: [],
       },
     }),
   setRenderableWorldData: (worldId, assets) =>
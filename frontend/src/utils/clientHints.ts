@@ -0,0 +1,54 @@
+/**
+ * Splat level-of-detail hints for the backend: measured downlink, device
+ * memory and a rough GPU tier. Sent as `downlink`, `device_memory` and
+ * `gpu_tier` query params; the backend picks the initial splat resolution
+ * and an upgrade ladder from them (services/splat_lod.py).
+ */
+
+interface NavigatorWithHints extends Navigator {
+  connection?: { downlink?: number };
+  deviceMemory?: number;
+}
+
+const SOFTWARE_RENDERERS = /swiftshader|llvmpipe|softpipe|software|microsoft basic render/i;
+const MOBILE_GPUS = /mali|adreno|powervr|apple gpu|intel\(r\) (hd|uhd)|intel hd|videocore/i;
+
+let gpuTier: number | null | undefined;
+
+/** 0 = software / no WebGL, 1 = mobile or integrated, 2 = everything else. Detected once. */
+function detectGpuTier(): number | null {
+  if (gpuTier !== undefined) return gpuTier;
+  gpuTier = null;
+  try {
+    const canvas = document.createElement('canvas');
+    const gl = canvas.getContext('webgl2') ?? canvas.getContext('webgl');
+    if (!gl) {
+      gpuTier = 0;
+      return gpuTier;
+    }
+    const info = gl.getExtension('WEBGL_debug_renderer_info');
+    const renderer = String(
+      info ? gl.getParameter(info.UNMASKED_RENDERER_WEBGL) : gl.getParameter(gl.RENDERER),
+    );
+    gl.getExtension('WEBGL_lose_context')?.loseContext();
+    if (SOFTWARE_RENDERERS.test(renderer)) gpuTier = 0;
+    else if (MOBILE_GPUS.test(renderer)) gpuTier = 1;
+    else gpuTier = 2;
+  } catch {
+    // Leave the tier unknown; the backend then goes by link and memory.
+  }
+  return gpuTier;
+}
+
+/** Query params for /api/worlds/status, /stream and /ws/voice (empty when nothing is known). */
+export function clientHintsParams(): URLSearchParams {
+  const params = new URLSearchParams();
+  if (typeof navigator === 'undefined') return params;
+  const nav = navigator as NavigatorWithHints;
+  const downlink = nav.connection?.downlink;
+  if (typeof downlink === 'number' && downlink > 0) params.set('downlink', String(downlink));
+  if (typeof nav.deviceMemory === 'number') params.set('device_memory', String(nav.deviceMemory));
+  const tier = detectGpuTier();
+  if (tier !== null) params.set('gpu_tier', String(tier));
+  return params;
+}
@@ -1,8 +1,18 @@
+import { clientHintsParams } from './clientHints';
+import type { SplatLodRung } from '../store';
+
 interface GenerateStartResponse {
   operation_id: string;
+  reused?: 'ready' | 'in_flight' | 'prefetched' | null;
+}
+
+export interface SplatLodRungResponse {
+  resolution: string;
+  url: string;
+  bytes: number | null;
 }
 
-interface RenderableAssetsResponse {
+export interface RenderableAssetsResponse {
   spz_urls: Record<string, string>;
   default_spz_url: string | null;
   collider_mesh_url: string | null;
@@ -10,6 +20,7 @@ interface RenderableAssetsResponse {
   thumbnail_url: string | null;
   caption: string | null;
   world_marble_url: string | null;
+  lod?: { initial: string; ladder: SplatLodRungResponse[] } | null;
 }
 
 interface StatusResponse {
@@ -21,12 +32,44 @@ interface StatusResponse {
   splat_url?: string | null;
   assets?: RenderableAssetsResponse;
   error?: string | null;
+  next_poll_s?: number | null;
   debug?: {
     operation?: Record<string, unknown> | null;
     world?: Record<string, unknown> | null;
   } | null;
 }
 
+/** Backend-relative asset URLs (the /api/worlds/assets proxy) → absolute, CDN URLs unchanged. */
+function resolveAssetUrl(url: string | null | undefined): string | null {
+  if (!url) return null;
+  return url.startsWith('/') ? `${getBackendBaseUrl()}${url}` : url;
+}
+
+/** Backend (snake_case) renderable assets → store shape. */
+export function toRenderableAssets(
+  assets: RenderableAssetsResponse,
+  splatUrl?: string | null,
+): RenderableWorldResult['assets'] {
+  const spzUrls: Record<string, string> = {};
+  for (const [res, url] of Object.entries(assets.spz_urls ?? {})) {
+    spzUrls[res] = resolveAssetUrl(url) ?? url;
+  }
+  return {
+    spzUrls,
+    defaultSpzUrl: resolveAssetUrl(assets.default_spz_url ?? splatUrl),
+    colliderMeshUrl: resolveAssetUrl(assets.collider_mesh_url),
+    panoUrl: resolveAssetUrl(assets.pano_url),
+    thumbnailUrl: resolveAssetUrl(assets.thumbnail_url),
+    caption: assets.caption ?? null,
+    worldMarbleUrl: assets.world_marble_url ?? null,
+    lodLadder: (assets.lod?.ladder ?? []).map((rung) => ({
+      resolution: rung.resolution,
+      url: resolveAssetUrl(rung.url) ?? rung.url,
+      bytes: rung.bytes,
+    })),
+  };
+}
+
 export interface RenderableWorldResult {
   operationId: string;
   worldId: string;
@@ -39,6 +82,7 @@ export interface RenderableWorldResult {
     thumbnailUrl: string | null;
     caption: string | null;
     worldMarbleUrl: string | null;
+    lodLadder: SplatLodRung[];
   };
 }
 
@@ -53,9 +97,19 @@ function getBackendBaseUrl(): string {
   return '';
 }
 
+/** Where/when the world is set — lets the backend reuse an equivalent world. */
+export interface GenerationContext {
+  location?: string;
+  timePeriod?: string;
+  lat?: number;
+  lng?: number;
+  year?: number;
+}
+
 async function postGenerate(
   sceneDescription: string,
   signal?: AbortSignal,
+  context?: GenerationContext,
 ): Promise<GenerateStartResponse> {
   const baseUrl = getBackendBaseUrl();
   const url = baseUrl
@@ -65,7 +119,14 @@ async function postGenerate(
   const res = await fetch(url, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ scene_description: sceneDescription }),
+    body: JSON.stringify({
+      scene_description: sceneDescription,
+      location: context?.location,
+      time_period: context?.timePeriod,
+      lat: context?.lat,
+      lng: context?.lng,
+      year: context?.year,
+    }),
     signal,
   });
   if (!res.ok) {
@@ -74,9 +135,17 @@ async function postGenerate(
   return (await res.json()) as GenerateStartResponse;
 }
 
+/** debug (dev builds) + splat LOD hints, as a query string. */
+function statusQuery(): string {
+  const params = clientHintsParams();
+  if (import.meta.env.DEV) params.set('debug', '1');
+  const qs = params.toString();
+  return qs ? `?${qs}` : '';
+}
+
 async function getStatus(operationId: string, signal?: AbortSignal): Promise<StatusResponse> {
   const baseUrl = getBackendBaseUrl();
-  const qs = import.meta.env.DEV ? '?debug=1' : '';
+  const qs = statusQuery();
   const url = baseUrl
     ? `${baseUrl}/api/worlds/status/${operationId}${qs}`
     : `/api/worlds/status/${operationId}${qs}`;
@@ -88,6 +157,17 @@ async function getStatus(operationId: string, signal?: AbortSignal): Promise<Sta
   return (await res.json()) as StatusResponse;
 }
 
+// Backend suggests when to poll next (dense near the expected finish);
+// clamp it so a bad hint can't stall or hammer us.
+const DEFAULT_POLL_MS = 5000;
+const MIN_POLL_MS = 1000;
+const MAX_POLL_MS = 15000;
+
+function nextPollMs(status: StatusResponse): number {
+  if (typeof status.next_poll_s !== 'number') return DEFAULT_POLL_MS;
+  return Math.min(MAX_POLL_MS, Math.max(MIN_POLL_MS, status.next_poll_s * 1000));
+}
+
 function sleep(ms: number, signal?: AbortSignal): Promise<void> {
   return new Promise((resolve, reject) => {
     const onDone = () => {
@@ -104,17 +184,59 @@ function sleep(ms: number, signal?: AbortSignal): Promise<void> {
   });
 }
 
+/**
+ * Wait for the final status over Server-Sent Events. Resolves with the
+ * "ready"/"error" StatusResponse; rejects if the stream can't be used, so
+ * the caller falls back to polling.
+ */
+function waitForFinalStatus(operationId: string, signal?: AbortSignal): Promise<StatusResponse> {
+  return new Promise((resolve, reject) => {
+    if (typeof EventSource === 'undefined') {
+      reject(new Error('EventSource unavailable'));
+      return;
+    }
+    const baseUrl = getBackendBaseUrl();
+    const qs = statusQuery();
+    const source = new EventSource(`${baseUrl}/api/worlds/stream/${operationId}${qs}`);
+    const finish = (settle: () => void) => {
+      source.close();
+      signal?.removeEventListener('abort', onAbort);
+      settle();
+    };
+    const onAbort = () => finish(() => reject(new DOMException('Aborted', 'AbortError')));
+    signal?.addEventListener('abort', onAbort, { once: true });
+
+    source.addEventListener('status', (event) => {
+      const status = JSON.parse((event as MessageEvent<string>).data) as StatusResponse;
+      console.log('[WORLD] stream status:', status.status);
+      if (status.done) finish(() => resolve(status));
+    });
+    // The backend ends the stream after the final event; any earlier error
+    // (proxy, network, old backend) means: go back to polling.
+    source.onerror = () => finish(() => reject(new Error('world status stream failed')));
+  });
+}
+
 /**
  * Start World Labs generation using Gemini's world_description from
- * summarize_session, then poll until the 3D assets are ready.
+ * summarize_session, then wait until the 3D assets are ready — pushed over
+ * /api/worlds/stream, polling /status only if the stream fails.
  */
 export async function generateWorld(
   sceneDescription: string,
   signal?: AbortSignal,
+  context?: GenerationContext,
 ): Promise<RenderableWorldResult> {
-  const start = await postGenerate(sceneDescription, signal);
+  const start = await postGenerate(sceneDescription, signal, context);
   console.log('[WORLD] generation started:', start.operation_id);
   let attempts = 0;
+  let streamed: StatusResponse | null = null;
+  try {
+    streamed = await waitForFinalStatus(start.operation_id, signal);
+  } catch (err) {
+    if (signal?.aborted) throw err;
+    console.warn('[WORLD] status stream unavailable, polling instead:', err);
+  }
 
   while (true) {
     if (signal?.aborted) {
@@ -122,7 +244,8 @@ export async function generateWorld(
     }
 
     attempts += 1;
-    const status = await getStatus(start.operation_id, signal);
+    const status = streamed ?? (await getStatus(start.operation_id, signal));
+    streamed = null;
     console.log(`[WORLD] poll #${attempts}:`, {
       operationId: status.operation_id,
       done: status.done,
@@ -143,15 +266,7 @@ export async function generateWorld(
         operationId: status.operation_id,
         worldId: status.world_id,
         displayName: status.display_name ?? null,
-        assets: {
-          spzUrls: status.assets.spz_urls ?? {},
-          defaultSpzUrl: status.assets.default_spz_url ?? status.splat_url ?? null,
-          colliderMeshUrl: status.assets.collider_mesh_url ?? null,
-          panoUrl: status.assets.pano_url ?? null,
-          thumbnailUrl: status.assets.thumbnail_url ?? null,
-          caption: status.assets.caption ?? null,
-          worldMarbleUrl: status.assets.world_marble_url ?? null,
-        },
+        assets: toRenderableAssets(status.assets, status.splat_url),
       };
     }
 
@@ -160,6 +275,6 @@ export async function generateWorld(
       throw new Error(status.error || 'World generation failed');
     }
 
-    await sleep(5000, signal);
+    await sleep(nextPollMs(status), signal);
   }
 }